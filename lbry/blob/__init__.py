@@ -4,3 +4,6 @@ MAX_BLOB_SIZE = 2 * 2 ** 20
 
 # digest_size is in bytes, and blob hashes are hex encoded
 BLOBHASH_LENGTH = get_lbry_hash_obj().digest_size * 2
+
+# blobs in a sharded blob directory are kept in subdirectories named after this many leading characters of their hash
+BLOB_SHARD_PREFIX_LENGTH = 2
@@ -15,7 +15,7 @@ from cryptography.hazmat.backends import default_backend
 from lbry.utils import get_lbry_hash_obj
 from lbry.error import DownloadCancelledError, InvalidBlobHashError, InvalidDataError
 
-from lbry.blob import MAX_BLOB_SIZE, BLOBHASH_LENGTH
+from lbry.blob import MAX_BLOB_SIZE, BLOBHASH_LENGTH, BLOB_SHARD_PREFIX_LENGTH
 from lbry.blob.blob_info import BlobInfo
 from lbry.blob.writer import HashBlobWriter
 
@@ -25,6 +25,25 @@ log = logging.getLogger(__name__)
 HEXMATCH = re.compile("^[a-f,0-9]+$")
 BACKEND = default_backend()
 
+# sharded blob directories, mapped to whether blob files may still be left at the top of the directory
+_sharded_blob_dirs: typing.Dict[str, bool] = {}
+
+
+def set_blob_dir_sharded(blob_dir: str, migrating: bool):
+    _sharded_blob_dirs[blob_dir] = migrating
+
+
+def get_blob_path(blob_dir: str, blob_hash: str) -> str:
+    migrating = _sharded_blob_dirs.get(blob_dir)
+    if migrating is None:
+        return os.path.join(blob_dir, blob_hash)
+    path = os.path.join(blob_dir, blob_hash[:BLOB_SHARD_PREFIX_LENGTH], blob_hash)
+    if migrating and not os.path.isfile(path):
+        flat_path = os.path.join(blob_dir, blob_hash)
+        if os.path.isfile(flat_path):
+            return flat_path
+    return path
+
 
 def is_valid_blobhash(blobhash: str) -> bool:
     """Checks whether the blobhash is the correct length and contains only
@@ -307,7 +326,7 @@ class BlobFile(AbstractBlob):
         super().__init__(loop, blob_hash, length, blob_completed_callback, blob_directory, added_on, is_mine)
         if not blob_directory or not os.path.isdir(blob_directory):
             raise OSError(f"invalid blob directory '{blob_directory}'")
-        self.file_path = os.path.join(self.blob_directory, self.blob_hash)
+        self.file_path = get_blob_path(self.blob_directory, self.blob_hash)
         if self.file_exists:
             file_size = int(os.stat(self.file_path).st_size)
             if length and length != file_size:
@@ -332,7 +351,12 @@ class BlobFile(AbstractBlob):
 
     @contextlib.contextmanager
     def _reader_context(self) -> typing.ContextManager[typing.BinaryIO]:
-        handle = open(self.file_path, 'rb')
+        try:
+            handle = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            # moved into its shard since this blob was opened
+            self.file_path = get_blob_path(self.blob_directory, self.blob_hash)
+            handle = open(self.file_path, 'rb')
         try:
             yield handle
         finally:
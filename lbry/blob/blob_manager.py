@@ -1,11 +1,15 @@
 import os
 import typing
 import asyncio
+import itertools
 import logging
 from lbry.utils import LRUCacheWithMetrics
+from lbry.blob import BLOB_SHARD_PREFIX_LENGTH
 from lbry.blob.blob_file import is_valid_blobhash, BlobFile, BlobBuffer, AbstractBlob
-from lbry.stream.descriptor import StreamDescriptor
+from lbry.blob.blob_file import get_blob_path, set_blob_dir_sharded
+from lbry.stream.descriptor import StreamDescriptor, forget_stream_descriptor
 from lbry.connection_manager import ConnectionManager
+from lbry.wallet.stream import StreamController
 
 if typing.TYPE_CHECKING:
     from lbry.conf import Config
@@ -14,6 +18,9 @@ if typing.TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+# written to a blob directory once it is sharded
+SHARDED_MARKER = '.sharded'
+
 
 class BlobManager:
     def __init__(self, loop: asyncio.AbstractEventLoop, blob_dir: str, storage: 'SQLiteStorage', config: 'Config',
@@ -35,8 +42,27 @@ class BlobManager:
         self.decrypted_blob_lru_cache = None if not self.config.blob_lru_cache_size else LRUCacheWithMetrics(
             self.config.blob_lru_cache_size)
         self.connection_manager = ConnectionManager(loop)
+        self._on_completed_controller = StreamController()
+        self.on_completed = self._on_completed_controller.stream
+        self.sharded = False
+        self._shard_task: typing.Optional[asyncio.Task] = None
 
     def _get_blob(self, blob_hash: str, length: typing.Optional[int] = None, is_mine: bool = False):
+        if self.sharded:
+            # the finished blobs were loaded from the database, whether the file is still there is only
+            # checked now that the blob is needed
+            if self.config.save_blobs or blob_hash in self.completed_blob_hashes:
+                blob = BlobFile(
+                    self.loop, blob_hash, length, self.blob_completed, self.blob_dir, is_mine=is_mine
+                )
+                if blob_hash in self.completed_blob_hashes and not blob.get_is_verified():
+                    log.warning("blob %s was removed from the blob directory", blob_hash)
+                    self.completed_blob_hashes.remove(blob_hash)
+                    self.loop.create_task(self.storage.set_blobs_pending([blob_hash]))
+                return blob
+            return BlobBuffer(
+                self.loop, blob_hash, length, self.blob_completed, self.blob_dir, is_mine=is_mine
+            )
         if self.config.save_blobs or (
                 is_valid_blobhash(blob_hash) and os.path.isfile(os.path.join(self.blob_dir, blob_hash))):
             return BlobFile(
@@ -65,13 +91,22 @@ class BlobManager:
     def is_blob_verified(self, blob_hash: str, length: typing.Optional[int] = None) -> bool:
         if not is_valid_blobhash(blob_hash):
             raise ValueError(blob_hash)
-        if not os.path.isfile(os.path.join(self.blob_dir, blob_hash)):
+        if not os.path.isfile(get_blob_path(self.blob_dir, blob_hash)):
             return False
         if blob_hash in self.blobs:
             return self.blobs[blob_hash].get_is_verified()
         return self._get_blob(blob_hash, length).get_is_verified()
 
     async def setup(self) -> bool:
+        if self.blob_dir and await self.loop.run_in_executor(None, self._make_shards):
+            self.sharded = True
+            set_blob_dir_sharded(self.blob_dir, migrating=True)
+            self.completed_blob_hashes.update(await self.storage.get_finished_blob_hashes())
+            self._shard_task = self.loop.create_task(self._move_blobs_to_shards())
+            if self.config.track_bandwidth:
+                self.connection_manager.start()
+            return True
+
         def get_files_in_blob_dir() -> typing.Set[str]:
             if not self.blob_dir:
                 return set()
@@ -89,7 +124,69 @@ class BlobManager:
             self.connection_manager.start()
         return True
 
+    def _make_shards(self) -> bool:
+        """ Make the shard directories if the blob directory is or should be sharded, returns whether it is. """
+        marker = os.path.join(self.blob_dir, SHARDED_MARKER)
+        if not self.config.shard_blob_dir and not os.path.isfile(marker):
+            return False
+        for prefix in range(16 ** BLOB_SHARD_PREFIX_LENGTH):
+            os.makedirs(os.path.join(self.blob_dir, '%0*x' % (BLOB_SHARD_PREFIX_LENGTH, prefix)), exist_ok=True)
+        with open(marker, 'a'):
+            pass
+        return True
+
+    async def _move_blobs_to_shards(self, batch_size: int = 1000):
+        """
+        Move the blob files left at the top of the blob directory into their shards and check the ones that
+        weren't known to be finished. Blobs that fail to move are left for the next startup.
+        """
+        def next_batch(entries) -> typing.Optional[typing.List[str]]:
+            names = [entry.name for entry in itertools.islice(entries, batch_size)]
+            if not names:
+                return None
+            return [name for name in names if is_valid_blobhash(name)]
+
+        def move(blob_hashes: typing.List[str]) -> typing.List[str]:
+            moved = []
+            for blob_hash in blob_hashes:
+                try:
+                    os.replace(
+                        os.path.join(self.blob_dir, blob_hash),
+                        os.path.join(self.blob_dir, blob_hash[:BLOB_SHARD_PREFIX_LENGTH], blob_hash)
+                    )
+                except OSError as err:
+                    log.warning("failed to move blob %s into its shard: %s", blob_hash, err)
+                else:
+                    moved.append(blob_hash)
+            return moved
+
+        left = 0
+        with os.scandir(self.blob_dir) as entries:
+            while True:
+                batch = await self.loop.run_in_executor(None, next_batch, entries)
+                if batch is None:
+                    break
+                moved = await self.loop.run_in_executor(None, move, batch)
+                left += len(batch) - len(moved)
+                for blob_hash in moved:
+                    if isinstance(self.blobs.get(blob_hash), BlobFile):
+                        self.blobs[blob_hash].file_path = get_blob_path(self.blob_dir, blob_hash)
+                unknown = [blob_hash for blob_hash in moved if blob_hash not in self.completed_blob_hashes]
+                if unknown:
+                    await self.ensure_completed_blobs_status(unknown)
+                    self.completed_blob_hashes.update(
+                        blob_hash for blob_hash in unknown
+                        if blob_hash in self.blobs and self.blobs[blob_hash].get_is_verified()
+                    )
+        if left:
+            log.info("%i blobs will be moved into the sharded blob directory on the next startup", left)
+        else:
+            set_blob_dir_sharded(self.blob_dir, migrating=False)
+
     def stop(self):
+        if self._shard_task and not self._shard_task.done():
+            self._shard_task.cancel()
+        self._shard_task = None
         self.connection_manager.stop()
         while self.blobs:
             _, blob = self.blobs.popitem()
@@ -104,6 +201,8 @@ class BlobManager:
             raise Exception("Blob hash is None")
         if not blob.length:
             raise Exception("Blob has a length of 0")
+        if self._on_completed_controller.has_listener:
+            self._on_completed_controller.add(blob)
         if isinstance(blob, BlobFile):
             if blob.blob_hash not in self.completed_blob_hashes:
                 self.completed_blob_hashes.add(blob.blob_hash)
@@ -132,9 +231,10 @@ class BlobManager:
         if not is_valid_blobhash(blob_hash):
             raise Exception("invalid blob hash to delete")
 
+        forget_stream_descriptor(blob_hash)
         if blob_hash not in self.blobs:
-            if self.blob_dir and os.path.isfile(os.path.join(self.blob_dir, blob_hash)):
-                os.remove(os.path.join(self.blob_dir, blob_hash))
+            if self.blob_dir and os.path.isfile(get_blob_path(self.blob_dir, blob_hash)):
+                os.remove(get_blob_path(self.blob_dir, blob_hash))
         else:
             self.blobs.pop(blob_hash).delete()
             if blob_hash in self.completed_blob_hashes:
@@ -10,7 +10,7 @@ from lbry.utils import cache_concurrent
 if typing.TYPE_CHECKING:
     from lbry.blob.blob_file import AbstractBlob
     from lbry.blob.writer import HashBlobWriter
-    from lbry.connection_manager import ConnectionManager
+    from lbry.connection_manager import ConnectionManager, ConnectionCounter
 
 log = logging.getLogger(__name__)
 
@@ -24,6 +24,7 @@ class BlobExchangeClientProtocol(asyncio.Protocol):
         self.transport: typing.Optional[asyncio.Transport] = None
         self.peer_timeout = peer_timeout
         self.connection_manager = connection_manager
+        self.connection_counter: typing.Optional['ConnectionCounter'] = None
         self.writer: typing.Optional['HashBlobWriter'] = None
         self.blob: typing.Optional['AbstractBlob'] = None
 
@@ -35,12 +36,8 @@ class BlobExchangeClientProtocol(asyncio.Protocol):
         self.closed = asyncio.Event()
 
     def data_received(self, data: bytes):
-        if self.connection_manager:
-            if not self.peer_address:
-                addr_info = self.transport.get_extra_info('peername')
-                self.peer_address, self.peer_port = addr_info
-            # assert self.peer_address is not None
-            self.connection_manager.received_data(f"{self.peer_address}:{self.peer_port}", len(data))
+        if self.connection_counter:
+            self.connection_counter.received += len(data)
         if not self.transport or self.transport.is_closing():
             log.warning("transport closing, but got more bytes from %s:%i\n%s", self.peer_address, self.peer_port,
                         binascii.hexlify(data))
@@ -109,8 +106,8 @@ class BlobExchangeClientProtocol(asyncio.Protocol):
             msg = request.serialize()
             log.debug("send request to %s:%i -> %s", self.peer_address, self.peer_port, msg.decode())
             self.transport.write(msg)
-            if self.connection_manager:
-                self.connection_manager.sent_data(f"{self.peer_address}:{self.peer_port}", len(msg))
+            if self.connection_counter:
+                self.connection_counter.sent += len(msg)
             response: BlobResponse = await asyncio.wait_for(self._response_fut, self.peer_timeout)
             availability_response = response.get_availability_response()
             price_response = response.get_price_response()
@@ -212,12 +209,12 @@ class BlobExchangeClientProtocol(asyncio.Protocol):
         self.peer_address, self.peer_port = addr[0], addr[1]
         self.transport = transport
         if self.connection_manager:
-            self.connection_manager.connection_made(f"{self.peer_address}:{self.peer_port}")
+            self.connection_counter = self.connection_manager.connection_made(f"{self.peer_address}:{self.peer_port}")
         log.debug("connection made to %s:%i", self.peer_address, self.peer_port)
 
     def connection_lost(self, exc):
-        if self.connection_manager:
-            self.connection_manager.outgoing_connection_lost(f"{self.peer_address}:{self.peer_port}")
+        if self.connection_counter:
+            self.connection_manager.connection_lost(self.connection_counter)
         log.debug("connection lost to %s:%i (reason: %s, %s)", self.peer_address, self.peer_port, str(exc),
                   str(type(exc)))
         self.close()
@@ -10,6 +10,7 @@ from lbry.blob_exchange.serialization import BlobAvailabilityResponse, BlobPrice
 
 if typing.TYPE_CHECKING:
     from lbry.blob.blob_manager import BlobManager
+    from lbry.connection_manager import ConnectionCounter
 
 log = logging.getLogger(__name__)
 
@@ -30,6 +31,7 @@ class BlobServerProtocol(asyncio.Protocol):
         self.transport: typing.Optional[asyncio.Transport] = None
         self.lbrycrd_address = lbrycrd_address
         self.peer_address_and_port: typing.Optional[str] = None
+        self.connection_counter: typing.Optional['ConnectionCounter'] = None
         self.started_transfer = asyncio.Event()
         self.transfer_finished = asyncio.Event()
         self.close_on_idle_task: typing.Optional[asyncio.Task] = None
@@ -53,12 +55,15 @@ class BlobServerProtocol(asyncio.Protocol):
         self.transport = transport
         self.close_on_idle_task = self.loop.create_task(self.close_on_idle())
         self.peer_address_and_port = "%s:%i" % self.transport.get_extra_info('peername')
-        self.blob_manager.connection_manager.connection_received(self.peer_address_and_port)
+        self.connection_counter = self.blob_manager.connection_manager.connection_received(
+            self.peer_address_and_port
+        )
         log.debug("received connection from %s", self.peer_address_and_port)
 
     def connection_lost(self, exc: typing.Optional[Exception]) -> None:
         log.debug("lost connection from %s", self.peer_address_and_port)
-        self.blob_manager.connection_manager.incoming_connection_lost(self.peer_address_and_port)
+        if self.connection_counter:
+            self.blob_manager.connection_manager.connection_lost(self.connection_counter)
         self.transport = None
         if self.close_on_idle_task and not self.close_on_idle_task.done():
             self.close_on_idle_task.cancel()
@@ -70,7 +75,8 @@ class BlobServerProtocol(asyncio.Protocol):
             to_send.append(responses.pop())
         serialized = BlobResponse(to_send).serialize()
         self.transport.write(serialized)
-        self.blob_manager.connection_manager.sent_data(self.peer_address_and_port, len(serialized))
+        if self.connection_counter:
+            self.connection_counter.sent += len(serialized)
 
     async def handle_request(self, request: BlobRequest):
         addr = self.transport.get_extra_info('peername')
@@ -103,7 +109,8 @@ class BlobServerProtocol(asyncio.Protocol):
                 try:
                     sent = await asyncio.wait_for(blob.sendfile(self), self.transfer_timeout)
                     if sent and sent > 0:
-                        self.blob_manager.connection_manager.sent_data(self.peer_address_and_port, sent)
+                        if self.connection_counter:
+                            self.connection_counter.sent += sent
                         log.info("sent %s (%i bytes) to %s:%i", blob_hash, sent, peer_address, peer_port)
                     else:
                         self.close()
@@ -130,7 +137,8 @@ class BlobServerProtocol(asyncio.Protocol):
             self.close()
             return
         if data:
-            self.blob_manager.connection_manager.received_data(self.peer_address_and_port, len(data))
+            if self.connection_counter:
+                self.connection_counter.received += len(data)
             _, separator, remainder = data.rpartition(b'}')
             if not separator:
                 self.buf += data
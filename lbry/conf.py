@@ -638,8 +638,19 @@ class Config(CLIConfig):
 
     # blob announcement and download
     save_blobs = Toggle("Save encrypted blob files for hosting, otherwise download blobs to memory only.", True)
+    shard_blob_dir = Toggle(
+        "Keep blob files in subdirectories named after the start of their hash and load the finished blobs from "
+        "the database at startup instead of listing the blob directory. Blobs already saved are moved in the "
+        "background, the directory stays sharded once this has been enabled.", False
+    )
     network_storage_limit = Integer("Disk space in MB to be allocated for helping the P2P network. 0 = disable", 0)
     blob_storage_limit = Integer("Disk space in MB to be allocated for blob storage. 0 = no limit", 0)
+    concurrent_background_downloads = Integer(
+        "Maximum number of streams to download at once to help the P2P network (see network_storage_limit)", 4
+    )
+    background_download_bandwidth = Integer(
+        "Bandwidth in KB/s that downloads to help the P2P network may use. 0 = no limit", 0
+    )
     blob_lru_cache_size = Integer(
         "LRU cache size for decrypted downloaded blobs used to minimize re-downloading the same blobs when "
         "replying to a range request. Set to 0 to disable.", 32
@@ -656,7 +667,19 @@ class Config(CLIConfig):
         "Maximum number of peers to connect to while downloading a blob", 4,
         previous_names=['max_connections_per_stream']
     )
+    save_file_read_ahead = Integer(
+        "Number of blobs to download at once while saving a stream to a file, blobs finishing out of order are "
+        "written at their offsets in the file", 1
+    )
     concurrent_hub_requests = Integer("Maximum number of concurrent hub requests", 32)
+    hub_pool_size = Integer(
+        "Number of hubs to stay connected to. Requests that any hub can answer, such as resolve and claim_search, "
+        "are spread across them and fail over between them", 3
+    )
+    hedge_hub_requests = Toggle(
+        "Repeat a request on the next fastest hub when it is slower than the 95th percentile of recent requests to "
+        "its hub, using whichever response comes first (requires hub_pool_size > 1)", False
+    )
     fixed_peer_delay = Float(
         "Amount of seconds before adding the reflector servers as potential peers to download from in case dht"
         "peers are not found or are slow", 2.0
@@ -733,6 +756,13 @@ class Config(CLIConfig):
     allowed_origin = String(
         "Allowed `Origin` header value for API request (sent by browser), use * to allow "
         "all hosts; default is to only allow API requests with no `Origin` value.", "")
+    api_batch_concurrency = Integer(
+        "Maximum number of calls from a single JSON-RPC batch request that are processed at the same time", 8
+    )
+    websocket_max_pending_events = Integer(
+        "Maximum number of events queued for a client subscribed on the /ws endpoint, a client falling further "
+        "behind is disconnected", 1000
+    )
 
     # media server
     streaming_server = String('Host name and port to serve streaming media over range requests',
@@ -1,9 +1,10 @@
 import time
 import asyncio
 import typing
-import collections
 import logging
 
+from prometheus_client import Counter, Histogram
+
 log = logging.getLogger(__name__)
 
 
@@ -11,49 +12,136 @@ CONNECTED_EVENT = "connected"
 DISCONNECTED_EVENT = "disconnected"
 TRANSFERRED_EVENT = "transferred"
 
+MIN_RATE_WINDOW_SECONDS = 0.1  # the status is recomputed when read, but not more often than this
+BPS_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8, float('inf'))
+
+
+class ConnectionCounter:
+    """
+    Bytes sent and received over one peer connection, counted by its protocol.
+    """
+    __slots__ = ('host_and_port', 'sent', 'received', 'reported_sent', 'reported_received')
+
+    def __init__(self, host_and_port: str):
+        self.host_and_port = host_and_port
+        self.sent = 0
+        self.received = 0
+        # what has already been accounted for in the status and metrics
+        self.reported_sent = 0
+        self.reported_received = 0
+
+    def take_unreported(self) -> typing.Tuple[int, int]:
+        sent, received = self.sent - self.reported_sent, self.received - self.reported_received
+        self.reported_sent, self.reported_received = self.sent, self.received
+        return sent, received
+
 
 class ConnectionManager:
+    transferred_bytes_metric = Counter(
+        "transferred_bytes", "Bytes sent and received over peer connections", namespace="connection_manager",
+        labelnames=("direction",)
+    )
+    connection_bytes_metric = Histogram(
+        "connection_bytes", "Bytes sent and received over each peer connection, observed when it closes",
+        namespace="connection_manager", labelnames=("direction",),
+        buckets=(1 << 10, 1 << 14, 1 << 18, 1 << 20, 1 << 21, 1 << 23, 1 << 25, 1 << 27, 1 << 30, float('inf'))
+    )
+    peer_bps_metric = Histogram(
+        "peer_bps", "Transfer rate with each peer, sampled when the status is read", namespace="connection_manager",
+        labelnames=("direction",), buckets=BPS_BUCKETS
+    )
+    total_bps_metric = Histogram(
+        "total_bps", "Total transfer rate, sampled when the status is read", namespace="connection_manager",
+        labelnames=("direction",), buckets=BPS_BUCKETS
+    )
+
     def __init__(self, loop: asyncio.AbstractEventLoop):
         self.loop = loop
-        self.incoming_connected: typing.Set[str] = set()
-        self.incoming: typing.DefaultDict[str, int] = collections.defaultdict(int)
-        self.outgoing_connected: typing.Set[str] = set()
-        self.outgoing: typing.DefaultDict[str, int] = collections.defaultdict(int)
+        self.connections: typing.Set[ConnectionCounter] = set()
+        # bytes of connections closed since the status was last computed
+        self._closed_sent = 0
+        self._closed_received = 0
         self._max_incoming_mbs = 0.0
         self._max_outgoing_mbs = 0.0
         self._status = {}
+        self._last_update = 0.0
         self._running = False
-        self._task: typing.Optional[asyncio.Task] = None
 
     @property
     def status(self):
-        return self._status
-
-    def sent_data(self, host_and_port: str, size: int):
-        if self._running:
-            self.outgoing[host_and_port] += size
-
-    def received_data(self, host_and_port: str, size: int):
         if self._running:
-            self.incoming[host_and_port] += size
+            now = time.perf_counter()
+            if now - self._last_update >= MIN_RATE_WINDOW_SECONDS:
+                self._update(now)
+        return self._status
 
-    def connection_made(self, host_and_port: str):
+    def _add_connection(self, host_and_port: str) -> ConnectionCounter:
+        counter = ConnectionCounter(host_and_port)
         if self._running:
-            self.outgoing_connected.add(host_and_port)
-
-    def connection_received(self, host_and_port: str):
-        # self.incoming_connected.add(host_and_port)
-        pass
+            self.connections.add(counter)
+        return counter
+
+    def connection_made(self, host_and_port: str) -> ConnectionCounter:
+        return self._add_connection(host_and_port)
+
+    def connection_received(self, host_and_port: str) -> ConnectionCounter:
+        return self._add_connection(host_and_port)
+
+    def connection_lost(self, counter: ConnectionCounter):
+        if counter not in self.connections:
+            return
+        self.connections.remove(counter)
+        sent, received = counter.take_unreported()
+        self._closed_sent += sent
+        self._closed_received += received
+        self.connection_bytes_metric.labels("sent").observe(counter.sent)
+        self.connection_bytes_metric.labels("received").observe(counter.received)
+
+    def _update(self, now: float):
+        elapsed = now - self._last_update
+        self._last_update = now
+        outgoing_bps, incoming_bps = {}, {}
+        sent, received = self._closed_sent, self._closed_received
+        self._closed_sent = self._closed_received = 0
+        for counter in self.connections:
+            peer_sent, peer_received = counter.take_unreported()
+            if peer_sent:
+                sent += peer_sent
+                outgoing_bps[counter.host_and_port] = outgoing_bps.get(counter.host_and_port, 0) + peer_sent / elapsed
+            if peer_received:
+                received += peer_received
+                incoming_bps[counter.host_and_port] = \
+                    incoming_bps.get(counter.host_and_port, 0) + peer_received / elapsed
+        for bps in outgoing_bps.values():
+            self.peer_bps_metric.labels("sent").observe(bps)
+        for bps in incoming_bps.values():
+            self.peer_bps_metric.labels("received").observe(bps)
+        self.total_bps_metric.labels("sent").observe(sent / elapsed)
+        self.total_bps_metric.labels("received").observe(received / elapsed)
+        self.transferred_bytes_metric.labels("sent").inc(sent)
+        self.transferred_bytes_metric.labels("received").inc(received)
+
+        self._status['incoming_bps'] = incoming_bps
+        self._status['outgoing_bps'] = outgoing_bps
+        self._status['total_sent'] += sent
+        self._status['total_received'] += received
+        self._status['total_outgoing_mbs'] = int(sent / elapsed) / 1000000.0
+        self._status['total_incoming_mbs'] = int(received / elapsed) / 1000000.0
+        self._max_incoming_mbs = max(self._max_incoming_mbs, self._status['total_incoming_mbs'])
+        self._max_outgoing_mbs = max(self._max_outgoing_mbs, self._status['total_outgoing_mbs'])
+        self._status['max_incoming_mbs'] = self._max_incoming_mbs
+        self._status['max_outgoing_mbs'] = self._max_outgoing_mbs
 
-    def outgoing_connection_lost(self, host_and_port: str):
-        if self._running and host_and_port in self.outgoing_connected:
-            self.outgoing_connected.remove(host_and_port)
-
-    def incoming_connection_lost(self, host_and_port: str):
-        if self._running and host_and_port in self.incoming_connected:
-            self.incoming_connected.remove(host_and_port)
+    def stop(self):
+        self.connections.clear()
+        self._closed_sent = self._closed_received = 0
+        self._status.clear()
+        self._running = False
 
-    async def _update(self):
+    def start(self):
+        self.stop()
+        self._running = True
+        self._last_update = time.perf_counter()
         self._status = {
             'incoming_bps': {},
             'outgoing_bps': {},
@@ -64,42 +152,3 @@ class ConnectionManager:
             'max_incoming_mbs': 0.0,
             'max_outgoing_mbs': 0.0
         }
-
-        while True:
-            last = time.perf_counter()
-            await asyncio.sleep(0.1)
-            self._status['incoming_bps'].clear()
-            self._status['outgoing_bps'].clear()
-            now = time.perf_counter()
-            while self.outgoing:
-                k, sent = self.outgoing.popitem()
-                self._status['total_sent'] += sent
-                self._status['outgoing_bps'][k] = sent / (now - last)
-            while self.incoming:
-                k, received = self.incoming.popitem()
-                self._status['total_received'] += received
-                self._status['incoming_bps'][k] = received / (now - last)
-            self._status['total_outgoing_mbs'] = int(sum(list(self._status['outgoing_bps'].values())
-                                                         )) / 1000000.0
-            self._status['total_incoming_mbs'] = int(sum(list(self._status['incoming_bps'].values())
-                                                         )) / 1000000.0
-            self._max_incoming_mbs = max(self._max_incoming_mbs, self._status['total_incoming_mbs'])
-            self._max_outgoing_mbs = max(self._max_outgoing_mbs, self._status['total_outgoing_mbs'])
-            self._status['max_incoming_mbs'] = self._max_incoming_mbs
-            self._status['max_outgoing_mbs'] = self._max_outgoing_mbs
-
-    def stop(self):
-        if self._task:
-            self._task.cancel()
-            self._task = None
-        self.outgoing.clear()
-        self.outgoing_connected.clear()
-        self.incoming.clear()
-        self.incoming_connected.clear()
-        self._status.clear()
-        self._running = False
-
-    def start(self):
-        self.stop()
-        self._running = True
-        self._task = self.loop.create_task(self._update())
@@ -27,7 +27,7 @@ def double_sha256(x):
 
 def hmac_sha512(key, msg):
     """ Use SHA-512 to provide an HMAC. """
-    return hmac.new(key, msg, hashlib.sha512).digest()
+    return hmac.digest(key, msg, 'sha512')
 
 
 def hash160(x):
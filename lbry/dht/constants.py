@@ -17,6 +17,9 @@ REPLICATE_INTERVAL = REFRESH_INTERVAL
 DATA_EXPIRATION = 86400  # 24 hours
 TOKEN_SECRET_REFRESH_INTERVAL = 300  # 5 minutes
 MAYBE_PING_DELAY = 300  # 5 minutes
+SEARCH_CACHE_SECONDS = 60  # recent search results are given to searches for the same key without asking the network
+SEARCH_CACHE_SIZE = 1024
+SEARCH_SEED_PREFIX_BITS = 8  # a search is seeded with the results for a cached key sharing at least this prefix
 CHECK_REFRESH_INTERVAL = REFRESH_INTERVAL / 5
 RPC_ID_LENGTH = 20
 PROTOCOL_VERSION = 1
@@ -2,8 +2,9 @@ import logging
 import asyncio
 import typing
 import socket
+from collections import OrderedDict
 
-from prometheus_client import Gauge
+from prometheus_client import Gauge, Counter, Histogram
 
 from lbry.utils import aclosing, resolve_host
 from lbry.dht import constants
@@ -19,6 +20,62 @@ if typing.TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 
+class SharedValueSearch:
+    """
+    A find_value search for one key, given to everything looking for the key while it runs and for
+    constants.SEARCH_CACHE_SECONDS after it finishes.
+    """
+
+    def __init__(self, node: 'Node', key: bytes):
+        self.node = node
+        self.key = key
+        self.found: typing.List[typing.List['KademliaPeer']] = []
+        self.listeners: typing.Set[asyncio.Queue] = set()
+        self.finished_at: typing.Optional[float] = None
+        self.task = node.loop.create_task(self._search())
+
+    def is_fresh(self, now: float) -> bool:
+        # a search that found nothing is not kept, the next one may have more luck
+        return self.finished_at is None or (
+            bool(self.found) and now - self.finished_at < constants.SEARCH_CACHE_SECONDS
+        )
+
+    async def _search(self):
+        start = self.node.loop.time()
+        try:
+            async with aclosing(self.node.get_iterative_value_finder(self.key)) as value_finder:
+                async for results in value_finder:
+                    self.found.append(results)
+                    for listener in self.listeners:
+                        listener.put_nowait(results)
+            self.node.search_time_metric.labels("find_value").observe(self.node.loop.time() - start)
+        finally:
+            self.finished_at = self.node.loop.time()
+            for listener in self.listeners:
+                listener.put_nowait(None)
+
+    async def results(self) -> typing.AsyncGenerator[typing.List['KademliaPeer'], None]:
+        listener = asyncio.Queue()
+        for results in self.found:
+            listener.put_nowait(results)
+        if self.finished_at is not None:
+            listener.put_nowait(None)
+        self.listeners.add(listener)
+        try:
+            while True:
+                results = await listener.get()
+                if results is None:
+                    return
+                yield results
+        finally:
+            self.listeners.discard(listener)
+            if not self.listeners and self.finished_at is None:
+                # nothing is waiting for the search anymore
+                self.task.cancel()
+                if self.node._value_searches.get(self.key) is self:
+                    del self.node._value_searches[self.key]
+
+
 class Node:
     storing_peers_metric = Gauge(
         "storing_peers", "Number of peers storing blobs announced to this node", namespace="dht_node",
@@ -28,6 +85,19 @@ class Node:
         "stored_blobs_x_bytes_colliding", "Number of blobs with at least X bytes colliding with this node id prefix",
         namespace="dht_node", labelnames=("amount",)
     )
+    search_started_metric = Counter(
+        "search_started", "Number of iterative searches sent to the network", namespace="dht_node",
+        labelnames=("method",)
+    )
+    search_merged_metric = Counter(
+        "search_merged", "Number of searches answered by a running or recent search for the same key",
+        namespace="dht_node", labelnames=("method",)
+    )
+    search_time_metric = Histogram(
+        "search_time", "Time taken by iterative searches", namespace="dht_node", labelnames=("method",),
+        buckets=(.1, .25, .5, 1.0, 2.5, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0, float('inf'))
+    )
+
     def __init__(self, loop: asyncio.AbstractEventLoop, peer_manager: 'PeerManager', node_id: bytes, udp_port: int,
                  internal_udp_port: int, peer_port: int, external_ip: str, rpc_timeout: float = constants.RPC_TIMEOUT,
                  split_buckets_under_index: int = constants.SPLIT_BUCKETS_UNDER_INDEX, is_bootstrap_node: bool = False,
@@ -41,6 +111,12 @@ class Node:
         self._join_task: asyncio.Task = None
         self._refresh_task: asyncio.Task = None
         self._storage = storage
+        # (key, max_results): (expires at, closest peers)
+        self._node_search_cache: typing.Dict[
+            typing.Tuple[bytes, int], typing.Tuple[float, typing.List['KademliaPeer']]
+        ] = OrderedDict()
+        self._node_searches: typing.Dict[typing.Tuple[bytes, int], asyncio.Task] = {}
+        self._value_searches: typing.Dict[bytes, SharedValueSearch] = {}
 
     @property
     def stored_blob_hashes(self):
@@ -134,6 +210,13 @@ class Node:
             self.listening_port.close()
         self._join_task = None
         self.listening_port = None
+        for task in self._node_searches.values():
+            task.cancel()
+        for search in self._value_searches.values():
+            search.task.cancel()
+        self._node_searches.clear()
+        self._node_search_cache.clear()
+        self._value_searches.clear()
         log.info("Stopped DHT node")
 
     async def start_listening(self, interface: str = '0.0.0.0') -> None:
@@ -207,6 +290,25 @@ class Node:
     async def peer_search(self, node_id: bytes, count=constants.K, max_results=constants.K * 2,
                           shortlist: typing.Optional[typing.List['KademliaPeer']] = None
                           ) -> typing.List['KademliaPeer']:
+        if shortlist:
+            # searches from given peers (joining the network) are not shared
+            return (await self._peer_search(node_id, max_results, shortlist))[:count]
+        search = (node_id, max_results)
+        cached = self._node_search_cache.get(search)
+        if cached and cached[0] > self.loop.time():
+            self.search_merged_metric.labels("find_node").inc()
+            return cached[1][:count]
+        task = self._node_searches.get(search)
+        if task:
+            self.search_merged_metric.labels("find_node").inc()
+        else:
+            task = self._node_searches[search] = self.loop.create_task(self._cached_peer_search(node_id, max_results))
+            task.add_done_callback(lambda _: self._node_searches.pop(search, None))
+        return (await asyncio.shield(task))[:count]
+
+    async def _peer_search(self, node_id: bytes, max_results: int,
+                           shortlist: typing.Optional[typing.List['KademliaPeer']] = None
+                           ) -> typing.List['KademliaPeer']:
         peers = []
         async with aclosing(self.get_iterative_node_finder(
                 node_id, shortlist=shortlist, max_results=max_results)) as node_finder:
@@ -214,7 +316,33 @@ class Node:
                 peers.extend(iteration_peers)
         distance = Distance(node_id)
         peers.sort(key=lambda peer: distance(peer.node_id))
-        return peers[:count]
+        return peers
+
+    async def _cached_peer_search(self, node_id: bytes, max_results: int) -> typing.List['KademliaPeer']:
+        shortlist = self.protocol.routing_table.find_close_peers(node_id) + self._get_cached_close_peers(node_id)
+        self.search_started_metric.labels("find_node").inc()
+        start = self.loop.time()
+        peers = await self._peer_search(node_id, max_results, shortlist or None)
+        now = self.loop.time()
+        self.search_time_metric.labels("find_node").observe(now - start)
+        if peers:
+            cache = self._node_search_cache
+            cache.pop((node_id, max_results), None)
+            cache[(node_id, max_results)] = (now + constants.SEARCH_CACHE_SECONDS, peers)
+            # entries are kept in the order they expire in
+            while cache and (len(cache) > constants.SEARCH_CACHE_SIZE or next(iter(cache.values()))[0] <= now):
+                cache.popitem(last=False)
+        return peers
+
+    def _get_cached_close_peers(self, key: bytes) -> typing.List['KademliaPeer']:
+        """ The peers found by the recent search for the key closest to this one, if it shares a long prefix. """
+        distance = Distance(key)
+        closest, closest_distance = None, 1 << (constants.HASH_BITS - constants.SEARCH_SEED_PREFIX_BITS)
+        now = self.loop.time()
+        for (cached_key, _), (expires, peers) in self._node_search_cache.items():
+            if expires > now and distance(cached_key) < closest_distance:
+                closest, closest_distance = peers, distance(cached_key)
+        return closest or []
 
     async def _accumulate_peers_for_value(self, search_queue: asyncio.Queue, result_queue: asyncio.Queue):
         tasks = []
@@ -237,8 +365,8 @@ class Node:
 
         # prioritize peers who reply to a dht ping first
         # this minimizes attempting to make tcp connections that won't work later to dead or unreachable peers
-        async with aclosing(self.get_iterative_value_finder(bytes.fromhex(blob_hash))) as value_finder:
-            async for results in value_finder:
+        async with aclosing(self._search_value(bytes.fromhex(blob_hash))) as value_search:
+            async for results in value_search:
                 to_put = []
                 for peer in results:
                     if peer.address == self.protocol.external_ip and self.protocol.peer_port == peer.tcp_port:
@@ -268,6 +396,18 @@ class Node:
                 if to_put:
                     result_queue.put_nowait(to_put)
 
+    def _search_value(self, key: bytes) -> typing.AsyncGenerator[typing.List['KademliaPeer'], None]:
+        now = self.loop.time()
+        search = self._value_searches.get(key)
+        if search and search.is_fresh(now):
+            self.search_merged_metric.labels("find_value").inc()
+        else:
+            for stale_key in [k for k, s in self._value_searches.items() if not s.is_fresh(now)]:
+                del self._value_searches[stale_key]
+            search = self._value_searches[key] = SharedValueSearch(self, key)
+            self.search_started_metric.labels("find_value").inc()
+        return search.results()
+
     def accumulate_peers(self, search_queue: asyncio.Queue,
                          peer_queue: typing.Optional[asyncio.Queue] = None
                          ) -> typing.Tuple[asyncio.Queue, asyncio.Task]:
@@ -79,7 +79,8 @@ class IterativeFinder(AsyncIterator):
         self.key = key
         self.max_results = max(constants.K, max_results)
 
-        self.active: typing.Dict['KademliaPeer', int] = OrderedDict()  # peer: distance, sorted
+        self.active: typing.Dict['KademliaPeer', int] = OrderedDict()  # peer: distance, sorted by _sort_active
+        self._active_sorted = True
         self.contacted: typing.Set['KademliaPeer'] = set()
         self.distance = Distance(key)
 
@@ -130,7 +131,13 @@ class IterativeFinder(AsyncIterator):
             return
         if peer not in self.active and peer.node_id and peer.node_id != self.protocol.node_id:
             self.active[peer] = self.distance(peer.node_id)
+            self._active_sorted = False
+
+    def _sort_active(self):
+        # a response adds up to K peers, sorting once when probes are picked is cheaper than sorting for each
+        if not self._active_sorted:
             self.active = OrderedDict(sorted(self.active.items(), key=lambda item: item[1]))
+            self._active_sorted = True
 
     async def _handle_probe_result(self, peer: 'KademliaPeer', response: FindResponse):
         self._add_active(peer)
@@ -170,6 +177,7 @@ class IterativeFinder(AsyncIterator):
         Send up to constants.alpha (5) probes to closest active peers
         """
 
+        self._sort_active()
         added = 0
         for index, peer in enumerate(self.active.keys()):
             if index == 0:
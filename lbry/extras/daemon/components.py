@@ -63,7 +63,7 @@ class DatabaseComponent(Component):
 
     @staticmethod
     def get_current_db_revision():
-        return 15
+        return 18
 
     @property
     def revision_filename(self):
@@ -129,10 +129,11 @@ class WalletComponent(Component):
         if is_connected:
             addr, port = self.wallet_manager.ledger.network.client.server
             connected = f"{addr}:{port}"
-            sessions.append(self.wallet_manager.ledger.network.client)
+            sessions.extend(self.wallet_manager.ledger.network.sessions)
 
         result = {
             'connected': connected,
+            'sync_state': self.wallet_manager.ledger.sync_state,
             'connected_features': self.wallet_manager.ledger.network.server_features,
             'servers': [
                 {
@@ -143,7 +144,7 @@ class WalletComponent(Component):
                 } for session in sessions
             ],
             'known_servers': len(self.wallet_manager.ledger.network.known_hubs),
-            'available_servers': 1 if is_connected else 0
+            'available_servers': len(sessions)
         }
 
         if self.wallet_manager.ledger.network.remote_height:
@@ -378,7 +379,6 @@ class FileManagerComponent(Component):
 
 
 class BackgroundDownloaderComponent(Component):
-    MIN_PREFIX_COLLIDING_BITS = 8
     component_name = BACKGROUND_DOWNLOADER_COMPONENT
     depends_on = [DATABASE_COMPONENT, BLOB_COMPONENT, DISK_SPACE_COMPONENT]
 
@@ -386,7 +386,6 @@ class BackgroundDownloaderComponent(Component):
         super().__init__(component_manager)
         self.background_task: typing.Optional[asyncio.Task] = None
         self.download_loop_delay_seconds = 60
-        self.ongoing_download: typing.Optional[asyncio.Task] = None
         self.space_manager: typing.Optional[DiskSpaceManager] = None
         self.blob_manager: typing.Optional[BlobManager] = None
         self.background_downloader: typing.Optional[BackgroundDownloader] = None
@@ -395,33 +394,31 @@ class BackgroundDownloaderComponent(Component):
 
     @property
     def is_busy(self):
-        return bool(self.ongoing_download and not self.ongoing_download.done())
+        return bool(self.background_downloader and self.background_downloader.is_busy)
 
     @property
     def component(self) -> 'BackgroundDownloaderComponent':
         return self
 
     async def get_status(self):
+        downloader = self.background_downloader
         return {'running': self.background_task is not None and not self.background_task.done(),
                 'available_free_space_mb': self.space_available,
-                'ongoing_download': self.is_busy}
+                'ongoing_download': self.is_busy,
+                'ongoing_downloads': 0 if not downloader else len(downloader.ongoing_downloads),
+                'completed_downloads': 0 if not downloader else len(downloader.completed),
+                'failed_downloads': 0 if not downloader else len(downloader.failed)}
 
     async def download_blobs_in_background(self):
         while True:
             self.space_available = await self.space_manager.get_free_space_mb(True)
-            if not self.is_busy and self.space_available > 10:
-                self._download_next_close_blob_hash()
+            self.background_downloader.space_available = self.space_available * 1024 * 1024
+            if self.space_available > 10:
+                self.background_downloader.download_next_blobs()
+            elif not self.space_available:
+                self.background_downloader.stop_downloads()
             await asyncio.sleep(self.download_loop_delay_seconds)
 
-    def _download_next_close_blob_hash(self):
-        node_id = self.dht_node.protocol.node_id
-        for blob_hash in self.dht_node.stored_blob_hashes:
-            if blob_hash.hex() in self.blob_manager.completed_blob_hashes:
-                continue
-            if utils.get_colliding_prefix_bits(node_id, blob_hash) >= self.MIN_PREFIX_COLLIDING_BITS:
-                self.ongoing_download = asyncio.create_task(self.background_downloader.download_blobs(blob_hash.hex()))
-                return
-
     async def start(self):
         self.space_manager: DiskSpaceManager = self.component_manager.get_component(DISK_SPACE_COMPONENT)
         if not self.component_manager.has_component(DHT_COMPONENT):
@@ -433,8 +430,8 @@ class BackgroundDownloaderComponent(Component):
         self.background_task = asyncio.create_task(self.download_blobs_in_background())
 
     async def stop(self):
-        if self.ongoing_download and not self.ongoing_download.done():
-            self.ongoing_download.cancel()
+        if self.background_downloader:
+            self.background_downloader.stop_downloads()
         if self.background_task:
             self.background_task.cancel()
 
@@ -711,8 +708,8 @@ class TrackerAnnouncerComponent(Component):
     def __init__(self, component_manager):
         super().__init__(component_manager)
         self.file_manager = None
-        self.announce_task = None
         self.tracker_client: typing.Optional[TrackerClient] = None
+        self._subscriptions = []
 
     @property
     def component(self):
@@ -720,18 +717,16 @@ class TrackerAnnouncerComponent(Component):
 
     @property
     def running(self):
-        return self._running and self.announce_task and not self.announce_task.done()
+        announce_task = self.tracker_client and self.tracker_client.announce_task
+        return self._running and announce_task and not announce_task.done()
 
-    async def announce_forever(self):
-        while True:
-            sleep_seconds = 60.0
-            announce_sd_hashes = []
-            for file in self.file_manager.get_filtered():
-                if not file.downloader:
-                    continue
-                announce_sd_hashes.append(bytes.fromhex(file.sd_hash))
-            await self.tracker_client.announce_many(*announce_sd_hashes)
-            await asyncio.sleep(sleep_seconds)
+    def _on_file_added(self, file):
+        if file.downloader:
+            self.tracker_client.add_announce(bytes.fromhex(file.sd_hash))
+
+    def _on_file_removed(self, file):
+        if file.downloader:
+            self.tracker_client.remove_announce(bytes.fromhex(file.sd_hash))
 
     async def start(self):
         node = self.component_manager.get_component(DHT_COMPONENT) \
@@ -740,11 +735,15 @@ class TrackerAnnouncerComponent(Component):
         self.tracker_client = TrackerClient(node_id, self.conf.tcp_port, lambda: self.conf.tracker_servers)
         await self.tracker_client.start()
         self.file_manager = self.component_manager.get_component(FILE_MANAGER_COMPONENT)
-        self.announce_task = asyncio.create_task(self.announce_forever())
+        # the tracker client re-announces each file when it is due, it only needs to hear about changes
+        for source_manager in self.file_manager.source_managers.values():
+            self._subscriptions.append(source_manager.on_add.listen(self._on_file_added))
+            self._subscriptions.append(source_manager.on_remove.listen(self._on_file_removed))
+        for file in self.file_manager.get_filtered():
+            self._on_file_added(file)
 
     async def stop(self):
+        while self._subscriptions:
+            self._subscriptions.pop().cancel()
         self.file_manager = None
-        if self.announce_task and not self.announce_task.done():
-            self.announce_task.cancel()
-        self.announce_task = None
         self.tracker_client.stop()
@@ -28,6 +28,7 @@ from lbry.wallet import (
 from lbry.wallet.dewies import dewies_to_lbc, lbc_to_dewies, dict_values_to_lbc
 from lbry.wallet.constants import TXO_TYPES, CLAIM_TYPE_NAMES
 from lbry.wallet.bip32 import PrivateKey
+from lbry.wallet.bulk import BulkSpend
 from lbry.crypto.base58 import Base58
 
 from lbry import utils
@@ -51,6 +52,7 @@ from lbry.extras.daemon.componentmanager import ComponentManager
 from lbry.extras.daemon.json_response_encoder import JSONResponseEncoder
 from lbry.extras.daemon.undecorated import undecorated
 from lbry.extras.daemon.security import ensure_request_allowed
+from lbry.extras.daemon.events import EventManager
 from lbry.file_analysis import VideoFileAnalyzer
 from lbry.schema.claim import Claim
 from lbry.schema.url import URL
@@ -288,6 +290,8 @@ def jsonrpc_dumps_pretty(obj, **kwargs):
         data = {"jsonrpc": "2.0", "error": obj.to_dict()}
     else:
         data = {"jsonrpc": "2.0", "result": obj}
+    if 'id' in kwargs:
+        data['id'] = kwargs.pop('id')
     return json.dumps(data, cls=JSONResponseEncoder, sort_keys=True, indent=2, **kwargs) + "\n"
 
 
@@ -295,6 +299,57 @@ def trap(err, *to_trap):
     err.trap(*to_trap)
 
 
+class ParamsValidator:
+    """
+    Checks the arguments of calls to an API method against its signature, which is inspected only once.
+    """
+
+    __slots__ = 'args', 'accepted', 'required_end', 'accepts_any'
+
+    _validators: typing.Dict[Callable, 'ParamsValidator'] = {}
+
+    def __init__(self, function: Callable):
+        argspec = inspect.getfullargspec(undecorated(function))
+        self.args = tuple(argspec.args)
+        self.accepted = frozenset(argspec.args[1:])
+        self.required_end = -len(argspec.defaults or ())
+        self.accepts_any = argspec.varkw is not None
+
+    @classmethod
+    def get(cls, function: Callable) -> 'ParamsValidator':
+        validator = cls._validators.get(function)
+        if validator is None:
+            validator = cls._validators[function] = cls(function)
+        return validator
+
+    def check(self, args_tup, args_dict):
+        duplicate_params = [
+            duplicate_param
+            for duplicate_param in self.args[1:len(args_tup) + 1]
+            if duplicate_param in args_dict
+        ]
+        if duplicate_params:
+            return 'Duplicate parameters', duplicate_params
+
+        missing_required_params = [
+            required_param
+            for required_param in self.args[len(args_tup) + 1:self.required_end]
+            if required_param not in args_dict
+        ]
+        if missing_required_params:
+            return 'Missing required parameters', missing_required_params
+
+        extraneous_params = [] if self.accepts_any else [
+            extra_param
+            for extra_param in args_dict
+            if extra_param not in self.accepted
+        ]
+        if extraneous_params:
+            return 'Extraneous parameters', extraneous_params
+
+        return None, None
+
+
 class JSONRPCServerType(type):
     def __new__(mcs, name, bases, newattrs):
         klass = type.__new__(mcs, name, bases, newattrs)
@@ -306,6 +361,7 @@ class JSONRPCServerType(type):
                 method = getattr(klass, methodname)
                 if not hasattr(method, '_deprecated'):
                     klass.callable_methods.update({methodname.split("jsonrpc_")[1]: method})
+                    ParamsValidator.get(method)
                 else:
                     klass.deprecated_methods.update({methodname.split("jsonrpc_")[1]: method})
         return klass
@@ -344,6 +400,10 @@ class Daemon(metaclass=JSONRPCServerType):
         "response_time", "Response times", namespace="daemon_api", buckets=HISTOGRAM_BUCKETS,
         labelnames=("method",)
     )
+    batch_size_metric = Histogram(
+        "batch_size", "Number of calls in batch requests", namespace="daemon_api",
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, float('inf'))
+    )
 
     def __init__(self, conf: Config, component_manager: typing.Optional[ComponentManager] = None):
         self.conf = conf
@@ -352,15 +412,18 @@ class Daemon(metaclass=JSONRPCServerType):
         self._node_id = None
         self._installation_id = None
         self.session_id = base58.b58encode(utils.generate_id()).decode()
+        self._method_metrics = {}
         self.analytics_manager = analytics.AnalyticsManager(conf, self.installation_id, self.session_id)
         self.component_manager = component_manager or ComponentManager(
             conf, analytics_manager=self.analytics_manager,
             skip_components=conf.components_to_skip or []
         )
         self.component_startup_task = None
+        self.events = EventManager(conf, self.component_manager)
 
         logging.getLogger('aiohttp.access').setLevel(logging.WARN)
         rpc_app = web.Application()
+        rpc_app.router.add_get('/ws', self.events.handle)
         rpc_app.router.add_get('/lbryapi', self.handle_old_jsonrpc)
         rpc_app.router.add_post('/lbryapi', self.handle_old_jsonrpc)
         rpc_app.router.add_post('/', self.handle_old_jsonrpc)
@@ -546,6 +609,7 @@ class Daemon(metaclass=JSONRPCServerType):
             await self.analytics_manager.start()
         self.component_startup_task = asyncio.create_task(self.component_manager.start())
         await self.component_startup_task
+        self.events.start()
 
     async def stop(self):
         if self.component_startup_task is not None:
@@ -561,6 +625,7 @@ class Daemon(metaclass=JSONRPCServerType):
                 else:
                     await wallet_component.stop()
                 await self.component_manager.stop()
+        await self.events.stop()
         log.info("stopped api components")
         await self.rpc_runner.cleanup()
         await self.streaming_runner.cleanup()
@@ -584,23 +649,6 @@ class Daemon(metaclass=JSONRPCServerType):
     async def handle_old_jsonrpc(self, request):
         ensure_request_allowed(request, self.conf)
         data = await request.json()
-        params = data.get('params', {})
-        include_protobuf = params.pop('include_protobuf', False) if isinstance(params, dict) else False
-        result = await self._process_rpc_call(data)
-        ledger = None
-        if 'wallet' in self.component_manager.get_components_status():
-            # self.ledger only available if wallet component is not skipped
-            ledger = self.ledger
-        try:
-            encoded_result = jsonrpc_dumps_pretty(
-                result, ledger=ledger, include_protobuf=include_protobuf)
-        except Exception:
-            log.exception('Failed to encode JSON RPC result:')
-            encoded_result = jsonrpc_dumps_pretty(JSONRPCError(
-                JSONRPCError.CODE_APPLICATION_ERROR,
-                'After successfully executing the command, failed to encode result for JSON RPC response.',
-                {'traceback': format_exc()}
-            ), ledger=ledger)
         headers = {}
         if self.conf.allowed_origin:
             headers.update({
@@ -608,12 +656,68 @@ class Daemon(metaclass=JSONRPCServerType):
                 'Access-Control-Allow-Methods': self.conf.allowed_origin,
                 'Access-Control-Allow-Headers': self.conf.allowed_origin,
             })
+        if isinstance(data, list):
+            encoded_result = await self._process_rpc_batch(data)
+            if encoded_result is None:  # only notifications
+                return web.Response(status=204, headers=headers)
+        else:
+            include_protobuf = self._pop_include_protobuf(data)
+            result = await self._process_rpc_call(data)
+            encoded_result = self._encode_rpc_result(result, include_protobuf)
         return web.Response(
             text=encoded_result,
             headers=headers,
             content_type='application/json'
         )
 
+    @staticmethod
+    def _pop_include_protobuf(data) -> bool:
+        params = data.get('params', {})
+        return params.pop('include_protobuf', False) if isinstance(params, dict) else False
+
+    def _encode_rpc_result(self, result, include_protobuf=False, **response) -> str:
+        ledger = None
+        if 'wallet' in self.component_manager.get_components_status():
+            # self.ledger only available if wallet component is not skipped
+            ledger = self.ledger
+        try:
+            return jsonrpc_dumps_pretty(
+                result, ledger=ledger, include_protobuf=include_protobuf, **response)
+        except Exception:
+            log.exception('Failed to encode JSON RPC result:')
+            return jsonrpc_dumps_pretty(JSONRPCError(
+                JSONRPCError.CODE_APPLICATION_ERROR,
+                'After successfully executing the command, failed to encode result for JSON RPC response.',
+                {'traceback': format_exc()}
+            ), ledger=ledger, **response)
+
+    async def _process_rpc_batch(self, batch: list) -> typing.Optional[str]:
+        """
+        Run the calls of a JSON-RPC 2.0 batch concurrently, at most `api_batch_concurrency` at a time. Responses
+        are in the order of the calls and notifications (calls without an id) don't get one.
+        """
+        if not batch:
+            return self._encode_rpc_result(JSONRPCError(
+                JSONRPCError.CODE_INVALID_REQUEST, "Batch request must not be empty."
+            ), id=None)
+        self.batch_size_metric.observe(len(batch))
+        semaphore = asyncio.Semaphore(max(1, self.conf.api_batch_concurrency))
+
+        async def process(data):
+            if not isinstance(data, dict):
+                return self._encode_rpc_result(JSONRPCError(
+                    JSONRPCError.CODE_INVALID_REQUEST, f"Invalid request in batch: {data}"
+                ), id=None)
+            include_protobuf = self._pop_include_protobuf(data)
+            async with semaphore:
+                result = await self._process_rpc_call(data)
+            if 'id' in data:
+                return self._encode_rpc_result(result, include_protobuf, id=data['id'])
+
+        responses = [response for response in await asyncio.gather(*map(process, batch)) if response is not None]
+        if responses:
+            return '[\n' + ',\n'.join(response.rstrip('\n') for response in responses) + '\n]\n'
+
     @staticmethod
     async def handle_metrics_get_request(request: web.Request):
         try:
@@ -715,8 +819,9 @@ class Daemon(metaclass=JSONRPCServerType):
                 JSONRPCError.CODE_INVALID_PARAMS,
                 params_error_message,
             )
-        self.pending_requests_metric.labels(method=function_name).inc()
-        self.requests_count_metric.labels(method=function_name).inc()
+        pending_requests_metric, requests_count_metric, response_time_metric = self._get_method_metrics(function_name)
+        pending_requests_metric.inc()
+        requests_count_metric.inc()
         start = time.perf_counter()
         try:
             result = method(self, *_args, **_kwargs)
@@ -737,8 +842,18 @@ class Daemon(metaclass=JSONRPCServerType):
                 command=function_name, args=_args, kwargs=_kwargs, exception=e, traceback=format_exc()
             )
         finally:
-            self.pending_requests_metric.labels(method=function_name).dec()
-            self.response_time_metric.labels(method=function_name).observe(time.perf_counter() - start)
+            pending_requests_metric.dec()
+            response_time_metric.observe(time.perf_counter() - start)
+
+    def _get_method_metrics(self, function_name):
+        metrics = self._method_metrics.get(function_name)
+        if metrics is None:
+            metrics = self._method_metrics[function_name] = (
+                self.pending_requests_metric.labels(method=function_name),
+                self.requests_count_metric.labels(method=function_name),
+                self.response_time_metric.labels(method=function_name)
+            )
+        return metrics
 
     def _verify_method_is_callable(self, function_path):
         if function_path not in self.callable_methods:
@@ -755,35 +870,7 @@ class Daemon(metaclass=JSONRPCServerType):
 
     @staticmethod
     def _check_params(function, args_tup, args_dict):
-        argspec = inspect.getfullargspec(undecorated(function))
-        num_optional_params = 0 if argspec.defaults is None else len(argspec.defaults)
-
-        duplicate_params = [
-            duplicate_param
-            for duplicate_param in argspec.args[1:len(args_tup) + 1]
-            if duplicate_param in args_dict
-        ]
-
-        if duplicate_params:
-            return 'Duplicate parameters', duplicate_params
-
-        missing_required_params = [
-            required_param
-            for required_param in argspec.args[len(args_tup) + 1:-num_optional_params]
-            if required_param not in args_dict
-        ]
-        if len(missing_required_params) > 0:
-            return 'Missing required parameters', missing_required_params
-
-        extraneous_params = [] if argspec.varkw is not None else [
-            extra_param
-            for extra_param in args_dict
-            if extra_param not in argspec.args[1:]
-        ]
-        if len(extraneous_params) > 0:
-            return 'Extraneous parameters', extraneous_params
-
-        return None, None
+        return ParamsValidator.get(function).check(args_tup, args_dict)
 
     @property
     def ledger(self) -> Optional['Ledger']:
@@ -902,6 +989,8 @@ class Daemon(metaclass=JSONRPCServerType):
                 },
                 'wallet': {
                     'connected': (str) host and port of the connected spv server,
+                    'sync_state': (str) 'connecting', 'syncing_headers', 'syncing_addresses', 'synced' or
+                                  'failed' when the wallet could not sync and needs to be restarted,
                     'blocks': (int) local blockchain height,
                     'blocks_behind': (int) remote_height - local_height,
                     'best_blockhash': (str) block hash of most recent block,
@@ -1230,7 +1319,7 @@ class Daemon(metaclass=JSONRPCServerType):
             return
         return wallet.preferences.to_dict_without_ts()
 
-    def jsonrpc_preference_set(self, key, value, wallet_id=None):
+    async def jsonrpc_preference_set(self, key, value, wallet_id=None):
         """
         Set preferences
 
@@ -1250,6 +1339,7 @@ class Daemon(metaclass=JSONRPCServerType):
             value = json.loads(value)
         wallet.preferences[key] = value
         wallet.save()
+        await wallet.flush()
         return {key: value}
 
     WALLET_DOC = """
@@ -1323,6 +1413,7 @@ class Daemon(metaclass=JSONRPCServerType):
             if self.ledger.network.is_connected:
                 await self.ledger.subscribe_account(account)
         wallet.save()
+        await wallet.flush()
         if not skip_on_startup:
             with self.conf.update_config() as c:
                 c.wallets += [wallet_id]
@@ -1385,6 +1476,7 @@ class Daemon(metaclass=JSONRPCServerType):
                 for new_account in added_accounts:
                     asyncio.create_task(self.ledger.subscribe_account(new_account))
         wallet.save()
+        await wallet.flush()
         return await self.jsonrpc_wallet_export(password=password, wallet_id=wallet_id)
 
     @requires("wallet")
@@ -1429,6 +1521,7 @@ class Daemon(metaclass=JSONRPCServerType):
         self.wallet_manager.wallets.remove(wallet)
         for account in wallet.accounts:
             await self.ledger.unsubscribe_account(account)
+        await wallet.flush()
         return wallet
 
     @requires("wallet")
@@ -1509,7 +1602,7 @@ class Daemon(metaclass=JSONRPCServerType):
         return self.wallet_manager.get_wallet_or_default(wallet_id).lock()
 
     @requires(WALLET_COMPONENT)
-    def jsonrpc_wallet_decrypt(self, wallet_id=None):
+    async def jsonrpc_wallet_decrypt(self, wallet_id=None):
         """
         Decrypt an encrypted wallet, this will remove the wallet password. The wallet must be unlocked to decrypt it
 
@@ -1522,10 +1615,13 @@ class Daemon(metaclass=JSONRPCServerType):
         Returns:
             (bool) true if wallet is decrypted, otherwise false
         """
-        return self.wallet_manager.get_wallet_or_default(wallet_id).decrypt()
+        wallet = self.wallet_manager.get_wallet_or_default(wallet_id)
+        decrypted = wallet.decrypt()
+        await wallet.flush()
+        return decrypted
 
     @requires(WALLET_COMPONENT)
-    def jsonrpc_wallet_encrypt(self, new_password, wallet_id=None):
+    async def jsonrpc_wallet_encrypt(self, new_password, wallet_id=None):
         """
         Encrypt an unencrypted wallet with a password
 
@@ -1540,12 +1636,15 @@ class Daemon(metaclass=JSONRPCServerType):
         Returns:
             (bool) true if wallet is decrypted, otherwise false
         """
-        return self.wallet_manager.get_wallet_or_default(wallet_id).encrypt(new_password)
+        wallet = self.wallet_manager.get_wallet_or_default(wallet_id)
+        encrypted = wallet.encrypt(new_password)
+        await wallet.flush()
+        return encrypted
 
     @requires(WALLET_COMPONENT)
     async def jsonrpc_wallet_send(
             self, amount, addresses, wallet_id=None,
-            change_account_id=None, funding_account_ids=None, preview=False, blocking=True):
+            change_account_id=None, funding_account_ids=None, preview=False, blocking=True, batch_size=None):
         """
         Send the same number of credits to multiple addresses using all accounts in wallet to
         fund the transaction and the default account to receive any change.
@@ -1553,7 +1652,7 @@ class Daemon(metaclass=JSONRPCServerType):
         Usage:
             wallet_send <amount> <addresses>... [--wallet_id=<wallet_id>] [--preview]
                         [--change_account_id=None] [--funding_account_ids=<funding_account_ids>...]
-                        [--blocking]
+                        [--blocking] [--batch_size=<batch_size>]
 
         Options:
             --wallet_id=<wallet_id>         : (str) restrict operation to specific wallet
@@ -1561,9 +1660,14 @@ class Daemon(metaclass=JSONRPCServerType):
             --funding_account_ids=<funding_account_ids> : (str) accounts to fund the transaction
             --preview                       : (bool) do not broadcast the transaction
             --blocking                      : (bool) wait until tx has synced
+            --batch_size=<batch_size>       : (int) pay this many addresses per transaction, returns
+                                              a list of transactions instead of a single one
 
-        Returns: {Transaction}
+        Returns:
+            {Transaction}, or with --batch_size a list of the transactions made: [{Transaction}, ...]
         """
+        if batch_size is not None and batch_size <= 0:
+            raise ValueError("batch_size must be a positive number of addresses to pay per transaction.")
         wallet = self.wallet_manager.get_wallet_or_default(wallet_id)
         assert not wallet.is_locked, "Cannot spend funds with locked wallet, unlock first."
         account = wallet.get_account_or_default(change_account_id)
@@ -1592,6 +1696,16 @@ class Daemon(metaclass=JSONRPCServerType):
             else:
                 raise ValueError(f"Unsupported address: '{address}'")  # TODO: use error from lbry.error
 
+        if batch_size is not None:
+            bulk = BulkSpend(self.ledger, accounts, account, batch_size)
+            txs = await bulk.pay(outputs)
+            if not preview:
+                await bulk.broadcast(txs, blocking)
+                self.component_manager.loop.create_task(self.analytics_manager.send_credits_sent())
+            else:
+                await bulk.release(txs)
+            return txs
+
         tx = await Transaction.create(
             [], outputs, accounts, account
         )
@@ -1704,6 +1818,7 @@ class Daemon(metaclass=JSONRPCServerType):
             }
         )
         wallet.save()
+        await wallet.flush()
         if self.ledger.network.is_connected:
             await self.ledger.subscribe_account(account)
         return account
@@ -1732,12 +1847,13 @@ class Daemon(metaclass=JSONRPCServerType):
             }
         )
         wallet.save()
+        await wallet.flush()
         if self.ledger.network.is_connected:
             await self.ledger.subscribe_account(account)
         return account
 
     @requires("wallet")
-    def jsonrpc_account_remove(self, account_id, wallet_id=None):
+    async def jsonrpc_account_remove(self, account_id, wallet_id=None):
         """
         Remove an existing account.
 
@@ -1754,10 +1870,11 @@ class Daemon(metaclass=JSONRPCServerType):
         account = wallet.get_account_or_error(account_id)
         wallet.accounts.remove(account)
         wallet.save()
+        await wallet.flush()
         return account
 
     @requires("wallet")
-    def jsonrpc_account_set(
+    async def jsonrpc_account_set(
             self, account_id, wallet_id=None, default=False, new_name=None,
             change_gap=None, change_max_uses=None, receiving_gap=None, receiving_max_uses=None):
         """
@@ -1811,6 +1928,7 @@ class Daemon(metaclass=JSONRPCServerType):
         if change_made:
             account.modified_on = int(time.time())
             wallet.save()
+            await wallet.flush()
 
         return account
 
@@ -2008,6 +2126,7 @@ class Daemon(metaclass=JSONRPCServerType):
             wallet_changed = True
         if wallet_changed:
             wallet.save()
+            await wallet.flush()
         encrypted = wallet.pack(password)
         return {
             'hash': self.jsonrpc_sync_hash(wallet_id),
@@ -2773,6 +2892,7 @@ class Daemon(metaclass=JSONRPCServerType):
 
         if not preview:
             wallet.save()
+            await wallet.flush()
             await self.broadcast_or_release(tx, blocking)
             self.component_manager.loop.create_task(self.storage.save_claims([self._old_get_temp_claim_info(
                 tx, txo, claim_address, claim, name
@@ -2932,6 +3052,7 @@ class Daemon(metaclass=JSONRPCServerType):
 
         if not preview:
             wallet.save()
+            await wallet.flush()
             await self.broadcast_or_release(tx, blocking)
             self.component_manager.loop.create_task(self.storage.save_claims([self._old_get_temp_claim_info(
                 tx, new_txo, claim_address, new_txo.claim, new_txo.claim_name
@@ -3167,6 +3288,7 @@ class Daemon(metaclass=JSONRPCServerType):
                 )
         account.add_channel_private_key(channel_private_key)
         wallet.save()
+        await wallet.flush()
         return f"Added channel signing key for {data['name']}."
 
     STREAM_DOC = """
@@ -4729,17 +4851,12 @@ class Daemon(metaclass=JSONRPCServerType):
                 {}, is_not_spent=True, is_my_output=True, **kwargs
             )
         )
-        txs = []
-        while txos:
-            txs.append(
-                await Transaction.create(
-                    [Input.spend(txos.pop()) for _ in range(min(len(txos), batch_size))],
-                    [], accounts, accounts[0]
-                )
-            )
+        bulk = BulkSpend(self.ledger, accounts, accounts[0], batch_size)
+        txs = await bulk.consolidate(txos)
         if not preview:
-            for tx in txs:
-                await self.broadcast_or_release(tx, blocking)
+            await bulk.broadcast(txs, blocking)
+        else:
+            await bulk.release(txs)
         if include_full_tx:
             return txs
         return [{'txid': tx.id} for tx in txs]
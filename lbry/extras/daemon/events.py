@@ -0,0 +1,238 @@
+import json
+import asyncio
+import typing
+import logging
+import itertools
+from collections import OrderedDict
+
+from aiohttp import web, WSMsgType, WSCloseCode
+
+from lbry.extras.daemon.security import ensure_request_allowed
+from lbry.extras.daemon.components import WALLET_COMPONENT, BLOB_COMPONENT, FILE_MANAGER_COMPONENT
+
+if typing.TYPE_CHECKING:
+    from lbry.conf import Config
+    from lbry.blob.blob_file import AbstractBlob
+    from lbry.file.source import ManagedDownloadSource
+    from lbry.wallet.ledger import Ledger, TransactionEvent, BlockHeightEvent
+    from lbry.extras.daemon.componentmanager import ComponentManager
+
+log = logging.getLogger(__name__)
+
+FILE_EVENT = 'file'
+BLOB_EVENT = 'blob'
+TRANSACTION_EVENT = 'transaction'
+HEADER_EVENT = 'header'
+EVENT_TYPES = (FILE_EVENT, BLOB_EVENT, TRANSACTION_EVENT, HEADER_EVENT)
+
+
+class EventSubscriber:
+    """
+    A client connected to the event endpoint, with the event types and streams or accounts it subscribed to.
+
+    Events waiting to be sent are kept in order. Events that are snapshots of some state (the status and
+    progress of a file, the height of the chain) replace a pending event for the same file or chain instead
+    of queuing behind it, so a slow client only ever gets the latest state. A client with more than
+    `max_pending` events queued anyway is disconnected.
+    """
+
+    def __init__(self, web_socket: web.WebSocketResponse, max_pending: int):
+        self.web_socket = web_socket
+        self.max_pending = max_pending
+        self.event_types: typing.Set[str] = set()
+        self.sd_hashes: typing.Set[str] = set()
+        self.claim_ids: typing.Set[str] = set()
+        self.account_ids: typing.Set[str] = set()
+        self.pending: typing.Dict[typing.Any, str] = OrderedDict()
+        self._has_pending = asyncio.Event()
+        self._sequence = itertools.count()
+        self.close_code = WSCloseCode.OK
+        self.close_message = b''
+
+    def subscribe(self, event_types=None, sd_hash=None, claim_id=None, account_id=None):
+        for event_type in event_types or EVENT_TYPES:
+            if event_type not in EVENT_TYPES:
+                raise ValueError(f"Unknown event type '{event_type}', expected one of: {', '.join(EVENT_TYPES)}")
+        self.event_types.update(event_types or EVENT_TYPES)
+        self.sd_hashes.update(sd_hash or ())
+        self.claim_ids.update(claim_id or ())
+        self.account_ids.update(account_id or ())
+
+    def unsubscribe(self, event_types=None, sd_hash=None, claim_id=None, account_id=None):
+        if not any((event_types, sd_hash, claim_id, account_id)):
+            event_types = EVENT_TYPES
+        self.event_types.difference_update(event_types or ())
+        self.sd_hashes.difference_update(sd_hash or ())
+        self.claim_ids.difference_update(claim_id or ())
+        self.account_ids.difference_update(account_id or ())
+
+    def to_dict(self) -> dict:
+        return {
+            'event_types': sorted(self.event_types),
+            'sd_hash': sorted(self.sd_hashes),
+            'claim_id': sorted(self.claim_ids),
+            'account_id': sorted(self.account_ids),
+        }
+
+    def is_subscribed(self, event_type: str, sd_hash: typing.Optional[str] = None,
+                      claim_id: typing.Optional[str] = None, account_ids: typing.Iterable[str] = ()) -> bool:
+        if event_type not in self.event_types:
+            return False
+        if event_type == FILE_EVENT and (self.sd_hashes or self.claim_ids):
+            return sd_hash in self.sd_hashes or claim_id in self.claim_ids
+        if event_type == TRANSACTION_EVENT and self.account_ids:
+            return not self.account_ids.isdisjoint(account_ids)
+        return True
+
+    def push(self, message: str, key=None) -> bool:
+        """ Queue a message, replacing the pending one with the same key. False if the client fell too far behind. """
+        if key is None:
+            key = next(self._sequence)
+        self.pending[key] = message
+        self._has_pending.set()
+        return len(self.pending) <= self.max_pending
+
+    async def close(self, code: int, message: bytes):
+        # the handler closes the socket again once its receive loop is broken, with the same code
+        self.close_code, self.close_message = code, message
+        await self.web_socket.close(code=code, message=message)
+
+    async def send_pending(self):
+        try:
+            while not self.web_socket.closed:
+                await self._has_pending.wait()
+                while self.pending:
+                    _, message = self.pending.popitem(last=False)
+                    await self.web_socket.send_str(message)
+                self._has_pending.clear()
+        except ConnectionError:
+            pass
+
+
+class EventManager:
+    """
+    Pushes file, blob, wallet transaction and header events to clients subscribed over a websocket.
+
+    Clients send `{"method": "subscribe", "params": {...}}` or `{"method": "unsubscribe", "params": {...}}`
+    where the params can have `event_types` (any of 'file', 'blob', 'transaction' and 'header', all of them
+    when omitted), `sd_hash` and `claim_id` lists to limit file events to some streams and an `account_id`
+    list to limit transaction events to some accounts. Every event is sent as
+    `{"event": <event type>, "data": {...}}`.
+    """
+
+    def __init__(self, conf: 'Config', component_manager: 'ComponentManager'):
+        self.conf = conf
+        self.component_manager = component_manager
+        self.subscribers: typing.Set[EventSubscriber] = set()
+        self._subscriptions = []
+        self._tasks: typing.Set[asyncio.Task] = set()
+
+    def start(self):
+        if self.component_manager.has_component(FILE_MANAGER_COMPONENT):
+            file_manager = self.component_manager.get_component(FILE_MANAGER_COMPONENT)
+            for source_manager in file_manager.source_managers.values():
+                self._subscriptions.append(source_manager.on_update.listen(self._on_file_update))
+        if self.component_manager.has_component(BLOB_COMPONENT):
+            blob_manager = self.component_manager.get_component(BLOB_COMPONENT)
+            self._subscriptions.append(blob_manager.on_completed.listen(self._on_blob_completed))
+        if self.component_manager.has_component(WALLET_COMPONENT):
+            for ledger in self.component_manager.get_component(WALLET_COMPONENT).ledgers.values():
+                self._subscriptions.append(ledger.on_transaction.listen(
+                    lambda event, ledger=ledger: self._on_transaction(ledger, event)
+                ))
+                self._subscriptions.append(ledger.on_header.listen(self._on_header))
+
+    async def stop(self):
+        while self._subscriptions:
+            self._subscriptions.pop().cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*(
+            subscriber.close(WSCloseCode.GOING_AWAY, b'shutting down') for subscriber in self.subscribers
+        ))
+        self.subscribers.clear()
+
+    def publish(self, event_type: str, data: dict, key=None, **attributes):
+        message = None
+        for subscriber in list(self.subscribers):
+            if not subscriber.is_subscribed(event_type, **attributes):
+                continue
+            if message is None:
+                # encoded once for every subscriber
+                message = json.dumps({'event': event_type, 'data': data})
+            if not subscriber.push(message, key):
+                log.warning("disconnecting event subscriber with over %i pending events", subscriber.max_pending)
+                self.subscribers.discard(subscriber)
+                self._add_task(subscriber.close(WSCloseCode.TRY_AGAIN_LATER, b'too many pending events'))
+
+    def _add_task(self, coro: typing.Awaitable):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_file_update(self, source: 'ManagedDownloadSource'):
+        if not self.subscribers:
+            return
+        sd_hash, claim_id = source.identifier, source.claim_id
+        self.publish(FILE_EVENT, {
+            'sd_hash': sd_hash,
+            'claim_id': claim_id,
+            'claim_name': source.claim_name,
+            'status': source.status,
+            'written_bytes': source.written_bytes,
+        }, key=(FILE_EVENT, sd_hash), sd_hash=sd_hash, claim_id=claim_id)
+
+    def _on_blob_completed(self, blob: 'AbstractBlob'):
+        if not self.subscribers:
+            return
+        self.publish(BLOB_EVENT, {'blob_hash': blob.blob_hash, 'length': blob.length})
+
+    def _on_transaction(self, ledger: 'Ledger', event: 'TransactionEvent'):
+        # a wallet sync has thousands of these, only look up their accounts when someone is listening
+        if any(TRANSACTION_EVENT in subscriber.event_types for subscriber in self.subscribers):
+            self._add_task(self._publish_transaction(ledger, event))
+
+    async def _publish_transaction(self, ledger: 'Ledger', event: 'TransactionEvent'):
+        addresses = await ledger.db.get_addresses(cols=('account',), address=event.address)
+        account_ids = [address['account'] for address in addresses]
+        self.publish(TRANSACTION_EVENT, {
+            'txid': event.tx.id,
+            'height': event.tx.height,
+            'address': event.address,
+            'account_ids': account_ids,
+        }, account_ids=account_ids)
+
+    def _on_header(self, event: 'BlockHeightEvent'):
+        if not self.subscribers:
+            return
+        self.publish(HEADER_EVENT, {'height': event.height, 'change': event.change}, key=HEADER_EVENT)
+
+    @staticmethod
+    def _handle_message(subscriber: EventSubscriber, data: str):
+        try:
+            request = json.loads(data)
+            method, params = request['method'], request.get('params', {})
+            if method not in ('subscribe', 'unsubscribe'):
+                raise ValueError(f"Unknown method '{method}', expected 'subscribe' or 'unsubscribe'.")
+            getattr(subscriber, method)(**params)
+        except (ValueError, KeyError, TypeError) as err:
+            subscriber.push(json.dumps({'error': str(err)}))
+        else:
+            subscriber.push(json.dumps({'subscription': subscriber.to_dict()}))
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ensure_request_allowed(request, self.conf)
+        web_socket = web.WebSocketResponse(heartbeat=30)
+        await web_socket.prepare(request)
+        subscriber = EventSubscriber(web_socket, self.conf.websocket_max_pending_events)
+        self.subscribers.add(subscriber)
+        sender = asyncio.create_task(subscriber.send_pending())
+        try:
+            async for msg in web_socket:
+                if msg.type == WSMsgType.TEXT:
+                    self._handle_message(subscriber, msg.data)
+        finally:
+            self.subscribers.discard(subscriber)
+            sender.cancel()
+        await web_socket.close(code=subscriber.close_code, message=subscriber.close_message)
+        return web_socket
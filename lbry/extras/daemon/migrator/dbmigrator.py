@@ -39,6 +39,10 @@ def migrate_db(conf, start, end):
             from .migrate14to15 import do_migration
         elif current == 15:
             from .migrate15to16 import do_migration
+        elif current == 16:
+            from .migrate16to17 import do_migration
+        elif current == 17:
+            from .migrate17to18 import do_migration
         else:
             raise Exception(f"DB migration of version {current} to {current+1} is not available")
         try:
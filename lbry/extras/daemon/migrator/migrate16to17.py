@@ -0,0 +1,18 @@
+import os
+import sqlite3
+
+
+def do_migration(conf):
+    db_path = os.path.join(conf.data_dir, "lbrynet.sqlite")
+    connection = sqlite3.connect(db_path)
+    cursor = connection.cursor()
+
+    cursor.executescript("""
+        create table if not exists file_progress (
+            stream_hash char(96) not null primary key references stream,
+            written_blobs blob not null
+        );
+    """)
+
+    connection.commit()
+    connection.close()
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+
+
+def do_migration(conf):
+    db_path = os.path.join(conf.data_dir, "lbrynet.sqlite")
+    connection = sqlite3.connect(db_path)
+    cursor = connection.cursor()
+
+    cursor.executescript("""
+        create index if not exists blob_announce on blob(
+            next_announce_time, should_announce, single_announce, blob_hash, status
+        ) where status='finished';
+        create index if not exists blob_stored on blob(is_mine, added_on, blob_length, blob_hash, status)
+            where status='finished';
+        create index if not exists stream_blob_blob_hash on stream_blob(blob_hash, stream_hash);
+        create index if not exists stream_sd_hash on stream(sd_hash, stream_hash);
+        create index if not exists file_stream_hash on file(stream_hash) where stream_hash is not null;
+        create index if not exists file_bt_infohash on file(bt_infohash) where bt_infohash is not null;
+        create index if not exists content_claim_stream_hash on content_claim(stream_hash)
+            where stream_hash is not null;
+        create index if not exists content_claim_bt_infohash on content_claim(bt_infohash)
+            where bt_infohash is not null;
+        create index if not exists torrent_node_bt_infohash on torrent_node(bt_infohash);
+        create index if not exists torrent_tracker_bt_infohash on torrent_tracker(bt_infohash);
+        create index if not exists torrent_http_seed_bt_infohash on torrent_http_seed(bt_infohash);
+        create index if not exists claim_claim_id on claim(claim_id, claim_name);
+        create index if not exists support_claim_id on support(claim_id);
+    """)
+
+    connection.commit()
+    connection.close()
@@ -112,7 +112,7 @@ def _batched_select(transaction, query, parameters, batch_size=900):
 
 def _get_lbry_file_stream_dict(rowid, added_on, stream_hash, file_name, download_dir, data_rate, status,
                                sd_hash, stream_key, stream_name, suggested_file_name, claim, saved_file,
-                               raw_content_fee, fully_reflected):
+                               raw_content_fee, fully_reflected, written_blobs):
     return {
         "rowid": rowid,
         "added_on": added_on,
@@ -130,7 +130,8 @@ def _get_lbry_file_stream_dict(rowid, added_on, stream_hash, file_name, download
         "content_fee": None if not raw_content_fee else Transaction(
             binascii.unhexlify(raw_content_fee)
         ),
-        "fully_reflected": fully_reflected
+        "fully_reflected": fully_reflected,
+        "written_blobs": written_blobs
     }
 
 
@@ -141,12 +142,13 @@ def get_all_lbry_files(transaction: sqlite3.Connection) -> typing.List[typing.Di
          added_on, _, sd_hash, stream_key, stream_name, suggested_file_name, *claim_args) in transaction.execute(
              "select file.rowid, file.*, stream.*, c.*, "
              "  case when (SELECT 1 FROM reflected_stream r WHERE r.sd_hash=stream.sd_hash) "
-             "      is null then 0 else 1 end as fully_reflected "
-             "from file inner join stream on file.stream_hash=stream.stream_hash "
-             "inner join content_claim cc on file.stream_hash=cc.stream_hash "
-             "inner join claim c on cc.claim_outpoint=c.claim_outpoint "
+             "      is null then 0 else 1 end as fully_reflected, "
+             "  (SELECT p.written_blobs FROM file_progress p WHERE p.stream_hash=file.stream_hash) as written_blobs "
+             "from file cross join stream on file.stream_hash=stream.stream_hash "
+             "cross join content_claim cc on file.stream_hash=cc.stream_hash "
+             "cross join claim c on cc.claim_outpoint=c.claim_outpoint "
              "order by c.rowid desc").fetchall():
-        claim_args, fully_reflected = tuple(claim_args[:-1]), claim_args[-1]
+        claim_args, fully_reflected, written_blobs = tuple(claim_args[:-2]), claim_args[-2], claim_args[-1]
         claim = StoredContentClaim(*claim_args)
         if claim.channel_claim_id:
             if claim.channel_claim_id not in signed_claims:
@@ -156,7 +158,7 @@ def get_all_lbry_files(transaction: sqlite3.Connection) -> typing.List[typing.Di
             _get_lbry_file_stream_dict(
                 rowid, added_on, stream_hash, file_name, download_dir, data_rate, status,
                 sd_hash, stream_key, stream_name, suggested_file_name, claim, saved_file,
-                raw_content_fee, fully_reflected
+                raw_content_fee, fully_reflected, written_blobs
             )
         )
     for claim_name, claim_id in _batched_select(
@@ -196,6 +198,7 @@ def delete_stream(transaction: sqlite3.Connection, descriptor: 'StreamDescriptor
     blob_hashes = [(blob.blob_hash, ) for blob in descriptor.blobs[:-1]]
     blob_hashes.append((descriptor.sd_hash, ))
     transaction.execute("delete from content_claim where stream_hash=? ", (descriptor.stream_hash,)).fetchall()
+    transaction.execute("delete from file_progress where stream_hash=? ", (descriptor.stream_hash,)).fetchall()
     transaction.execute("delete from file where stream_hash=? ", (descriptor.stream_hash,)).fetchall()
     transaction.execute("delete from stream_blob where stream_hash=?", (descriptor.stream_hash,)).fetchall()
     transaction.execute("delete from stream where stream_hash=? ", (descriptor.stream_hash,)).fetchall()
@@ -310,6 +313,11 @@ class SQLiteStorage(SQLiteMixin):
                 added_on integer not null
             );
 
+            create table if not exists file_progress (
+                stream_hash char(96) not null primary key references stream,
+                written_blobs blob not null
+            );
+
             create table if not exists content_claim (
                 stream_hash char(96) references stream,
                 bt_infohash char(20) references torrent,
@@ -338,6 +346,24 @@ class SQLiteStorage(SQLiteMixin):
                 unique (address, udp_port)
             );
             create index if not exists blob_data on blob(blob_hash, blob_length, is_mine);
+            create index if not exists blob_announce on blob(
+                next_announce_time, should_announce, single_announce, blob_hash, status
+            ) where status='finished';
+            create index if not exists blob_stored on blob(is_mine, added_on, blob_length, blob_hash, status)
+                where status='finished';
+            create index if not exists stream_blob_blob_hash on stream_blob(blob_hash, stream_hash);
+            create index if not exists stream_sd_hash on stream(sd_hash, stream_hash);
+            create index if not exists file_stream_hash on file(stream_hash) where stream_hash is not null;
+            create index if not exists file_bt_infohash on file(bt_infohash) where bt_infohash is not null;
+            create index if not exists content_claim_stream_hash on content_claim(stream_hash)
+                where stream_hash is not null;
+            create index if not exists content_claim_bt_infohash on content_claim(bt_infohash)
+                where bt_infohash is not null;
+            create index if not exists torrent_node_bt_infohash on torrent_node(bt_infohash);
+            create index if not exists torrent_tracker_bt_infohash on torrent_tracker(bt_infohash);
+            create index if not exists torrent_http_seed_bt_infohash on torrent_http_seed(bt_infohash);
+            create index if not exists claim_claim_id on claim(claim_id, claim_name);
+            create index if not exists support_claim_id on support(claim_id);
     """
 
     def __init__(self, conf: Config, path, loop=None, time_getter: typing.Optional[typing.Callable[[], float]] = None):
@@ -443,6 +469,14 @@ class SQLiteStorage(SQLiteMixin):
     def get_all_blob_hashes(self):
         return self.run_and_return_list("select blob_hash from blob")
 
+    def get_finished_blob_hashes(self):
+        return self.run_and_return_list("select blob_hash from blob where status='finished'")
+
+    def set_blobs_pending(self, blob_hashes: typing.List[str]):
+        return self.db.executemany(
+            "update blob set status='pending' where blob_hash=?", ((blob_hash, ) for blob_hash in blob_hashes)
+        )
+
     async def get_stored_blobs(self, is_mine: bool, is_network_blob=False):
         is_mine = 1 if is_mine else 0
         if is_network_blob:
@@ -666,6 +700,19 @@ class SQLiteStorage(SQLiteMixin):
             stream_hash,
         ))
 
+    def get_file_progress(self, stream_hash: str) -> typing.Awaitable[typing.Optional[bytes]]:
+        return self.run_and_return_one_or_none(
+            "select written_blobs from file_progress where stream_hash=?", stream_hash
+        )
+
+    def save_file_progress(self, stream_hash: str, written_blobs: bytes):
+        return self.db.execute_fetchall(
+            "insert or replace into file_progress values (?, ?)", (stream_hash, bytes(written_blobs))
+        )
+
+    def clear_file_progress(self, stream_hash: str):
+        return self.db.execute_fetchall("delete from file_progress where stream_hash=?", (stream_hash,))
+
     async def recover_streams(self, descriptors_and_sds: typing.List[typing.Tuple['StreamDescriptor', 'BlobFile',
                                                                                   typing.Optional[Transaction]]],
                               download_directory: str):
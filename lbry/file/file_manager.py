@@ -148,12 +148,12 @@ class FileManager:
                 existing_for_claim_id = self.get_filtered(claim_id=txo.claim_id)
                 if existing_for_claim_id:
                     log.info("claim contains an update to a stream we have, downloading it")
-                    if save_file and existing_for_claim_id[0].output_file_exists:
+                    if save_file and not existing_for_claim_id[0].output_file_needs_saving:
                         save_file = False
                     if not claim.stream.source.bt_infohash:
                         existing_for_claim_id[0].downloader.node = source_manager.node
                     await existing_for_claim_id[0].start(timeout=timeout, save_now=save_file)
-                    if not existing_for_claim_id[0].output_file_exists and (
+                    if existing_for_claim_id[0].output_file_needs_saving and (
                             save_file or file_name or download_directory):
                         await existing_for_claim_id[0].save_file(
                             file_name=file_name, download_directory=download_directory
@@ -163,12 +163,12 @@ class FileManager:
             # resume or update an existing stream, if the stream changed: download it and delete the old one after
             if updated_stream:
                 log.info("already have stream for %s", uri)
-                if save_file and updated_stream.output_file_exists:
+                if save_file and not updated_stream.output_file_needs_saving:
                     save_file = False
                 if not claim.stream.source.bt_infohash:
                     updated_stream.downloader.node = source_manager.node
                 await updated_stream.start(timeout=timeout, save_now=save_file)
-                if not updated_stream.output_file_exists and (save_file or file_name or download_directory):
+                if updated_stream.output_file_needs_saving and (save_file or file_name or download_directory):
                     await updated_stream.save_file(
                         file_name=file_name, download_directory=download_directory
                     )
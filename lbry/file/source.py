@@ -46,6 +46,8 @@ class ManagedDownloadSource:
         self._added_on = added_on
         self.analytics_manager = analytics_manager
         self.downloader = None
+        # set by the source manager, called whenever the status or progress of the download changes
+        self.update_callback: Optional[typing.Callable[['ManagedDownloadSource'], None]] = None
 
         self.saving = asyncio.Event()
         self.finished_writing = asyncio.Event()
@@ -70,6 +72,10 @@ class ManagedDownloadSource:
     async def stop_tasks(self):
         raise NotImplementedError()
 
+    def notify_update(self):
+        if self.update_callback is not None:
+            self.update_callback(self)  # pylint: disable=not-callable
+
     def set_claim(self, claim_info: typing.Dict, claim: 'Claim'):
         self.stream_claim_info = StoredContentClaim(
             f"{claim_info['txid']}:{claim_info['nout']}", claim_info['claim_id'],
@@ -160,3 +166,7 @@ class ManagedDownloadSource:
     @property
     def output_file_exists(self):
         return os.path.isfile(self.full_path) if self.full_path else False
+
+    @property
+    def output_file_needs_saving(self) -> bool:
+        return not self.output_file_exists
@@ -4,6 +4,7 @@ import logging
 import typing
 from typing import Optional
 from lbry.file.source import ManagedDownloadSource
+from lbry.wallet.stream import StreamController
 if typing.TYPE_CHECKING:
     from lbry.conf import Config
     from lbry.extras.daemon.analytics import AnalyticsManager
@@ -55,14 +56,32 @@ class SourceManager:
         self.analytics_manager = analytics_manager
         self._sources: typing.Dict[str, ManagedDownloadSource] = {}
         self.started = asyncio.Event()
+        self._on_update_controller = StreamController()
+        self.on_update = self._on_update_controller.stream
+        self._on_add_controller = StreamController()
+        self.on_add = self._on_add_controller.stream
+        self._on_remove_controller = StreamController()
+        self.on_remove = self._on_remove_controller.stream
+
+    def _source_updated(self, source: ManagedDownloadSource):
+        if self._on_update_controller.has_listener:
+            self._on_update_controller.add(source)
+
+    def _source_removed(self, source: ManagedDownloadSource):
+        if self._on_remove_controller.has_listener:
+            self._on_remove_controller.add(source)
 
     def add(self, source: ManagedDownloadSource):
+        source.update_callback = self._source_updated
         self._sources[source.identifier] = source
+        if self._on_add_controller.has_listener:
+            self._on_add_controller.add(source)
 
     async def remove(self, source: ManagedDownloadSource):
         if source.identifier not in self._sources:
             return
         self._sources.pop(source.identifier)
+        self._source_removed(source)
         await source.stop_tasks()
 
     async def initialize_from_database(self):
@@ -1,3 +1,5 @@
+import time
+import typing
 import asyncio
 import logging
 
@@ -8,18 +10,61 @@ log = logging.getLogger(__name__)
 
 
 class BackgroundDownloader:
+    MIN_PREFIX_COLLIDING_BITS = 8
+    FAILED_RETRY_DELAY = 60 * 60  # seconds, doubled after every failed attempt at the same stream
+    MAX_FAILED_RETRY_DELAY = 24 * 60 * 60
+
     def __init__(self, conf, storage, blob_manager, dht_node=None):
         self.storage = storage
         self.blob_manager = blob_manager
         self.node = dht_node
         self.conf = conf
+        self.ongoing_downloads: typing.Dict[str, asyncio.Task] = {}
+        self.completed: typing.Set[str] = set()
+        self.failed: typing.Dict[str, typing.Tuple[int, float]] = {}  # sd hash: (failed attempts, retry after)
+        # bytes left in the network storage quota, None when it isn't enforced
+        self.space_available: typing.Optional[int] = None
+        self._next_bandwidth_time = 0.0
 
-    async def download_blobs(self, sd_hash):
+    @property
+    def is_busy(self) -> bool:
+        return bool(self.ongoing_downloads)
+
+    @property
+    def quota_reached(self) -> bool:
+        return self.space_available is not None and self.space_available <= 0
+
+    async def _wait_for_bandwidth(self, length: int):
+        rate = self.conf.background_download_bandwidth * 1024
+        if not rate:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(self._next_bandwidth_time, now)
+        self._next_bandwidth_time = start + length / rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _download_blobs(self, sd_hash: str) -> bool:
         downloader = StreamDownloader(asyncio.get_running_loop(), self.conf, self.blob_manager, sd_hash)
         try:
             await downloader.start(self.node, save_stream=False)
             for blob_info in downloader.descriptor.blobs[:-1]:
+                if self.quota_reached:
+                    log.debug("network storage quota is full, stopping background download of %s", sd_hash)
+                    return False
+                if blob_info.blob_hash in self.blob_manager.completed_blob_hashes:
+                    continue
+                await self._wait_for_bandwidth(blob_info.length)
                 await downloader.download_stream_blob(blob_info)
+                if self.space_available is not None:
+                    self.space_available -= blob_info.length
+            return True
+        finally:
+            downloader.stop()
+
+    async def download_blobs(self, sd_hash):
+        try:
+            await self._download_blobs(sd_hash)
         except ValueError:
             return
         except asyncio.CancelledError:
@@ -27,5 +72,60 @@ class BackgroundDownloader:
             raise
         except Exception:
             log.error("Unexpected download error on background downloader")
+
+    def get_candidates(self) -> typing.List[str]:
+        """
+        Stored sd hashes worth seeding, closest to our node id first (by shared prefix bits) and then most
+        announced, skipping those already downloading, completed, or waiting to be retried after a failure
+        """
+        node_id = int.from_bytes(self.node.protocol.node_id, 'big')
+        data_store = self.node.protocol.data_store
+        now = time.time()
+        stored = {blob_hash.hex(): blob_hash for blob_hash in self.node.stored_blob_hashes}
+        self.completed.intersection_update(stored)
+        for sd_hash in set(self.failed).difference(stored):
+            del self.failed[sd_hash]
+        ranked = []
+        for sd_hash, blob_hash in stored.items():
+            if sd_hash in self.ongoing_downloads or sd_hash in self.completed or \
+                    sd_hash in self.blob_manager.completed_blob_hashes:
+                continue
+            if sd_hash in self.failed and self.failed[sd_hash][1] > now:
+                continue
+            distance = node_id ^ int.from_bytes(blob_hash, 'big')
+            if len(blob_hash) * 8 - distance.bit_length() < self.MIN_PREFIX_COLLIDING_BITS:
+                continue
+            ranked.append((distance.bit_length(), -len(data_store.get_peers_for_blob(blob_hash)), distance, sd_hash))
+        ranked.sort()
+        return [sd_hash for *_, sd_hash in ranked]
+
+    def download_next_blobs(self):
+        available_slots = self.conf.concurrent_background_downloads - len(self.ongoing_downloads)
+        if available_slots <= 0 or self.quota_reached:
+            return
+        for sd_hash in self.get_candidates()[:available_slots]:
+            self.ongoing_downloads[sd_hash] = asyncio.create_task(self._download(sd_hash))
+
+    async def _download(self, sd_hash: str):
+        try:
+            if await self._download_blobs(sd_hash):
+                self.completed.add(sd_hash)
+                self.failed.pop(sd_hash, None)
+        except ValueError:  # not a stream descriptor, only the blob itself was downloaded
+            self.completed.add(sd_hash)
+        except asyncio.CancelledError:
+            log.debug("Cancelled background download of %s", sd_hash)
+            raise
+        except Exception as err:
+            attempts = self.failed.get(sd_hash, (0, 0))[0] + 1
+            retry_delay = min(self.FAILED_RETRY_DELAY * 2 ** (attempts - 1), self.MAX_FAILED_RETRY_DELAY)
+            self.failed[sd_hash] = (attempts, time.time() + retry_delay)
+            log.warning("background download of %s failed (%s), retrying in %is", sd_hash, err, retry_delay)
         finally:
-            downloader.stop()
+            self.ongoing_downloads.pop(sd_hash, None)
+        self.download_next_blobs()
+
+    def stop_downloads(self):
+        while self.ongoing_downloads:
+            _, task = self.ongoing_downloads.popitem()
+            task.cancel()
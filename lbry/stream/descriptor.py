@@ -11,7 +11,7 @@ from cryptography.hazmat.primitives.ciphers.algorithms import AES
 from lbry.blob import MAX_BLOB_SIZE
 from lbry.blob.blob_info import BlobInfo
 from lbry.blob.blob_file import AbstractBlob, BlobFile
-from lbry.utils import get_lbry_hash_obj
+from lbry.utils import get_lbry_hash_obj, LRUCacheWithMetrics
 from lbry.error import InvalidStreamDescriptorError
 
 log = logging.getLogger(__name__)
@@ -27,6 +27,11 @@ RE_ILLEGAL_FILENAME_CHARS = re.compile(
     r')'
 )
 
+DESCRIPTOR_CACHE_SIZE = 1024
+# sd hash: (stream name, key, suggested file name, stream hash, ((blob num, length, iv, blob hash), ...))
+# sd blobs are named by the hash of their contents, so a descriptor parsed and validated once stays valid
+_descriptor_cache = LRUCacheWithMetrics(DESCRIPTOR_CACHE_SIZE, metric_name='stream_descriptor', namespace='stream')
+
 
 def format_sd_info(stream_name: str, key: str, suggested_file_name: str, stream_hash: str,
                    blobs: typing.List[typing.Dict]) -> typing.Dict:
@@ -40,6 +45,13 @@ def format_sd_info(stream_name: str, key: str, suggested_file_name: str, stream_
     }
 
 
+def forget_stream_descriptor(sd_hash: str):
+    try:
+        _descriptor_cache.pop(sd_hash)
+    except KeyError:
+        pass
+
+
 def random_iv_generator() -> typing.Generator[bytes, None, None]:
     while 1:
         yield os.urandom(AES.block_size // 8)
@@ -214,7 +226,21 @@ class StreamDescriptor:
                                           blob: AbstractBlob) -> 'StreamDescriptor':
         if not blob.is_readable():
             raise InvalidStreamDescriptorError(f"unreadable/missing blob: {blob.blob_hash}")
-        return await loop.run_in_executor(None, cls._from_stream_descriptor_blob, loop, blob_dir, blob)
+        cached = _descriptor_cache.get(blob.blob_hash)
+        if cached is not None:
+            stream_name, key, suggested_file_name, stream_hash, blobs = cached
+            added_on = time.time()
+            return cls(
+                loop, blob_dir, stream_name, key, suggested_file_name,
+                [BlobInfo(blob_num, length, iv, added_on, blob_hash) for blob_num, length, iv, blob_hash in blobs],
+                stream_hash, blob.blob_hash
+            )
+        descriptor = await loop.run_in_executor(None, cls._from_stream_descriptor_blob, loop, blob_dir, blob)
+        _descriptor_cache.set(blob.blob_hash, (
+            descriptor.stream_name, descriptor.key, descriptor.suggested_file_name, descriptor.stream_hash,
+            tuple((info.blob_num, info.length, info.iv, info.blob_hash) for info in descriptor.blobs)
+        ))
+        return descriptor
 
     @staticmethod
     def get_blob_hashsum(blob_dict: typing.Dict):
@@ -0,0 +1,138 @@
+import os
+import typing
+import asyncio
+import logging
+import threading
+
+if typing.TYPE_CHECKING:
+    from lbry.stream.descriptor import StreamDescriptor
+
+log = logging.getLogger(__name__)
+
+
+def make_written_blobs_map(blob_count: int) -> bytearray:
+    return bytearray((blob_count + 7) // 8)
+
+
+def is_blob_written(written_blobs: typing.Union[bytes, bytearray], blob_num: int) -> bool:
+    index = blob_num >> 3
+    return index < len(written_blobs) and bool(written_blobs[index] & (1 << (blob_num & 7)))
+
+
+def get_written_bytes(descriptor: 'StreamDescriptor', written_blobs: typing.Union[bytes, bytearray]) -> int:
+    return sum(
+        blob.length - 1 for blob in descriptor.blobs[:-1] if is_blob_written(written_blobs, blob.blob_num)
+    )
+
+
+def _preallocate(file_descriptor: int, size: int):
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(file_descriptor, 0, size)
+            return
+        except OSError as err:  # not supported by the filesystem
+            log.debug("failed to preallocate %i bytes: %s", size, err)
+    os.ftruncate(file_descriptor, size)
+
+
+class StreamFileWriter:
+    """
+    Writes the decrypted blobs of a stream to its output file.
+
+    A single handle is kept open for the whole save. The file is preallocated to the size known from the
+    descriptor and every blob is written at its own offset, so blobs may arrive in any order. Which blobs
+    are on disk is tracked in a bitmap (one bit per blob) that the caller persists to resume later.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, output_path: str, descriptor: 'StreamDescriptor',
+                 written_blobs: typing.Optional[bytes] = None):
+        self.loop = loop
+        self.output_path = output_path
+        self.descriptor = descriptor
+        self.offsets: typing.List[int] = []
+        offset = 0
+        for blob_info in descriptor.blobs[:-1]:
+            self.offsets.append(offset)
+            offset += blob_info.length - 1
+        self.written_blobs = make_written_blobs_map(len(self.offsets))
+        if written_blobs and len(written_blobs) == len(self.written_blobs):
+            self.written_blobs[:] = written_blobs
+        self._final_size: typing.Optional[int] = None
+        self._fd: typing.Optional[int] = None
+        # held for every write and for closing, so a write left running in the executor by a cancelled
+        # save never lands on a reused file descriptor
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._fd is not None
+
+    @property
+    def resumed(self) -> bool:
+        return any(self.written_blobs)
+
+    @property
+    def finished(self) -> bool:
+        return all(self.is_written(blob_num) for blob_num in range(len(self.offsets)))
+
+    @property
+    def written_bytes(self) -> int:
+        return get_written_bytes(self.descriptor, self.written_blobs)
+
+    def is_written(self, blob_num: int) -> bool:
+        return is_blob_written(self.written_blobs, blob_num)
+
+    def _open(self):
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        if not (self.resumed and os.path.isfile(self.output_path)):
+            self.written_blobs[:] = make_written_blobs_map(len(self.offsets))
+            flags |= os.O_TRUNC
+        self._fd = os.open(self.output_path, flags, 0o666)
+        if self.offsets and not self.resumed:
+            _preallocate(self._fd, self.descriptor.lower_bound_decrypted_length())
+
+    def _write(self, offset: int, data: bytes):
+        with self._lock:
+            if self._fd is None:
+                raise OSError('I/O operation on closed file')
+            if not hasattr(os, 'pwrite'):
+                os.lseek(self._fd, offset, os.SEEK_SET)
+            view = memoryview(data)
+            while view:
+                if hasattr(os, 'pwrite'):
+                    written = os.pwrite(self._fd, view, offset)
+                else:
+                    written = os.write(self._fd, view)
+                view, offset = view[written:], offset + written
+
+    def _finish(self):
+        with self._lock:
+            if self._final_size is not None:
+                os.ftruncate(self._fd, self._final_size)
+            os.fsync(self._fd)
+        self._close()
+
+    def _close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    async def open(self):
+        await self.loop.run_in_executor(None, self._open)
+
+    async def write_blob(self, blob_num: int, data: bytes):
+        if self._fd is None:
+            raise OSError('I/O operation on closed file')
+        offset = self.offsets[blob_num]
+        await self.loop.run_in_executor(None, self._write, offset, data)
+        if blob_num == len(self.offsets) - 1:
+            # the last blob is the only one whose decrypted length isn't known from the descriptor
+            self._final_size = offset + len(data)
+        self.written_blobs[blob_num >> 3] |= 1 << (blob_num & 7)
+
+    async def finish(self):
+        await self.loop.run_in_executor(None, self._finish)
+
+    def close(self):
+        self._close()
@@ -9,6 +9,7 @@ from lbry.error import DownloadSDTimeoutError
 from lbry.schema.mime_types import guess_media_type
 from lbry.stream.downloader import StreamDownloader
 from lbry.stream.descriptor import StreamDescriptor, sanitize_file_name
+from lbry.stream.file_writer import StreamFileWriter, get_written_bytes
 from lbry.stream.reflector.client import StreamReflectorClient
 from lbry.extras.daemon.storage import StoredContentClaim
 from lbry.blob import MAX_BLOB_SIZE
@@ -47,7 +48,7 @@ class ManagedStream(ManagedDownloadSource):
                  descriptor: Optional[StreamDescriptor] = None,
                  content_fee: Optional['Transaction'] = None,
                  analytics_manager: Optional['AnalyticsManager'] = None,
-                 added_on: Optional[int] = None):
+                 added_on: Optional[int] = None, written_blobs: Optional[bytes] = None):
         super().__init__(loop, config, blob_manager.storage, sd_hash, file_name, download_directory, status, claim,
                          download_id, rowid, content_fee, analytics_manager, added_on)
         self.blob_manager = blob_manager
@@ -58,6 +59,8 @@ class ManagedStream(ManagedDownloadSource):
         self.reflector_progress = 0
         self.uploading_to_reflector = False
         self.file_output_task: typing.Optional[asyncio.Task] = None
+        self.file_writer: typing.Optional[StreamFileWriter] = None
+        self.written_blobs = written_blobs  # set while the output file is incomplete
         self.delayed_stop_task: typing.Optional[asyncio.Task] = None
         self.streaming_responses: typing.List[typing.Tuple[Request, StreamResponse]] = []
         self.fully_reflected = asyncio.Event()
@@ -98,12 +101,26 @@ class ManagedStream(ManagedDownloadSource):
 
     @property
     def written_bytes(self) -> int:
-        return 0 if not self.output_file_exists else os.stat(self.full_path).st_size
+        if not self.output_file_exists:
+            return 0
+        if self.file_writer:
+            return self.file_writer.written_bytes
+        if self.written_blobs is not None:
+            # the incomplete output file is preallocated, so its size doesn't tell how much has been written
+            return get_written_bytes(self.descriptor, self.written_blobs)
+        return os.stat(self.full_path).st_size
 
     @property
     def completed(self):
         return self.written_bytes >= self.descriptor.lower_bound_decrypted_length()
 
+    @property
+    def output_file_needs_saving(self) -> bool:
+        # a save that was stopped part way leaves its file behind, saving the file again resumes it
+        if self.saving.is_set():
+            return False
+        return not self.output_file_exists or self.written_blobs is not None
+
     @property
     def stream_url(self):
         return f"http://{self.config.streaming_host}:{self.config.streaming_port}/stream/{self.sd_hash}"
@@ -111,6 +128,7 @@ class ManagedStream(ManagedDownloadSource):
     async def update_status(self, status: str):
         assert status in [self.STATUS_RUNNING, self.STATUS_STOPPED, self.STATUS_FINISHED]
         self._status = status
+        self.notify_update()
         await self.blob_manager.storage.change_file_status(self.stream_hash, status)
 
     @property
@@ -250,26 +268,53 @@ class ManagedStream(ManagedDownloadSource):
             if not self.streaming_responses:
                 self.streaming.clear()
 
-    @staticmethod
-    def _write_decrypted_blob(output_path: str, data: bytes):
-        with open(output_path, 'ab') as handle:
-            handle.write(data)
-            handle.flush()
+    async def _aiter_read_ahead(self, blob_infos: typing.List['BlobInfo'], connection_id: int = 0)\
+            -> typing.AsyncIterator[typing.Tuple['BlobInfo', bytes]]:
+        # download up to `save_file_read_ahead` blobs at once, yielding them in the order they finish
+        read_ahead = max(1, self.config.save_file_read_ahead)
+        to_read = list(reversed(blob_infos))
+        pending: typing.Dict[asyncio.Task, 'BlobInfo'] = {}
+        try:
+            while to_read or pending:
+                while to_read and len(pending) < read_ahead:
+                    blob_info = to_read.pop()
+                    pending[self.loop.create_task(self.downloader.read_blob(blob_info, connection_id))] = blob_info
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+        finally:
+            for task in pending:
+                task.cancel()
 
-    async def _save_file(self, output_path: str):
+    async def _save_file(self, output_path: str, written_blobs: Optional[bytes] = None):
         log.info("save file for lbry://%s#%s (sd hash %s...) -> %s", self.claim_name, self.claim_id, self.sd_hash[:6],
                  output_path)
         self.saving.set()
         self.finished_write_attempt.clear()
         self.finished_writing.clear()
         self.started_writing.clear()
+        writer = StreamFileWriter(self.loop, output_path, self.descriptor, written_blobs)
         try:
-            open(output_path, 'wb').close()  # pylint: disable=consider-using-with
-            async for blob_info, decrypted in self._aiter_read_stream(connection_id=self.SAVING_ID):
+            await writer.open()
+            self.file_writer = writer
+            if writer.resumed:
+                log.info("resuming save of %s at %i bytes", output_path, writer.written_bytes)
+            else:
+                await self.blob_manager.storage.save_file_progress(self.stream_hash, writer.written_blobs)
+            self.written_blobs = writer.written_blobs
+            to_write = [blob for blob in self.descriptor.blobs[:-1] if not writer.is_written(blob.blob_num)]
+            async for blob_info, decrypted in self._aiter_read_ahead(to_write, connection_id=self.SAVING_ID):
                 log.info("write blob %i/%i", blob_info.blob_num + 1, len(self.descriptor.blobs) - 1)
-                await self.loop.run_in_executor(None, self._write_decrypted_blob, output_path, decrypted)
+                await writer.write_blob(blob_info.blob_num, decrypted)
+                self.notify_update()
+                await self.blob_manager.storage.save_file_progress(self.stream_hash, writer.written_blobs)
                 if not self.started_writing.is_set():
                     self.started_writing.set()
+            await writer.finish()
+            self.file_writer, self.written_blobs = None, None
+            await self.blob_manager.storage.clear_file_progress(self.stream_hash)
+            if not self.started_writing.is_set():
+                self.started_writing.set()
             await self.update_status(ManagedStream.STATUS_FINISHED)
             if self.analytics_manager:
                 self.loop.create_task(self.analytics_manager.send_download_finished(
@@ -280,6 +325,15 @@ class ManagedStream(ManagedDownloadSource):
                      self.sd_hash[:6], self.full_path)
             await self.blob_manager.storage.set_saved_file(self.stream_hash)
         except (Exception, asyncio.CancelledError) as err:
+            writer.close()
+            self.file_writer = None
+            if isinstance(err, asyncio.CancelledError) and writer.resumed:
+                # keep what was written so far, saving the file again resumes from the recorded progress
+                log.info("stopped saving %s for %s, %i bytes written", output_path, self.sd_hash,
+                         writer.written_bytes)
+                raise err
+            self.written_blobs = None
+            await self.blob_manager.storage.clear_file_progress(self.stream_hash)
             if os.path.isfile(output_path):
                 log.warning("removing incomplete download %s for %s", output_path, self.sd_hash)
                 os.remove(output_path)
@@ -303,6 +357,10 @@ class ManagedStream(ManagedDownloadSource):
         await self.start()
         if self.file_output_task and not self.file_output_task.done():  # cancel an already running save task
             self.file_output_task.cancel()
+        written_blobs = await self.blob_manager.storage.get_file_progress(self.stream_hash)
+        resume = written_blobs is not None and self.output_file_exists and \
+            (file_name or self._file_name) == self._file_name and \
+            (download_directory or self.download_directory) == self.download_directory
         self.download_directory = download_directory or self.download_directory or self.config.download_dir
         if not self.download_directory:
             raise ValueError("no directory to download to")
@@ -311,15 +369,17 @@ class ManagedStream(ManagedDownloadSource):
         if not os.path.isdir(self.download_directory):
             log.warning("download directory '%s' does not exist, attempting to make it", self.download_directory)
             os.mkdir(self.download_directory)
-        self._file_name = await get_next_available_file_name(
-            self.loop, self.download_directory,
-            file_name or self._file_name or sanitize_file_name(self.suggested_file_name)
-        )
+        if not resume:
+            written_blobs = None
+            self._file_name = await get_next_available_file_name(
+                self.loop, self.download_directory,
+                file_name or self._file_name or sanitize_file_name(self.suggested_file_name)
+            )
         await self.blob_manager.storage.change_file_download_dir_and_file_name(
             self.stream_hash, self.download_directory, self.file_name
         )
         await self.update_status(ManagedStream.STATUS_RUNNING)
-        self.file_output_task = self.loop.create_task(self._save_file(self.full_path))
+        self.file_output_task = self.loop.create_task(self._save_file(self.full_path, written_blobs))
         try:
             await asyncio.wait_for(self.started_writing.wait(), self.config.download_timeout)
         except asyncio.TimeoutError:
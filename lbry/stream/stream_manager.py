@@ -104,7 +104,8 @@ class StreamManager(SourceManager):
     async def _load_stream(self, rowid: int, sd_hash: str, file_name: Optional[str],
                            download_directory: Optional[str], status: str,
                            claim: Optional['StoredContentClaim'], content_fee: Optional['Transaction'],
-                           added_on: Optional[int], fully_reflected: Optional[bool]):
+                           added_on: Optional[int], fully_reflected: Optional[bool],
+                           written_blobs: Optional[bytes] = None):
         try:
             descriptor = await self.blob_manager.get_stream_descriptor(sd_hash)
         except InvalidStreamDescriptorError as err:
@@ -113,7 +114,7 @@ class StreamManager(SourceManager):
         stream = ManagedStream(
             self.loop, self.config, self.blob_manager, descriptor.sd_hash, download_directory, file_name, status,
             claim, content_fee=content_fee, rowid=rowid, descriptor=descriptor,
-            analytics_manager=self.analytics_manager, added_on=added_on
+            analytics_manager=self.analytics_manager, added_on=added_on, written_blobs=written_blobs
         )
         if fully_reflected:
             stream.fully_reflected.set()
@@ -147,7 +148,7 @@ class StreamManager(SourceManager):
                 file_info['rowid'], file_info['sd_hash'], file_name,
                 download_directory, file_info['status'],
                 file_info['claim'], file_info['content_fee'],
-                file_info['added_on'], file_info['fully_reflected']
+                file_info['added_on'], file_info['fully_reflected'], file_info['written_blobs']
             )))
         if add_stream_tasks:
             await asyncio.gather(*add_stream_tasks)
@@ -263,10 +264,12 @@ class StreamManager(SourceManager):
         await source.stop_tasks()
         if source.identifier in self.streams:
             del self.streams[source.identifier]
+            self._source_removed(source)
         blob_hashes = [source.identifier] + [b.blob_hash for b in source.descriptor.blobs[:-1]]
         await self.blob_manager.delete_blobs(blob_hashes, delete_from_db=False)
         await self.storage.delete_stream(source.descriptor)
-        if delete_file and source.output_file_exists:
+        # an incomplete output file is only kept around to resume saving it, so remove it along with the stream
+        if (delete_file or source.written_blobs is not None) and source.output_file_exists:
             os.remove(source.full_path)
 
     async def stream_partial_content(self, request: Request, sd_hash: str):
@@ -1,3 +1,4 @@
+import heapq
 import random
 import socket
 import string
@@ -8,7 +9,8 @@ import time
 import ipaddress
 from collections import namedtuple
 from functools import reduce
-from typing import Optional
+from itertools import count
+from typing import Optional, Dict, List, Set, Tuple
 
 from lbry.dht.node import get_kademlia_peers_from_hosts
 from lbry.utils import resolve_host, async_timed_cache, cache_concurrent
@@ -20,6 +22,8 @@ CONNECTION_EXPIRES_AFTER_SECONDS = 50
 PREFIX = 'LB'  # todo: PR BEP20 to add ourselves
 DEFAULT_TIMEOUT_SECONDS = 10.0
 DEFAULT_CONCURRENCY_LIMIT = 100
+RETRY_SECONDS = 60.0  # also the shortest interval we re-announce at, whatever the tracker asks for
+ANNOUNCES_PER_SECOND = 50  # per tracker
 # see: http://bittorrent.org/beps/bep_0015.html and http://xbtt.sourceforge.net/udp_tracker_protocol.html
 ConnectRequest = namedtuple("ConnectRequest", ["connection_id", "action", "transaction_id"])
 ConnectResponse = namedtuple("ConnectResponse", ["action", "transaction_id", "connection_id"])
@@ -137,27 +141,59 @@ class UDPTrackerClientProtocol(asyncio.DatagramProtocol):
         self.transport = None
 
 
+_dns_failures: Dict[Tuple[str, int], float] = {}
+
+
+@cache_concurrent
+async def resolve_tracker_host(tracker_host, tracker_port):
+    # resolve_host caches what it finds, this also keeps a failing host from being looked up for every info hash
+    failed_at = _dns_failures.get((tracker_host, tracker_port))
+    if failed_at is not None and time.time() - failed_at < RETRY_SECONDS:
+        raise socket.gaierror(f"{tracker_host} failed to resolve recently")
+    try:
+        return await resolve_host(tracker_host, tracker_port, 'udp')
+    except socket.error:
+        _dns_failures[(tracker_host, tracker_port)] = time.time()
+        raise
+
+
 class TrackerClient:
     event_controller = StreamController()
 
-    def __init__(self, node_id, announce_port, get_servers, timeout=10.0):
+    def __init__(self, node_id, announce_port, get_servers, timeout=10.0, announces_per_second=ANNOUNCES_PER_SECOND):
         self.client = UDPTrackerClientProtocol(timeout=timeout)
         self.transport = None
         self.peer_id = make_peer_id(node_id.hex() if node_id else None)
         self.announce_port = announce_port
         self._get_servers = get_servers
-        self.results = {}  # we can't probe the server before the interval, so we keep the result here until it expires
+        # we can't probe the server before the interval, so we keep the result here until it expires
+        self.results: Dict[Tuple[str, int], Dict[bytes, Tuple[float, Optional[AnnounceResponse]]]] = {}
+        self._results_expiry: List[Tuple[float, Tuple[str, int], bytes]] = []  # heap of (expires, tracker, info hash)
         self.tasks = {}
+        self.announces_per_second = announces_per_second
+        # info hashes kept announced, with a generation telling apart entries left in the heaps by a removed hash
+        self._announcing: Dict[bytes, int] = {}
+        self._generations = count()
+        # per tracker server, a heap of (due time, info hash, generation)
+        self._due: Dict[Tuple[str, int], List[Tuple[float, bytes, int]]] = {}
+        self._announce_batches: Set[asyncio.Task] = set()
+        self.announce_task: Optional[asyncio.Task] = None
 
     async def start(self):
         self.transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
             lambda: self.client, local_addr=("0.0.0.0", 0))
         self.event_controller.stream.listen(
             lambda request: self.on_hash(request[1], request[2]) if request[0] == 'search' else None)
+        self.announce_task = asyncio.create_task(self._announce_when_due())
 
     def stop(self):
         while self.tasks:
             self.tasks.popitem()[1].cancel()
+        if self.announce_task and not self.announce_task.done():
+            self.announce_task.cancel()
+        self.announce_task = None
+        while self._announce_batches:
+            self._announce_batches.pop().cancel()
         if self.transport is not None:
             self.transport.close()
         self.client = None
@@ -170,15 +206,72 @@ class TrackerClient:
             task.add_done_callback(lambda *_: self.tasks.pop(info_hash, None))
             self.tasks[info_hash] = task
 
+    def add_announce(self, *info_hashes):
+        """ Keep announcing the info hashes to every tracker, each time the tracker's interval for it is up. """
+        now = time.time()
+        for info_hash in info_hashes:
+            if info_hash in self._announcing:
+                continue
+            generation = self._announcing[info_hash] = next(self._generations)
+            for due in self._due.values():
+                heapq.heappush(due, (now, info_hash, generation))
+
+    def remove_announce(self, *info_hashes):
+        for info_hash in info_hashes:
+            self._announcing.pop(info_hash, None)
+
+    def _sync_servers(self):
+        servers = {tuple(server) for server in self._get_servers()}
+        for server in self._due.keys() - servers:
+            del self._due[server]
+        now = time.time()
+        for server in servers - self._due.keys():
+            due = [(now, info_hash, generation) for info_hash, generation in self._announcing.items()]
+            heapq.heapify(due)
+            self._due[server] = due
+
+    async def _announce_when_due(self):
+        while True:
+            self._sync_servers()
+            now = time.time()
+            for server, due in self._due.items():
+                batch = []
+                while due and due[0][0] <= now and len(batch) < self.announces_per_second:
+                    _, info_hash, generation = heapq.heappop(due)
+                    if self._announcing.get(info_hash) == generation:
+                        batch.append((info_hash, generation))
+                if batch:
+                    task = asyncio.create_task(self._announce_batch(server, batch))
+                    self._announce_batches.add(task)
+                    task.add_done_callback(self._announce_batches.discard)
+            await asyncio.sleep(1.0)
+
+    async def _announce_batch(self, server, batch: List[Tuple[bytes, int]]):
+        results = await asyncio.gather(
+            *[self._probe_server(info_hash, *server) for info_hash, _ in batch], return_exceptions=True
+        )
+        now = time.time()
+        errors = 0
+        due = self._due.get(server)
+        for (info_hash, generation), result in zip(batch, results):
+            if isinstance(result, AnnounceResponse):
+                next_announcement = now + max(result.interval, RETRY_SECONDS)
+            else:
+                errors += 1
+                next_announcement = now + RETRY_SECONDS
+            if due is not None and self._announcing.get(info_hash) == generation:
+                heapq.heappush(due, (next_announcement, info_hash, generation))
+        log.debug("Tracker: finished announcing %d files to %s:%d, %d errors", len(results), *server, errors)
+
     async def announce_many(self, *info_hashes, stopped=False):
         await asyncio.gather(
             *[self._announce_many(server, info_hashes, stopped=stopped) for server in self._get_servers()],
             return_exceptions=True)
 
     async def _announce_many(self, server, info_hashes, stopped=False):
-        tracker_ip = await resolve_host(*server, 'udp')
+        tracker_ip = await resolve_tracker_host(*server)
         still_good_info_hashes = {
-            info_hash for (info_hash, (next_announcement, _)) in self.results.get(tracker_ip, {}).items()
+            info_hash for (info_hash, (next_announcement, _)) in self.results.get((tracker_ip, server[1]), {}).items()
             if time.time() < next_announcement
         }
         results = await asyncio.gather(
@@ -206,26 +299,40 @@ class TrackerClient:
     async def _probe_server(self, info_hash, tracker_host, tracker_port, stopped=False, no_port=False):
         result = None
         try:
-            tracker_host = await resolve_host(tracker_host, tracker_port, 'udp')
+            tracker_host = await resolve_tracker_host(tracker_host, tracker_port)
         except socket.error:
             log.warning("DNS failure while resolving tracker host: %s, skipping.", tracker_host)
             return
-        self.results.setdefault(tracker_host, {})
-        if info_hash in self.results[tracker_host]:
-            next_announcement, result = self.results[tracker_host][info_hash]
+        tracker = (tracker_host, tracker_port)
+        if info_hash in self.results.get(tracker, {}):
+            next_announcement, result = self.results[tracker][info_hash]
             if time.time() < next_announcement:
                 return result
         try:
             result = await self.client.announce(
                 info_hash, self.peer_id, 0 if no_port else self.announce_port, tracker_host, tracker_port, stopped)
-            self.results[tracker_host][info_hash] = (time.time() + result.interval, result)
+            self._set_result(tracker, info_hash, time.time() + result.interval, result)
         except asyncio.TimeoutError:  # todo: this is UDP, timeout is common, we need a better metric for failures
-            self.results[tracker_host][info_hash] = (time.time() + 60.0, result)
+            self._set_result(tracker, info_hash, time.time() + RETRY_SECONDS, result)
             log.debug("Tracker timed out: %s:%d", tracker_host, tracker_port)
             return None
         log.debug("Announced: %s found %d peers for %s", tracker_host, len(result.peers), info_hash.hex()[:8])
         return result
 
+    def _set_result(self, tracker, info_hash, next_announcement, result):
+        now = time.time()
+        expiry = self._results_expiry
+        while expiry and expiry[0][0] <= now:
+            expires, expired_tracker, expired_hash = heapq.heappop(expiry)
+            results = self.results.get(expired_tracker)
+            # skip entries overwritten by a later result
+            if results and results.get(expired_hash, (None,))[0] == expires:
+                del results[expired_hash]
+                if not results:
+                    del self.results[expired_tracker]
+        self.results.setdefault(tracker, {})[info_hash] = (next_announcement, result)
+        heapq.heappush(expiry, (next_announcement, tracker, info_hash))
+
 
 def enqueue_tracker_search(info_hash: bytes, peer_q: asyncio.Queue):
     async def on_announcement(announcement: AnnounceResponse):
@@ -7,7 +7,7 @@ import asyncio
 import random
 from hashlib import sha256
 from string import hexdigits
-from typing import Type, Dict, Tuple, Optional, Any, List
+from typing import Type, Dict, Tuple, Optional, Any, List, Iterable
 
 from lbry.error import InvalidPasswordError
 from lbry.crypto.crypt import aes_encrypt, aes_decrypt
@@ -35,10 +35,13 @@ def validate_claim_id(claim_id):
 
 class DeterministicChannelKeyManager:
 
+    lookahead = 256  # most keys checked against the database at once while looking for the next unused one
+
     def __init__(self, account: 'Account'):
         self.account = account
         self.last_known = 0
         self.cache = {}
+        self._keys: Dict[int, PrivateKey] = {}
         self._private_key: Optional[PrivateKey] = None
 
     @property
@@ -48,14 +51,18 @@ class DeterministicChannelKeyManager:
                 self._private_key = self.account.private_key.child(KeyPath.CHANNEL)
         return self._private_key
 
+    def get_key(self, n: int) -> PrivateKey:
+        key = self._keys.get(n)
+        if key is None:
+            key = self._keys[n] = self.private_key.child(n)
+        return key
+
     def maybe_generate_deterministic_key_for_channel(self, txo):
         if self.private_key is None:
             return
-        next_private_key = self.private_key.child(self.last_known)
-        public_key = next_private_key.public_key
-        public_key_bytes = public_key.pubkey_bytes
-        if txo.claim.channel.public_key_bytes == public_key_bytes:
-            self.cache[public_key.address] = next_private_key
+        next_private_key = self.get_key(self.last_known)
+        if txo.claim.channel.public_key_bytes == next_private_key.public_key.pubkey_bytes:
+            self.cache[next_private_key.address] = next_private_key
             self.last_known += 1
 
     async def ensure_cache_primed(self):
@@ -64,13 +71,16 @@ class DeterministicChannelKeyManager:
 
     async def generate_next_key(self) -> PrivateKey:
         db = self.account.ledger.db
+        batch_size = 1
         while True:
-            next_private_key = self.private_key.child(self.last_known)
-            public_key = next_private_key.public_key
-            self.cache[public_key.address] = next_private_key
-            if not await db.is_channel_key_used(self.account, public_key):
-                return next_private_key
-            self.last_known += 1
+            keys = [self.get_key(n) for n in range(self.last_known, self.last_known + batch_size)]
+            used = await db.get_used_channel_public_key_ids(self.account, [key.address for key in keys])
+            for key in keys:
+                self.cache[key.address] = key
+                if key.address not in used:
+                    return key
+                self.last_known += 1
+            batch_size = min(batch_size * 2, self.lookahead)
 
     def get_private_key_from_pubkey_hash(self, pubkey_hash) -> PrivateKey:
         return self.cache.get(pubkey_hash)
@@ -121,6 +131,9 @@ class AddressManager:
     def get_private_key(self, index: int) -> PrivateKey:
         raise NotImplementedError
 
+    def get_private_keys(self, indexes: Iterable[int]) -> List[PrivateKey]:
+        raise NotImplementedError
+
     def get_public_key(self, index: int) -> PublicKey:
         raise NotImplementedError
 
@@ -151,6 +164,8 @@ class HierarchicalDeterministic(AddressManager):
 
     name: str = "deterministic-chain"
 
+    DERIVATION_BATCH_SIZE = 1000  # keys derived per worker task when generating large ranges
+
     __slots__ = 'gap', 'maximum_uses_per_address'
 
     def __init__(self, account: 'Account', chain: int, gap: int, maximum_uses_per_address: int) -> None:
@@ -175,20 +190,15 @@ class HierarchicalDeterministic(AddressManager):
     def get_private_key(self, index: int) -> PrivateKey:
         return self.account.private_key.child(self.chain_number).child(index)
 
+    def get_private_keys(self, indexes: Iterable[int]) -> List[PrivateKey]:
+        chain_key = self.account.private_key.child(self.chain_number)
+        return [chain_key.child(index) for index in indexes]
+
     def get_public_key(self, index: int) -> PublicKey:
         return self.account.public_key.child(self.chain_number).child(index)
 
     async def get_max_gap(self) -> int:
-        addresses = await self._query_addresses(order_by="n asc")
-        max_gap = 0
-        current_gap = 0
-        for address in addresses:
-            if address['used_times'] == 0:
-                current_gap += 1
-            else:
-                max_gap = max(max_gap, current_gap)
-                current_gap = 0
-        return max_gap
+        return await self.account.ledger.db.get_max_gap(self.account.id, self.chain_number)
 
     async def ensure_address_gap(self) -> List[str]:
         async with self.address_generator_lock:
@@ -213,7 +223,16 @@ class HierarchicalDeterministic(AddressManager):
     async def _generate_keys(self, start: int, end: int) -> List[str]:
         if not self.address_generator_lock.locked():
             raise RuntimeError('Should not be called outside of address_generator_lock.')
-        keys = [self.public_key.child(index) for index in range(start, end+1)]
+        if end - start < self.DERIVATION_BATCH_SIZE:
+            keys = self.public_key.children(start, end)
+        else:
+            loop = asyncio.get_running_loop()
+            batches = await asyncio.gather(*(
+                loop.run_in_executor(
+                    None, self.public_key.children, batch, min(batch + self.DERIVATION_BATCH_SIZE - 1, end)
+                ) for batch in range(start, end + 1, self.DERIVATION_BATCH_SIZE)
+            ))
+            keys = [key for batch in batches for key in batch]
         await self.account.ledger.db.add_keys(self.account, self.chain_number, keys)
         return [key.address for key in keys]
 
@@ -244,6 +263,9 @@ class SingleKey(AddressManager):
     def get_private_key(self, index: int) -> PrivateKey:
         return self.account.private_key
 
+    def get_private_keys(self, indexes: Iterable[int]) -> List[PrivateKey]:
+        return [self.account.private_key for _ in indexes]
+
     def get_public_key(self, index: int) -> PublicKey:
         return self.account.public_key
 
@@ -377,7 +399,7 @@ class Account:
             'modified_on': self.modified_on
         }
         if include_channel_keys:
-            d['certificates'] = self.channel_keys
+            d['certificates'] = dict(self.channel_keys)
         return d
 
     def merge(self, d: dict):
@@ -489,6 +511,10 @@ class Account:
         assert not self.encrypted, "Cannot get private key on encrypted wallet account."
         return self.address_managers[chain].get_private_key(index)
 
+    def get_private_keys(self, chain: int, indexes: Iterable[int]) -> List[PrivateKey]:
+        assert not self.encrypted, "Cannot get private key on encrypted wallet account."
+        return self.address_managers[chain].get_private_keys(indexes)
+
     def get_public_key(self, chain: int, index: int) -> PublicKey:
         return self.address_managers[chain].get_public_key(index)
 
@@ -1,3 +1,5 @@
+from typing import List
+
 from asn1crypto.keys import PrivateKeyInfo, ECPrivateKey
 from coincurve import PublicKey as cPublicKey, PrivateKey as cPrivateKey
 from coincurve.utils import (
@@ -130,6 +132,20 @@ class PublicKey(_KeyBase):
         derived_key = self.verifying_key.add(L_b)
         return PublicKey(self.ledger, derived_key, R_b, n, self.depth + 1, self)
 
+    def children(self, start: int, end: int) -> List['PublicKey']:
+        """ Return the derived child extended pubkeys from index START to END inclusive,
+            with their addresses already computed. """
+        if not 0 <= start <= end < (1 << 31):
+            raise ValueError('invalid BIP32 public key child number')
+        pubkey_bytes, add, depth = self.pubkey_bytes, self.verifying_key.add, self.depth + 1
+        children = []
+        for n in range(start, end + 1):
+            L_b, R_b = self._hmac_sha512(pubkey_bytes + n.to_bytes(4, 'big'))  # pylint: disable=invalid-name
+            child = PublicKey(self.ledger, add(L_b), R_b, n, depth, self)
+            child.address  # pylint: disable=pointless-statement
+            children.append(child)
+        return children
+
     def identifier(self):
         """ Return the key's identifier as 20 bytes. """
         return hash160(self.pubkey_bytes)
@@ -0,0 +1,263 @@
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import TYPE_CHECKING, List, Iterable, Dict
+
+from lbry.error import InsufficientFundsError
+from lbry.wallet.constants import COIN, NULL_HASH32, DUST
+from lbry.wallet.rpc import RPCError
+from lbry.wallet.transaction import Transaction, Output, Input
+
+if TYPE_CHECKING:
+    from lbry.wallet.ledger import Ledger
+    from lbry.wallet.account import Account
+
+log = logging.getLogger(__name__)
+
+
+class BulkProgress:
+
+    __slots__ = 'planned', 'signed', 'broadcast', 'failed', 'started'
+
+    def __init__(self):
+        self.planned = 0
+        self.signed = 0
+        self.broadcast = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        """ Transactions broadcast per second. """
+        elapsed = self.elapsed
+        return self.broadcast / elapsed if elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'planned': self.planned,
+            'signed': self.signed,
+            'broadcast': self.broadcast,
+            'failed': self.failed,
+            'elapsed': round(self.elapsed, 3),
+            'rate': round(self.rate, 3),
+        }
+
+    def __str__(self):
+        return (
+            f"{self.broadcast}/{self.planned} transactions broadcast, {self.failed} failed "
+            f"in {self.elapsed:.1f}s ({self.rate:.1f}/s)"
+        )
+
+
+class BulkSpend:
+    """
+    Builds, signs and broadcasts many transactions at once, for consolidating lots of outputs or
+    paying lots of addresses.
+
+    All of the transactions are planned from a single reservation of utxos and signed concurrently.
+    When paying, each batch of outputs is funded by a utxo of its own if one is available; batches
+    left over are funded from the outputs of a single fan-out transaction, so chains of unconfirmed
+    change never get deeper than one. Broadcasts go through a queue worked by several tasks,
+    connection errors are retried and a transaction waits for the one whose output it spends.
+    """
+
+    BROADCAST_WORKERS = 10
+    BROADCAST_RETRIES = 3
+    RETRY_DELAY = 1.0  # seconds, doubled after every attempt
+    PROGRESS_INTERVAL = 5.0  # seconds between progress log lines
+    ALREADY_BROADCAST = ('already have transaction', 'txn-already')
+
+    def __init__(self, ledger: 'Ledger', funding_accounts: Iterable['Account'], change_account: 'Account',
+                 batch_size: int = 100):
+        self.ledger = ledger
+        self.funding_accounts = list(funding_accounts)
+        self.change_account = change_account
+        self.batch_size = batch_size
+        self.progress = BulkProgress()
+        self._last_report = 0.0
+
+    @property
+    def cost_of_change(self) -> int:
+        return Output.pay_pubkey_hash(COIN, NULL_HASH32).get_fee(self.ledger)
+
+    @property
+    def cost_of_funding(self) -> int:
+        """ Fee for a fan-out output plus the fee for spending it. """
+        funding = Output.pay_pubkey_hash(COIN, NULL_HASH32)
+        Transaction().add_outputs([funding])
+        return funding.get_fee(self.ledger) + Input.spend(funding).get_fee(self.ledger)
+
+    async def _get_change_hash160(self) -> bytes:
+        address = await self.change_account.change.get_or_create_usable_address()
+        return self.ledger.address_to_hash160(address)
+
+    async def _add_change(self, tx: Transaction, change: int):
+        change_amount = change - self.cost_of_change
+        if change_amount > DUST:
+            tx.add_outputs([Output.pay_pubkey_hash(change_amount, await self._get_change_hash160())])
+
+    def _get_cost(self, tx: Transaction) -> int:
+        return tx.get_base_fee(self.ledger) + tx.get_total_output_sum(self.ledger)
+
+    async def release(self, txs: Iterable[Transaction]):
+        await self.ledger.release_outputs([txi.txo_ref.txo for tx in txs for txi in tx.inputs])
+
+    async def consolidate(self, txos: List[Output]) -> List[Transaction]:
+        """ Signed transactions spending txos in batches, each sending its total less fees back as change. """
+        await self.ledger.reserve_outputs(txos)
+        txs = []
+        try:
+            for i in range(0, len(txos), self.batch_size):
+                inputs = [Input.spend(txo) for txo in txos[i:i + self.batch_size]]
+                tx = Transaction().add_inputs(inputs)
+                change = tx.get_effective_input_sum(self.ledger) - self._get_cost(tx)
+                if change - self.cost_of_change > DUST:
+                    await self._add_change(tx, change)
+                else:
+                    # these are worth less than the fee for spending them, let coin selection top them up
+                    tx = await Transaction.create(
+                        inputs, [], self.funding_accounts, self.change_account, sign=False
+                    )
+                txs.append(tx)
+            self.progress.planned += len(txs)
+            await self._sign(txs)
+        except:
+            await self.ledger.release_outputs(txos)
+            await self.release(txs)
+            raise
+        return txs
+
+    async def pay(self, outputs: List[Output]) -> List[Transaction]:
+        """ Signed transactions paying outputs in batches, funded from one reservation of utxos. """
+        txs = [
+            Transaction().add_outputs(outputs[i:i + self.batch_size])
+            for i in range(0, len(outputs), self.batch_size)
+        ]
+        costs = [self._get_cost(tx) for tx in txs]
+        # enough to fund every batch from the fan-out transaction, if it comes to that
+        fan_out_cost = self._get_cost(Transaction()) + self.cost_of_change
+        reserve = [cost + self.cost_of_funding for cost in costs]
+        spendables = await self.ledger.get_spendable_utxos(
+            sum(reserve) + fan_out_cost, self.funding_accounts
+        )
+        if not spendables:
+            raise InsufficientFundsError()
+        try:
+            spendables.sort(key=lambda s: s.effective_amount)
+            amounts = [s.effective_amount for s in spendables]
+            available, committed, remaining = sum(amounts), 0, sum(reserve)
+            unfunded = []
+            for tx, cost, reserved in zip(txs, costs, reserve):
+                remaining -= reserved
+                i = bisect_left(amounts, cost)
+                # fund it directly unless that leaves too little to fan-out to the other batches
+                needed = committed + remaining
+                if i < len(amounts) and available - amounts[i] >= (needed + fan_out_cost if needed else 0):
+                    spendable = spendables.pop(i)
+                    available -= amounts.pop(i)
+                    tx.add_inputs([spendable.txi])
+                    await self._add_change(tx, spendable.effective_amount - cost)
+                else:
+                    committed += reserved
+                    unfunded.append((tx, cost))
+            if unfunded:
+                fan_out = await self._fan_out(spendables, unfunded)
+                self.progress.planned += 1
+                # the batches it funds can only be signed once its txid is final
+                await self._sign([fan_out])
+            elif spendables:
+                await self.ledger.release_outputs([s.txo for s in spendables])
+            self.progress.planned += len(txs)
+            await self._sign(txs)
+        except:
+            await self.release(txs)
+            await self.ledger.release_outputs([s.txo for s in spendables])
+            raise
+        return [fan_out] + txs if unfunded else txs
+
+    async def _fan_out(self, spendables, unfunded) -> Transaction:
+        change_hash160 = await self._get_change_hash160()
+        fan_out = Transaction().add_inputs(s.txi for s in spendables)
+        funding_outputs = []
+        for tx, cost in unfunded:
+            funding = Output.pay_pubkey_hash(0, change_hash160)
+            fan_out.add_outputs([funding])
+            funding.amount = cost + Input.spend(funding).get_fee(self.ledger)
+            funding_outputs.append(funding)
+        change = fan_out.get_effective_input_sum(self.ledger) - self._get_cost(fan_out)
+        if change < 0:
+            raise InsufficientFundsError()
+        await self._add_change(fan_out, change)
+        for (tx, _), funding in zip(unfunded, funding_outputs):
+            tx.add_inputs([Input.spend(funding)])
+        return fan_out
+
+    async def _sign(self, txs: List[Transaction]):
+        async def sign(tx):
+            await tx.sign(self.funding_accounts)
+            self.progress.signed += 1
+        await asyncio.gather(*(sign(tx) for tx in txs))
+
+    async def _broadcast(self, tx: Transaction):
+        for attempt in range(self.BROADCAST_RETRIES + 1):
+            try:
+                return await self.ledger.broadcast(tx)
+            except RPCError as err:
+                if any(message in str(err) for message in self.ALREADY_BROADCAST):
+                    return None
+                raise
+            except (ConnectionError, asyncio.TimeoutError) as err:
+                if attempt == self.BROADCAST_RETRIES:
+                    raise
+                delay = self.RETRY_DELAY * 2 ** attempt
+                log.warning("broadcast of %s failed (%s), retrying in %.1fs", tx.id, err, delay)
+                await asyncio.sleep(delay)
+
+    def _report(self):
+        now = time.perf_counter()
+        if now - self._last_report >= self.PROGRESS_INTERVAL:
+            self._last_report = now
+            log.info("bulk spend: %s", self.progress)
+
+    async def broadcast(self, txs: List[Transaction], blocking=False):
+        """
+        Broadcast txs in order, releasing the inputs of those that fail along with any spending their outputs.
+        Raises the first error once every transaction was attempted.
+        """
+        loop = asyncio.get_running_loop()
+        broadcast: Dict[str, asyncio.Future] = {tx.id: loop.create_future() for tx in txs}
+        queue = asyncio.Queue()
+        for tx in txs:
+            queue.put_nowait(tx)
+        errors = []
+
+        async def worker():
+            while not queue.empty():
+                tx = queue.get_nowait()
+                try:
+                    for txi in tx.inputs:
+                        parent = broadcast.get(txi.txo_ref.tx_ref.id)
+                        if parent is not None and not await parent:
+                            raise Exception(f"Transaction {txi.txo_ref.tx_ref.id} spent by {tx.id} was not broadcast.")
+                    await self._broadcast(tx)
+                except Exception as err:  # pylint: disable=broad-except
+                    errors.append(err)
+                    self.progress.failed += 1
+                    await self.ledger.release_tx(tx)
+                    broadcast[tx.id].set_result(False)
+                else:
+                    self.progress.broadcast += 1
+                    broadcast[tx.id].set_result(True)
+                self._report()
+
+        await asyncio.gather(*(worker() for _ in range(min(self.BROADCAST_WORKERS, len(txs)))))
+        log.info("bulk spend finished: %s", self.progress)
+        if errors:
+            raise errors[0]
+        if blocking:
+            await asyncio.gather(*(self.ledger.wait(tx, timeout=None) for tx in txs))
@@ -4,10 +4,9 @@ import asyncio
 import sqlite3
 import platform
 from binascii import hexlify
-from collections import defaultdict
 from dataclasses import dataclass
 from contextvars import ContextVar
-from typing import Tuple, List, Union, Callable, Any, Awaitable, Iterable, Dict, Optional
+from typing import Tuple, List, Union, Callable, Any, Awaitable, Iterable, Dict, Optional, Set
 from datetime import date
 
 from prometheus_client import Gauge, Counter, Histogram
@@ -16,6 +15,7 @@ from lbry.utils import LockWithMetrics
 from .bip32 import PublicKey
 from .transaction import Transaction, Output, OutputScript, TXRefImmutable, Input
 from .constants import TXO_TYPES, CLAIM_TYPES
+from ..crypto.hash import sha256
 from .util import date_to_julian_day
 
 from concurrent.futures.thread import ThreadPoolExecutor  # pylint: disable=wrong-import-order
@@ -447,8 +447,25 @@ class SQLiteMixin:
                     version = await self.db.execute_fetchone("SELECT version FROM version LIMIT 1;")
                     if version == (self.SCHEMA_VERSION,):
                         return
-                    if version == ("1.5",) and self.SCHEMA_VERSION == "1.6":
-                        await self.db.execute("ALTER TABLE txo ADD COLUMN has_source bool DEFAULT 1;")
+                    if version in (("1.5",), ("1.6",), ("1.7",), ("1.8",), ("1.9",)) and self.SCHEMA_VERSION == "1.10":
+                        if version == ("1.5",):
+                            await self.db.execute("ALTER TABLE txo ADD COLUMN has_source bool DEFAULT 1;")
+                        txo_columns = {row[1] for row in await self.db.execute_fetchall("PRAGMA table_info(txo);")}
+                        if 'spend_size' not in txo_columns:
+                            await self.db.execute("ALTER TABLE txo ADD COLUMN script_type text;")
+                            await self.db.execute("ALTER TABLE txo ADD COLUMN spend_size integer;")
+                            await self.db.run(fill_txo_spend_columns)
+                        if 'public_key_id' not in txo_columns:
+                            await self.db.execute("ALTER TABLE txo ADD COLUMN public_key_id text;")
+                            await self.db.run(fill_txo_public_key_ids, self.ledger)
+                        address_columns = {
+                            row[1] for row in await self.db.execute_fetchall("PRAGMA table_info(pubkey_address);")
+                        }
+                        if 'status' not in address_columns:
+                            await self.db.execute("ALTER TABLE pubkey_address ADD COLUMN status text;")
+                        await self.db.executescript(self.CREATE_TABLES_QUERY)
+                        if 'history' in address_columns:
+                            await self.db.run(fill_address_history)
                         await self.db.execute("UPDATE version SET version = ?", (self.SCHEMA_VERSION,))
                         return
                 await self.db.executescript('\n'.join(
@@ -502,102 +519,150 @@ def dict_row_factory(cursor, row):
 SQLITE_MAX_INTEGER = 9223372036854775807
 
 
-def _get_spendable_utxos(transaction: sqlite3.Connection, accounts: List, decoded_transactions: Dict[str, Transaction],
-                         result: Dict[Tuple[bytes, int, bool], List[int]], reserved: List[Transaction],
-                         amount_to_reserve: int, reserved_amount: int, floor: int, ceiling: int,
-                         fee_per_byte: int) -> int:
-    accounts_fmt = ",".join(["?"] * len(accounts))
-    txo_query = """
-        SELECT tx.txid, txo.txoid, tx.raw, tx.height, txo.position as nout, tx.is_verified, txo.amount FROM txo
-        INNER JOIN account_address USING (address)
-        LEFT JOIN txi USING (txoid)
-        INNER JOIN tx USING (txid)
-        WHERE txo.txo_type=0 AND txi.txoid IS NULL AND tx.txid IS NOT NULL AND NOT txo.is_reserved
-        AND txo.amount >= ? AND txo.amount < ?
-    """
-    if accounts:
-        txo_query += f"""
-            AND account_address.account {'= ?' if len(accounts_fmt) == 1 else 'IN (' + accounts_fmt + ')'}
-        """
-    txo_query += """
-        ORDER BY txo.amount ASC, tx.height DESC
-    """
-    # prefer confirmed, but save unconfirmed utxos from this selection in case they are needed
-    unconfirmed = []
-    for row in transaction.execute(txo_query, (floor, ceiling, *accounts)):
-        (txid, txoid, raw, height, nout, verified, amount) = row.values()
-        # verified or non verified transactions were found- reset the gap count
-        # multiple txos can come from the same tx, only decode it once and cache
-        if txid not in decoded_transactions:
-            # cache the decoded transaction
-            decoded_transactions[txid] = Transaction(raw)
-        decoded_tx = decoded_transactions[txid]
-        # save the unconfirmed txo for possible use later, if still needed
-        if verified:
-            # add the txo to the reservation, minus the fee for including it
-            reserved_amount += amount
-            reserved_amount -= Input.spend(decoded_tx.outputs[nout]).size * fee_per_byte
-            # mark it as reserved
-            result[(raw, height, verified)].append(nout)
-            reserved.append(txoid)
-            # if we've reserved enough, return
-            if reserved_amount >= amount_to_reserve:
-                return reserved_amount
-        else:
-            unconfirmed.append((txid, txoid, raw, height, nout, verified, amount))
-    # we're popping the items, so to get them in the order they were seen they are reversed
-    unconfirmed.reverse()
-    # add available unconfirmed txos if any were previously found
-    while unconfirmed and reserved_amount < amount_to_reserve:
-        (txid, txoid, raw, height, nout, verified, amount) = unconfirmed.pop()
-        # it's already decoded
-        decoded_tx = decoded_transactions[txid]
-        # add to the reserved amount
-        reserved_amount += amount
-        reserved_amount -= Input.spend(decoded_tx.outputs[nout]).size * fee_per_byte
-        result[(raw, height, verified)].append(nout)
-        reserved.append(txoid)
-    return reserved_amount
+def get_spend_size(txo: Output) -> Optional[int]:
+    """ Size of the input spending this output, None if the coin selection can't spend it. """
+    if txo.script.is_pay_pubkey_hash:
+        return Input.spend(txo).size
+    return None
+
+
+def fill_txo_spend_columns(transaction: sqlite3.Connection):
+    """ Sets the script type and spend size of outputs saved before they were stored, from their scripts. """
+    cursor = transaction.cursor()
+    cursor.row_factory = None
+    updates = []
+    rows = cursor.execute("SELECT txid, txoid, position, amount, script FROM txo")
+    for txid, txoid, position, amount, script in rows:
+        txo = Output(amount, OutputScript(script), TXRefImmutable.from_id(txid, -1), position)
+        updates.append((txo.script.template.name, get_spend_size(txo), txoid))
+    transaction.executemany("UPDATE txo SET script_type = ?, spend_size = ? WHERE txoid = ?", updates).fetchall()
+
+
+def fill_txo_public_key_ids(transaction: sqlite3.Connection, ledger):
+    """ Sets the public key id of channels saved before it was stored, from their claims. """
+    cursor = transaction.cursor()
+    cursor.row_factory = None
+    updates = []
+    rows = cursor.execute("SELECT txid, txoid, position, amount, script FROM txo WHERE txo_type = ?",
+                          (TXO_TYPES['channel'],))
+    for txid, txoid, position, amount, script in rows:
+        txo = Output(amount, OutputScript(script), TXRefImmutable.from_id(txid, -1), position)
+        if txo.can_decode_claim and txo.claim.is_channel:
+            updates.append((ledger.public_key_to_address(txo.claim.channel.public_key_bytes), txoid))
+    transaction.executemany("UPDATE txo SET public_key_id = ? WHERE txoid = ?", updates).fetchall()
+
+
+def get_address_status(history: List[Tuple[str, int]]) -> Optional[str]:
+    """ Status of an address with this (txid, height) history, as the hub computes it. """
+    if not history:
+        return None
+    return hexlify(sha256(''.join(f'{txid}:{height}:' for txid, height in history).encode())).decode()
+
+
+def fill_address_history(transaction: sqlite3.Connection):
+    """ Moves histories saved as "txid:height:" strings into address_history rows and sets their status. """
+    cursor = transaction.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute("SELECT address, history FROM pubkey_address WHERE history != ''").fetchall()
+    for address, history in rows:
+        parts = history.split(':')[:-1]
+        transaction.executemany(
+            "INSERT OR REPLACE INTO address_history (address, position, txid, height) VALUES (?, ?, ?, ?)",
+            ((address, position, txid, int(height)) for position, (txid, height)
+             in enumerate(zip(parts[0::2], parts[1::2])))
+        ).fetchall()
+        transaction.execute(
+            "UPDATE pubkey_address SET status = ? WHERE address = ?",
+            (hexlify(sha256(history.encode())).decode(), address)
+        ).fetchall()
+    transaction.execute("UPDATE pubkey_address SET history = NULL").fetchall()
+
+
+SPENDABLE_UTXOS_QUERY = """
+    SELECT txo.txid, txo.txoid, txo.position, txo.amount, txo.script, txo.spend_size, tx.height, tx.is_verified
+    FROM txo INDEXED BY txo_spendable_idx
+    INNER JOIN account_address USING (address)
+    INNER JOIN tx INDEXED BY tx_height_idx USING (txid)
+    WHERE txo.txo_type = 0 AND txo.is_reserved = 0 AND txo.spend_size IS NOT NULL AND txo.amount >= ?
+    AND NOT EXISTS (SELECT 1 FROM txi WHERE txi.txoid = txo.txoid) {accounts}
+    ORDER BY txo.amount ASC, tx.height DESC
+"""
 
 
 def get_and_reserve_spendable_utxos(transaction: sqlite3.Connection, accounts: List, amount_to_reserve: int, floor: int,
                                     fee_per_byte: int, set_reserved: bool, return_insufficient_funds: bool,
-                                    base_multiplier: int = 100):
-    txs = defaultdict(list)
-    decoded_transactions = {}
-    reserved = []
+                                    base_multiplier: int = 100) -> List[Tuple[str, int, int, bytes, int]]:
+    """
+    Picks the utxos to fund amount_to_reserve, smallest first, with one pass over the spendable outputs index.
 
+    Outputs are taken in windows of amounts growing from the floor by base_multiplier. Within a window
+    confirmed outputs are preferred, unconfirmed ones are only used when the confirmed ones don't cover the
+    amount. A window with nothing spendable squares the multiplier of the next one, after five empty
+    windows in a row the search gives up.
+    """
+    txo_query = SPENDABLE_UTXOS_QUERY.format(
+        accounts=f"AND account_address.account IN ({','.join('?' * len(accounts))})" if accounts else ""
+    )
+    selected, reserved = [], []
     reserved_dewies = 0
-    multiplier = base_multiplier
-    gap_count = 0
-
-    while reserved_dewies < amount_to_reserve and gap_count < 5 and floor * multiplier < SQLITE_MAX_INTEGER:
-        previous_reserved_dewies = reserved_dewies
-        reserved_dewies = _get_spendable_utxos(
-            transaction, accounts, decoded_transactions, txs, reserved, amount_to_reserve, reserved_dewies,
-            floor, floor * multiplier, fee_per_byte
-        )
-        floor *= multiplier
-        if previous_reserved_dewies == reserved_dewies:
-            gap_count += 1
-            multiplier **= 2
-        else:
-            gap_count = 0
-            multiplier = base_multiplier
+
+    def reserve(txid, txoid, position, amount, script, spend_size, height):
+        nonlocal reserved_dewies
+        # add the txo to the reservation, minus the fee for including it
+        reserved_dewies += amount - spend_size * fee_per_byte
+        selected.append((txid, position, amount, script, height))
+        reserved.append(txoid)
+        return reserved_dewies >= amount_to_reserve
+
+    def reserve_unconfirmed():
+        # add the unconfirmed txos of the window being left, if still needed
+        while unconfirmed and reserved_dewies < amount_to_reserve:
+            reserve(*unconfirmed.pop(0))
+        unconfirmed.clear()
+
+    # prefer confirmed, but save unconfirmed utxos from the current window in case they are needed
+    unconfirmed = []
+    multiplier, gap_count = base_multiplier, 0
+    ceiling = floor * multiplier
+    window_start_dewies = 0
+    if ceiling < SQLITE_MAX_INTEGER:
+        rows = transaction.execute(txo_query, (floor, *accounts))
+        for row in rows:
+            txid, txoid, position, amount, script, spend_size, height, verified = row.values()
+            while amount >= ceiling and reserved_dewies < amount_to_reserve:
+                reserve_unconfirmed()
+                if window_start_dewies == reserved_dewies:
+                    gap_count += 1
+                    multiplier **= 2
+                else:
+                    gap_count = 0
+                    multiplier = base_multiplier
+                ceiling *= multiplier
+                window_start_dewies = reserved_dewies
+                if gap_count >= 5 or ceiling >= SQLITE_MAX_INTEGER:
+                    break
+            if reserved_dewies >= amount_to_reserve or amount >= ceiling:
+                break
+            if not verified:
+                unconfirmed.append((txid, txoid, position, amount, script, spend_size, height))
+            elif reserve(txid, txoid, position, amount, script, spend_size, height):
+                break
+        rows.close()
+        reserve_unconfirmed()
 
     # reserve the accumulated txos if enough were found
     if reserved_dewies >= amount_to_reserve:
         if set_reserved:
             transaction.executemany("UPDATE txo SET is_reserved = ? WHERE txoid = ?",
                                     [(True, txoid) for txoid in reserved]).fetchall()
-        return txs
+        return selected
     # return_insufficient_funds and set_reserved are used for testing
-    return txs if return_insufficient_funds else {}
+    return selected if return_insufficient_funds else []
 
 
 class Database(SQLiteMixin):
 
-    SCHEMA_VERSION = "1.6"
+    SCHEMA_VERSION = "1.10"
 
     PRAGMAS = """
         pragma journal_mode=WAL;
@@ -620,11 +685,31 @@ class Database(SQLiteMixin):
     CREATE_PUBKEY_ADDRESS_TABLE = """
         create table if not exists pubkey_address (
             address text primary key,
-            history text,
+            status text,
             used_times integer not null default 0
         );
     """
 
+    CREATE_ADDRESS_HISTORY_TABLE = """
+        create table if not exists address_history (
+            address text not null,
+            position integer not null,
+            txid text not null,
+            height integer not null,
+            primary key (address, position)
+        ) without rowid;
+    """
+
+    CREATE_ADDRESS_GAP_TABLE = """
+        create table if not exists address_gap (
+            account text not null,
+            chain integer not null,
+            max_gap integer not null,
+            last_used integer not null,
+            primary key (account, chain)
+        );
+    """
+
     CREATE_TX_TABLE = """
         create table if not exists tx (
             txid text primary key,
@@ -636,6 +721,7 @@ class Database(SQLiteMixin):
             day integer
         );
         create index if not exists tx_purchased_claim_id_idx on tx (purchased_claim_id);
+        create index if not exists tx_height_idx on tx (txid, height, is_verified);
     """
 
     CREATE_TXO_TABLE = """
@@ -647,6 +733,8 @@ class Database(SQLiteMixin):
             amount integer not null,
             script blob not null,
             is_reserved boolean not null default 0,
+            script_type text,
+            spend_size integer,
 
             txo_type integer not null default 0,
             claim_id text,
@@ -654,7 +742,8 @@ class Database(SQLiteMixin):
             has_source bool,
 
             channel_id text,
-            reposted_claim_id text
+            reposted_claim_id text,
+            public_key_id text
         );
         create index if not exists txo_txid_idx on txo (txid);
         create index if not exists txo_address_idx on txo (address);
@@ -663,6 +752,10 @@ class Database(SQLiteMixin):
         create index if not exists txo_txo_type_idx on txo (txo_type);
         create index if not exists txo_channel_id_idx on txo (channel_id);
         create index if not exists txo_reposted_claim_idx on txo (reposted_claim_id);
+        create index if not exists txo_public_key_id_idx on txo (public_key_id) where public_key_id is not null;
+        create index if not exists txo_spendable_idx on txo (
+            amount, address, txoid, txid, position, script, spend_size, txo_type, is_reserved
+        ) where txo_type = 0 and is_reserved = 0 and spend_size is not null;
     """
 
     CREATE_TXI_TABLE = """
@@ -680,6 +773,8 @@ class Database(SQLiteMixin):
         PRAGMAS +
         CREATE_ACCOUNT_TABLE +
         CREATE_PUBKEY_ADDRESS_TABLE +
+        CREATE_ADDRESS_HISTORY_TABLE +
+        CREATE_ADDRESS_GAP_TABLE +
         CREATE_TX_TABLE +
         CREATE_TXO_TABLE +
         CREATE_TXI_TABLE
@@ -697,6 +792,8 @@ class Database(SQLiteMixin):
             'position': txo.position,
             'amount': txo.amount,
             'script': sqlite3.Binary(txo.script.source),
+            'script_type': txo.script.template.name,
+            'spend_size': get_spend_size(txo),
             'has_source': False,
         }
         if txo.is_claim:
@@ -708,6 +805,8 @@ class Database(SQLiteMixin):
                     row['has_source'] = True
                 if claim.is_signed:
                     row['channel_id'] = claim.signing_channel_id
+                if claim.is_channel:
+                    row['public_key_id'] = self.ledger.public_key_to_address(claim.channel.public_key_bytes)
                 if claim.is_stream:
                     row['has_source'] = claim.stream.has_source
             else:
@@ -775,19 +874,14 @@ class Database(SQLiteMixin):
                     "txo", self.txo_to_row(tx, txo), ignore_duplicate=True
                 )).fetchall()
 
-    def save_transaction_io(self, tx: Transaction, address, txhash, history):
-        return self.save_transaction_io_batch([tx], address, txhash, history)
+    def save_transaction_io(self, tx: Transaction, address, txhash):
+        return self.save_transaction_io_batch([tx], address, txhash)
 
-    def save_transaction_io_batch(self, txs: Iterable[Transaction], address, txhash, history):
-        history_count = history.count(':') // 2
+    def save_transaction_io_batch(self, txs: Iterable[Transaction], address, txhash):
 
         def __many(conn):
             for tx in txs:
                 self._transaction_io(conn, tx, address, txhash)
-            conn.execute(
-                "UPDATE pubkey_address SET history = ?, used_times = ? WHERE address = ?",
-                (history, history_count, address)
-            ).fetchall()
 
         return self.db.run(__many)
 
@@ -811,12 +905,13 @@ class Database(SQLiteMixin):
             get_and_reserve_spendable_utxos, tuple(account.id for account in accounts), reserve_amount, min_amount,
             fee_per_byte, set_reserved, return_insufficient_funds
         )
-        txos = []
-        for (raw, height, verified), positions in to_spend.items():
-            tx = Transaction(raw, height=height, is_verified=verified)
-            for nout in positions:
-                txos.append(tx.outputs[nout].get_estimator(ledger))
-        return txos
+        return [
+            Output(
+                amount=amount, script=OutputScript(script),
+                tx_ref=TXRefImmutable.from_id(txid, height), position=position
+            ).get_estimator(ledger)
+            for txid, position, amount, script, height in to_spend
+        ]
 
     async def select_transactions(self, cols, accounts=None, read_only=False, **constraints):
         if not {'txid', 'txid__in'}.intersection(constraints):
@@ -1198,7 +1293,7 @@ class Database(SQLiteMixin):
 
     async def get_addresses(self, cols=None, read_only=False, **constraints):
         cols = cols or (
-            'address', 'account', 'chain', 'history', 'used_times',
+            'address', 'account', 'chain', 'status', 'used_times',
             'pubkey', 'chain_code', 'n', 'depth'
         )
         addresses = await self.select_addresses(', '.join(cols), read_only=read_only, **constraints)
@@ -1220,6 +1315,27 @@ class Database(SQLiteMixin):
         if addresses:
             return addresses[0]
 
+    async def get_max_gap(self, account_id, chain):
+        """ Largest run of unused addresses followed by a used one, tracked incrementally in address_gap. """
+        def __get(conn):
+            gap = conn.execute(
+                "SELECT max_gap FROM address_gap WHERE account = ? AND chain = ?", (account_id, chain)
+            ).fetchone()
+            if gap is not None:
+                return gap['max_gap']
+            max_gap, last_used = 0, -1
+            for used in conn.execute(
+                    "SELECT n FROM account_address JOIN pubkey_address USING (address) "
+                    "WHERE account = ? AND chain = ? AND used_times > 0 ORDER BY n", (account_id, chain)
+            ).fetchall():
+                max_gap, last_used = max(max_gap, used['n'] - last_used - 1), used['n']
+            conn.execute(
+                "INSERT OR REPLACE INTO address_gap (account, chain, max_gap, last_used) VALUES (?, ?, ?, ?)",
+                (account_id, chain, max_gap, last_used)
+            )
+            return max_gap
+        return await self.db.run(__get)
+
     async def add_keys(self, account, chain, pubkeys):
         await self.db.executemany(
             "insert or ignore into account_address "
@@ -1236,26 +1352,88 @@ class Database(SQLiteMixin):
             ((pubkey.address,) for pubkey in pubkeys)
         )
 
-    async def _set_address_history(self, address, history):
-        await self.db.execute_fetchall(
-            "UPDATE pubkey_address SET history = ?, used_times = ? WHERE address = ?",
-            (history, history.count(':')//2, address)
-        )
+    @staticmethod
+    def _update_address_history(conn, address, history: List[Tuple[str, int]]) -> Optional[str]:
+        previous = conn.execute(
+            "SELECT used_times FROM pubkey_address WHERE address = ?", (address,)
+        ).fetchone()
+        # only the rows after the last one still in place are rewritten, usually just the newest transactions
+        unchanged = 0
+        for row in conn.execute(
+                "SELECT txid, height FROM address_history WHERE address = ? ORDER BY position", (address,)
+        ).fetchall():
+            if unchanged == len(history) or (row['txid'], row['height']) != tuple(history[unchanged]):
+                break
+            unchanged += 1
+        conn.execute(
+            "DELETE FROM address_history WHERE address = ? AND position >= ?", (address, unchanged)
+        ).fetchall()
+        conn.executemany(
+            "INSERT INTO address_history (address, position, txid, height) VALUES (?, ?, ?, ?)",
+            ((address, position, txid, height) for position, (txid, height)
+             in enumerate(history[unchanged:], start=unchanged))
+        ).fetchall()
+        status, used_times = get_address_status(history), len(history)
+        conn.execute(
+            "UPDATE pubkey_address SET status = ?, used_times = ? WHERE address = ?",
+            (status, used_times, address)
+        ).fetchall()
+        if previous is None or bool(previous['used_times']) == bool(used_times):
+            return status
+        for key in conn.execute(
+                "SELECT account, chain, n FROM account_address WHERE address = ?", (address,)
+        ).fetchall():
+            gap = conn.execute(
+                "SELECT max_gap, last_used FROM address_gap WHERE account = ? AND chain = ?",
+                (key['account'], key['chain'])
+            ).fetchone()
+            if gap is None:
+                continue
+            if used_times and key['n'] > gap['last_used']:
+                # newest used address, closes the gap after the previous one
+                conn.execute(
+                    "UPDATE address_gap SET max_gap = ?, last_used = ? WHERE account = ? AND chain = ?", (
+                        max(gap['max_gap'], key['n'] - gap['last_used'] - 1), key['n'],
+                        key['account'], key['chain']
+                    )
+                )
+            else:
+                # an older gap was split or an address became unused, recalculate on next read
+                conn.execute(
+                    "DELETE FROM address_gap WHERE account = ? AND chain = ?", (key['account'], key['chain'])
+                )
+        return status
 
-    async def set_address_history(self, address, history):
-        await self._set_address_history(address, history)
+    async def set_address_history(self, address, history: List[Tuple[str, int]]) -> Optional[str]:
+        """ Saves the (txid, height) history of an address and returns its new status. """
+        return await self.db.run(self._update_address_history, address, history)
 
-    async def is_channel_key_used(self, account, key: PublicKey):
-        channels = await self.get_txos(
-            accounts=[account], txo_type=TXO_TYPES['channel'],
-            no_tx=True, no_channel_info=True
-        )
-        other_key_bytes = key.pubkey_bytes
-        for channel in channels:
-            claim = channel.can_decode_claim
-            if claim and claim.channel.public_key_bytes == other_key_bytes:
-                return True
-        return False
+    async def get_address_history(self, address) -> List[Tuple[str, int]]:
+        return [(row['txid'], row['height']) for row in await self.db.execute_fetchall(
+            "SELECT txid, height FROM address_history WHERE address = ? ORDER BY position", (address,)
+        )]
+
+    async def get_address_statuses(self, addresses: List[str]) -> Dict[str, Optional[str]]:
+        statuses = {}
+        step = self.MAX_QUERY_VARIABLES
+        for offset in range(0, len(addresses), step):
+            statuses.update({row['address']: row['status'] for row in await self.db.execute_fetchall(*query(
+                "SELECT address, status FROM pubkey_address", address__in=addresses[offset:offset+step]
+            ))})
+        return statuses
+
+    async def get_used_channel_public_key_ids(self, account, public_key_ids: List[str]) -> Set[str]:
+        """ Which of these public key ids the account has channels for, looked up through the txo index. """
+        used = set()
+        step = self.MAX_QUERY_VARIABLES - 1
+        for offset in range(0, len(public_key_ids), step):
+            batch = public_key_ids[offset:offset+step]
+            used.update(row['public_key_id'] for row in await self.db.execute_fetchall(
+                f"SELECT DISTINCT public_key_id FROM txo JOIN account_address USING (address) "
+                f"WHERE account = ? AND public_key_id IN ({', '.join('?' * len(batch))})",
+                [account.public_key.address, *batch]
+            ))
+        return used
 
     @staticmethod
     def constrain_purchases(constraints):
@@ -12,7 +12,7 @@ from typing import Dict, Tuple, Type, Iterable, List, Optional, DefaultDict, Nam
 
 from lbry.schema.result import Outputs, INVALID, NOT_FOUND
 from lbry.schema.url import URL
-from lbry.crypto.hash import hash160, double_sha256, sha256
+from lbry.crypto.hash import hash160, double_sha256
 from lbry.crypto.base58 import Base58
 from lbry.utils import LRUCacheWithMetrics
 
@@ -28,6 +28,7 @@ from lbry.wallet.checkpoints import HASHES
 from lbry.wallet.constants import TXO_TYPES, CLAIM_TYPES, COIN, NULL_HASH32
 from lbry.wallet.bip32 import PublicKey, PrivateKey
 from lbry.wallet.coinselection import CoinSelector
+from lbry.wallet.signatures import SignatureVerifier
 
 log = logging.getLogger(__name__)
 
@@ -110,6 +111,10 @@ class Ledger(metaclass=LedgerRegistry):
 
     checkpoints = HASHES
 
+    headers_per_request = 2001
+    concurrent_header_requests = 4
+    max_reorg_depth = 100
+
     def __init__(self, config=None):
         self.config = config or {}
         self.db: Database = self.config.get('db') or Database(
@@ -154,8 +159,12 @@ class Ledger(metaclass=LedgerRegistry):
 
         self._on_ready_controller = StreamController()
         self.on_ready = self._on_ready_controller.stream
+        self._sync_state = 'stopped'
+        self._synced = asyncio.Event()
+        self._sync_error: Optional[Exception] = None
 
         self._tx_cache = LRUCacheWithMetrics(self.config.get("tx_cache_size", 1024), metric_name='tx')
+        self.signature_verifier = SignatureVerifier(self, self.config.get("signature_cache_size", 2 ** 14))
         self._update_tasks = TaskGroup()
         self._other_tasks = TaskGroup()  # that we dont need to start
         self._utxo_reservation_lock = asyncio.Lock()
@@ -226,6 +235,23 @@ class Ledger(metaclass=LedgerRegistry):
             return account.get_private_key(address_info['chain'], address_info['pubkey'].n)
         return None
 
+    async def get_private_keys_for_addresses(self, wallet, addresses: Iterable[str]) -> Dict[str, PrivateKey]:
+        """ Private keys of many addresses, found with one query and derived off the loop. """
+        accounts = {account.public_key.address: account for account in wallet.accounts}
+        indexes: DefaultDict[Tuple[str, int], Dict[str, int]] = defaultdict(dict)
+        for address_info in await self.db.get_addresses(
+                cols=('address', 'account', 'chain', 'n'), accounts=wallet.accounts, address__in=set(addresses)):
+            indexes[(address_info['account'], address_info['chain'])][address_info['address']] = address_info['n']
+        private_keys = {}
+        loop = asyncio.get_running_loop()
+        for (account_id, chain), chain_indexes in indexes.items():
+            keys = await loop.run_in_executor(
+                None, accounts[account_id].get_private_keys, chain, list(chain_indexes.values())
+            )
+            for address, private_key in zip(chain_indexes, keys):
+                private_keys.setdefault(address, private_key)
+        return private_keys
+
     async def get_public_key_for_address(self, wallet, address) -> Optional[PublicKey]:
         match = await self._get_account_and_address_info_for_address(wallet, address)
         if match:
@@ -304,15 +330,9 @@ class Ledger(metaclass=LedgerRegistry):
     def get_transaction_count(self, **constraints):
         return self.db.get_transaction_count(**constraints)
 
-    async def get_local_status_and_history(self, address, history=None):
-        if not history:
-            address_details = await self.db.get_address(address=address)
-            history = (address_details['history'] if address_details else '') or ''
-        parts = history.split(':')[:-1]
-        return (
-            hexlify(sha256(history.encode())).decode() if history else None,
-            list(zip(parts[0::2], map(int, parts[1::2])))
-        )
+    async def get_local_status_and_history(self, address):
+        local_status = (await self.db.get_address_statuses([address])).get(address)
+        return local_status, await self.db.get_address_history(address)
 
     @staticmethod
     def get_root_of_merkle_tree(branches, branch_positions, working_branch):
@@ -327,36 +347,77 @@ class Ledger(metaclass=LedgerRegistry):
         return hexlify(working_branch[::-1])
 
     async def start(self):
+        """
+        Opens the local database and headers and returns, the wallet can be read from and signed with from
+        here on. Connecting to a hub and syncing with it carries on in the background, see `sync_state`.
+        """
         if not os.path.exists(self.path):
             os.mkdir(self.path)
         await asyncio.wait(map(asyncio.create_task, [
             self.db.open(),
             self.headers.open()
         ]))
-        fully_synced = self.on_ready.first
-        asyncio.create_task(self.network.start())
-        await self.network.on_connected.first
-        async with self._header_processing_lock:
-            await self._update_tasks.add(self.initial_headers_sync())
-        self.network.on_connected.listen(self.join_network)
-        asyncio.ensure_future(self.join_network())
-        await fully_synced
         await self.db.release_all_outputs()
         await asyncio.gather(*(a.maybe_migrate_certificates() for a in self.accounts))
-        await asyncio.gather(*(a.save_max_gap() for a in self.accounts))
-        if len(self.accounts) > 10:
-            log.info("Loaded %i accounts", len(self.accounts))
-        else:
-            await self._report_state()
         self.on_transaction.listen(self._reset_balance_cache)
+        self._sync_state = 'connecting'
+        self._other_tasks.add(self._sync_with_network())
+
+    async def _sync_with_network(self):
+        try:
+            fully_synced = self.on_ready.first
+            asyncio.create_task(self.network.start())
+            await self.network.on_connected.first
+            self._sync_state = 'syncing_headers'
+            async with self._header_processing_lock:
+                await self._update_tasks.add(self.initial_headers_sync())
+            self.network.on_connected.listen(self.join_network)
+            asyncio.ensure_future(self.join_network())
+            await fully_synced
+            # the gaps only grow the address pools, there is no need to hold up anything for them
+            await asyncio.gather(*(a.save_max_gap() for a in self.accounts))
+            if len(self.accounts) > 10:
+                log.info("Loaded %i accounts", len(self.accounts))
+            else:
+                await self._report_state()
+        except Exception as err:
+            log.exception("Failed to sync %s with the network.", self.get_id())
+            # no accounts get subscribed from here on, until the wallet is started again
+            self._sync_state = 'failed'
+            self._sync_error = err
+            self._synced.set()
+
+    @property
+    def sync_state(self) -> str:
+        """
+        'stopped', 'connecting' (or reconnecting), 'syncing_headers', 'syncing_addresses', 'synced' or 'failed'.
+        """
+        if self._sync_state not in ('stopped', 'failed') and not self.network.is_connected:
+            return 'connecting'
+        return self._sync_state
+
+    async def wait_until_synced(self):
+        """ Wait until the wallet has synced with a hub, raises what stopped it if syncing failed. """
+        await self._synced.wait()
+        if self._sync_error is not None:
+            raise self._sync_error
 
     async def join_network(self, *_):
         log.info("Subscribing and updating accounts.")
+        self._sync_state = 'syncing_addresses'
+        self._synced.clear()
         await self._update_tasks.add(self.subscribe_accounts())
         await self._update_tasks.done.wait()
+        if self._sync_state == 'stopped':
+            return
+        self._sync_state = 'synced'
+        self._synced.set()
         self._on_ready_controller.add(True)
 
     async def stop(self):
+        self._sync_state = 'stopped'
+        self._synced.clear()
+        self._sync_error = None
         self._update_tasks.cancel()
         self._other_tasks.cancel()
         await self._update_tasks.done.wait()
@@ -386,6 +447,7 @@ class Ledger(metaclass=LedgerRegistry):
 
     async def update_headers(self, height=None, headers=None, subscription_update=False):
         rewound = 0
+        downloaded: List[Tuple[int, str]] = []  # header ranges fetched ahead, waiting to be connected
         while True:
 
             if height is None or height > len(self.headers):
@@ -396,14 +458,16 @@ class Ledger(metaclass=LedgerRegistry):
                 subscription_update = False
 
             if not headers:
-                header_response = await self.network.retriable_call(self.network.get_headers, height, 2001)
-                headers = header_response['hex']
+                if not downloaded or downloaded[0][0] != height:
+                    downloaded = await self._download_headers(height)
+                headers = downloaded.pop(0)[1]
 
             if not headers:
                 # Nothing to do, network thinks we're already at the latest height.
                 return
 
-            added = await self.headers.connect(height, unhexlify(headers))
+            raw_headers = unhexlify(headers)
+            added = await self.headers.connect(height, raw_headers)
             if added > 0:
                 height += added
                 self._on_header_controller.add(
@@ -421,10 +485,16 @@ class Ledger(metaclass=LedgerRegistry):
                     # on another loop of update_headers(), just return instead
                     return
 
+                if added * self.headers.header_size < len(raw_headers):
+                    # the rest of this range didn't connect, neither will the ones after it
+                    downloaded.clear()
+
             elif added == 0:
                 # we had headers to connect but none got connected, probably a reorganization
-                height -= 1
-                rewound += 1
+                fork_height = await self._find_fork_point(height - rewound, height)
+                rewound += height - fork_height - 1
+                height = fork_height + 1
+                downloaded.clear()
                 log.warning(
                     "Blockchain Reorganization: attempting rewind to height %s from starting height %s",
                     height, height+rewound
@@ -434,27 +504,67 @@ class Ledger(metaclass=LedgerRegistry):
             else:
                 raise IndexError(f"headers.connect() returned negative number ({added})")
 
-            if height < 0:
+            headers = None  # ready to download some more headers
+
+            # if we made it this far and this was a subscription_update
+            # it means something went wrong and now we're doing a more
+            # robust sync, turn off subscription update shortcut
+            subscription_update = False
+
+    async def _download_headers(self, height: int) -> List[Tuple[int, str]]:
+        """
+        Fetch the headers from `height` onwards as a list of (start height, hex headers) ranges, requesting
+        up to `concurrent_header_requests` ranges at once when the hub is that far ahead.
+        """
+        count = self.headers_per_request
+        ranges = min(
+            max((self.network.remote_height - height) // count + 1, 1), self.concurrent_header_requests
+        )
+        starts = range(height, height + ranges * count, count)
+        responses = await asyncio.gather(*(
+            self.network.retriable_call(self.network.get_headers, start, count) for start in starts
+        ))
+        return [(start, response['hex']) for start, response in zip(starts, responses)]
+
+    async def _is_on_remote_chain(self, height: int) -> bool:
+        response = await self.network.retriable_call(self.network.get_headers, height, 1)
+        remote_header = unhexlify(response['hex'])[:self.headers.header_size]
+        return bool(remote_header) and self.headers.hash_header(remote_header) == await self.headers.hash(height)
+
+    async def _find_fork_point(self, start_height: int, height: int) -> int:
+        """
+        Find the last header the local chain has in common with the hub's, knowing that the hub's header at
+        `height` doesn't connect. Compares block hashes going back 1, 2, 4... headers until one matches and
+        then bisects the range between the match and the closest mismatch.
+        """
+        floor = max(start_height - self.max_reorg_depth, 0)
+        mismatch, step = height - 1, 1
+        while True:
+            if mismatch <= 0:
                 raise IndexError(
                     "Blockchain reorganization rewound all the way back to genesis hash. "
                     "Something is very wrong. Maybe you are on the wrong blockchain?"
                 )
-
-            if rewound >= 100:
+            if mismatch <= floor:
                 raise IndexError(
                     "Blockchain reorganization dropped {} headers. This is highly unusual. "
                     "Will not continue to attempt reorganizing. Please, delete the ledger "
                     "synchronization directory inside your wallet directory (folder: '{}') and "
                     "restart the program to synchronize from scratch."
-                    .format(rewound, self.get_id())
+                    .format(start_height - mismatch, self.get_id())
                 )
-
-            headers = None  # ready to download some more headers
-
-            # if we made it this far and this was a subscription_update
-            # it means something went wrong and now we're doing a more
-            # robust sync, turn off subscription update shortcut
-            subscription_update = False
+            probe = max(mismatch - step, floor)
+            if await self._is_on_remote_chain(probe):
+                match = probe
+                break
+            mismatch, step = probe, step * 2
+        while mismatch - match > 1:
+            middle = (match + mismatch) // 2
+            if await self._is_on_remote_chain(middle):
+                match = middle
+            else:
+                mismatch = middle
+        return match
 
     async def receive_header(self, response):
         async with self._header_processing_lock:
@@ -492,8 +602,10 @@ class Ledger(metaclass=LedgerRegistry):
             while addresses_remaining:
                 batch = addresses_remaining[:batch_size]
                 results = await self.network.subscribe_address(*batch)
+                local_statuses = await self.db.get_address_statuses(batch)
                 for address, remote_status in zip(batch, results):
-                    self._update_tasks.add(self.update_history(address, remote_status, address_manager))
+                    if local_statuses.get(address) != remote_status:
+                        self._update_tasks.add(self.update_history(address, remote_status, address_manager))
                 addresses_remaining = addresses_remaining[batch_size:]
                 if self.network.client and self.network.client.server_address_and_port:
                     log.info("subscribed to %i/%i addresses on %s:%i", len(addresses) - len(addresses_remaining),
@@ -512,11 +624,13 @@ class Ledger(metaclass=LedgerRegistry):
                              reattempt_update: bool = True):
         async with self._address_update_locks[address]:
             self._known_addresses_out_of_sync.discard(address)
-            local_status, local_history = await self.get_local_status_and_history(address)
+            local_status = (await self.db.get_address_statuses([address])).get(address)
 
             if local_status == remote_status:
                 return True
 
+            local_history = await self.db.get_address_history(address)
+
             remote_history = await self.network.retriable_call(self.network.get_history, address)
             remote_history = list(map(itemgetter('tx_hash', 'height'), remote_history))
             we_need = set(remote_history) - set(local_history)
@@ -536,7 +650,7 @@ class Ledger(metaclass=LedgerRegistry):
             already_synced_offset = 0
             for i, (txid, remote_height) in enumerate(remote_history):
                 if i == already_synced_offset and i < len(local_history) and local_history[i] == (txid, remote_height):
-                    pending_synced_history[i] = f'{txid}:{remote_height}:'
+                    pending_synced_history[i] = (txid, remote_height)
                     already_synced.add((txid, remote_height))
                     already_synced_offset += 1
                     continue
@@ -556,21 +670,21 @@ class Ledger(metaclass=LedgerRegistry):
             remote_history_txids = {txid for txid, _ in remote_history}
             async for tx in self.request_synced_transactions(to_request, remote_history_txids, address):
                 self.maybe_has_channel_key(tx)
-                pending_synced_history[tx_indexes[tx.id]] = f"{tx.id}:{tx.height}:"
+                pending_synced_history[tx_indexes[tx.id]] = (tx.id, tx.height)
                 if len(pending_synced_history) % 100 == 0:
                     log.info("Syncing address %s: %d/%d", address, len(pending_synced_history), len(to_request))
             log.info("Sync finished for address %s: %d/%d", address, len(pending_synced_history), len(to_request))
 
             assert len(pending_synced_history) == len(remote_history), \
                 f"{len(pending_synced_history)} vs {len(remote_history)} for {address}"
-            synced_history = ""
+            synced_history = []
             for remote_i, i in zip(range(len(remote_history)), sorted(pending_synced_history.keys())):
                 assert i == remote_i, f"{i} vs {remote_i}"
-                txid, height = remote_history[remote_i]
-                if f"{txid}:{height}:" != pending_synced_history[i]:
+                if remote_history[remote_i] != pending_synced_history[i]:
                     log.warning("history mismatch: %s vs %s", remote_history[remote_i], pending_synced_history[i])
-                synced_history += pending_synced_history[i]
-            await self.db.set_address_history(address, synced_history)
+                synced_history.append(pending_synced_history[i])
+            local_status = await self.db.set_address_history(address, synced_history)
+            local_history = synced_history
 
             if address_manager is None:
                 address_manager = await self.get_address_manager_for_address(address)
@@ -578,9 +692,6 @@ class Ledger(metaclass=LedgerRegistry):
             if address_manager is not None:
                 await address_manager.ensure_address_gap()
 
-            local_status, local_history = \
-                await self.get_local_status_and_history(address, synced_history)
-
             if local_status != remote_status:
                 if local_history == remote_history:
                     log.warning(
@@ -680,7 +791,7 @@ class Ledger(metaclass=LedgerRegistry):
     async def _sync_and_save_batch(self, address, remote_history, pending_txs):
         await asyncio.gather(*(self._sync(tx, remote_history, pending_txs) for tx in pending_txs.values()))
         await self.db.save_transaction_io_batch(
-            pending_txs.values(), address, self.address_to_hash160(address), ""
+            pending_txs.values(), address, self.address_to_hash160(address)
         )
         while pending_txs:
             self._on_transaction_controller.add(TransactionEvent(address, pending_txs.popitem()[1]))
@@ -766,9 +877,7 @@ class Ledger(metaclass=LedgerRegistry):
             return True
         records = await self.db.get_addresses(address__in=addresses)
         for record in records:
-            local_history = (await self.get_local_status_and_history(
-                record['address'], history=record['history']
-            ))[1] if record['history'] else []
+            local_history = await self.db.get_address_history(record['address'])
             for txid, local_height in local_history:
                 if txid == tx.id:
                     if local_height >= height or (local_height == 0 and height > local_height):
@@ -811,6 +920,7 @@ class Ledger(metaclass=LedgerRegistry):
                 txo.update_annotations(None)
                 txo.channel = channel
             txos.append(txo)
+        await self.signature_verifier.verify(self._get_channel_claims(txos))
 
         includes = (
             include_purchase_receipt, include_is_my_output,
@@ -867,6 +977,14 @@ class Ledger(metaclass=LedgerRegistry):
                         txo.received_tips = tips
         return txos, blocked, outputs.offset, outputs.total
 
+    @staticmethod
+    def _get_channel_claims(txos):
+        for txo in txos:
+            while isinstance(txo, Output):
+                if txo.channel is not None:
+                    yield txo, txo.channel
+                txo = txo.reposted_claim
+
     async def resolve(self, accounts, urls, **kwargs):
         txos = []
         urls_copy = list(urls)
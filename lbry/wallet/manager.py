@@ -82,6 +82,11 @@ class WalletManager:
         ))
 
     async def stop(self):
+        for wallet, result in zip(self.wallets, await asyncio.gather(*(
+            wallet.flush() for wallet in self.wallets
+        ), return_exceptions=True)):
+            if isinstance(result, Exception):
+                log.error("Failed to save wallet %s: %s", wallet.id, result)
         await asyncio.gather(*(
             l.stop() for l in self.ledgers.values()
         ))
@@ -189,6 +194,8 @@ class WalletManager:
             'known_hubs': config.known_hubs,
             'jurisdiction': config.jurisdiction,
             'concurrent_hub_requests': config.concurrent_hub_requests,
+            'hub_pool_size': config.hub_pool_size,
+            'hedge_hub_requests': config.hedge_hub_requests,
             'data_path': config.wallet_dir,
             'tx_cache_size': config.transaction_cache_size
         }
@@ -224,6 +231,7 @@ class WalletManager:
         if default_wallet.is_locked and default_wallet.preferences.get(ENCRYPT_ON_DISK) is None:
             default_wallet.preferences[ENCRYPT_ON_DISK] = True
             default_wallet.save()
+        await default_wallet.flush()
         if receiving_addresses or change_addresses:
             if not os.path.exists(ledger.path):
                 os.mkdir(ledger.path)
@@ -243,12 +251,15 @@ class WalletManager:
             'jurisdiction': self.config.jurisdiction,
             'hub_timeout': self.config.hub_timeout,
             'concurrent_hub_requests': self.config.concurrent_hub_requests,
+            'hub_pool_size': self.config.hub_pool_size,
+            'hedge_hub_requests': self.config.hedge_hub_requests,
             'data_path': self.config.wallet_dir,
         }
         if Config.lbryum_servers.is_set(self.config):
             self.ledger.config['explicit_servers'] = self.config.lbryum_servers
         await self.ledger.stop()
         await self.ledger.start()
+        await self.ledger.wait_until_synced()
 
     async def _migrate_addresses(self, receiving_addresses: set, change_addresses: set):
         async with self.default_account.receiving.address_generator_lock:
@@ -4,8 +4,8 @@ import json
 import socket
 import random
 from time import perf_counter
-from collections import defaultdict
-from typing import Dict, Optional, Tuple
+from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple, List
 import aiohttp
 
 from lbry import __version__
@@ -20,6 +20,8 @@ log = logging.getLogger(__name__)
 
 
 class ClientSession(BaseClientSession):
+    decode_in_executor_size = 1 << 20
+
     def __init__(self, *args, network: 'Network', server, timeout=30, concurrency=32, **kwargs):
         self.network = network
         self.server = server
@@ -31,11 +33,28 @@ class ClientSession(BaseClientSession):
         self.connection_latency: Optional[float] = None
         self._response_samples = 0
         self._concurrency = asyncio.Semaphore(concurrency)
+        self.request_latencies = deque(maxlen=100)
+        self.pending_requests = 0
 
     @property
     def concurrency(self):
         return self._concurrency._value
 
+    @property
+    def p95_latency(self) -> Optional[float]:
+        if len(self.request_latencies) < 20:
+            return None
+        return sorted(self.request_latencies)[int(len(self.request_latencies) * 0.95)]
+
+    @property
+    def expected_latency(self) -> float:
+        """ Median time of recent requests, scaled by how many are already waiting on this session. """
+        if self.request_latencies:
+            typical = sorted(self.request_latencies)[len(self.request_latencies) // 2]
+        else:
+            typical = self.response_time or 0.0
+        return typical * (self.pending_requests + 1)
+
     @property
     def available(self):
         return not self.is_closing() and self.response_time is not None
@@ -61,10 +80,12 @@ class ClientSession(BaseClientSession):
 
     async def send_request(self, method, args=()):
         log.debug("send %s%s to %s:%i (%i timeout)", method, tuple(args), self.server[0], self.server[1], self.timeout)
+        self.pending_requests += 1
         try:
             await self._concurrency.acquire()
             if method == 'server.version':
                 return await self.send_timed_server_version_request(args, self.timeout)
+            start = perf_counter()
             request = asyncio.ensure_future(super().send_request(method, args))
             while not request.done():
                 done, pending = await asyncio.wait([request], timeout=self.timeout)
@@ -76,7 +97,9 @@ class ClientSession(BaseClientSession):
                     raise asyncio.TimeoutError
                 if done:
                     try:
-                        return request.result()
+                        result = request.result()
+                        self.request_latencies.append(perf_counter() - start)
+                        return result
                     except ConnectionResetError:
                         log.error(
                             "wallet server (%s) reset connection upon our %s request, json of %i args is %i bytes",
@@ -96,6 +119,7 @@ class ClientSession(BaseClientSession):
             # self.synchronous_close()
             raise
         finally:
+            self.pending_requests -= 1
             self._concurrency.release()
 
     async def ensure_server_version(self, required=None, timeout=3):
@@ -144,7 +168,7 @@ class ClientSession(BaseClientSession):
         self._response_samples = 0
         # self._on_disconnect_controller.add(True)
         if self.network:
-            self.network.disconnect()
+            self.network.session_lost(self)
 
 
 class Network:
@@ -158,6 +182,11 @@ class Network:
     def __init__(self, ledger):
         self.ledger = ledger
         self.client: Optional[ClientSession] = None
+        # extra sessions to other hubs, read only requests are spread across them and the client
+        self.session_pool: List[ClientSession] = []
+        self._pool_keepalive_tasks: Dict[ClientSession, asyncio.Task] = {}
+        self._pool_task: Optional[asyncio.Task] = None
+        self._ranked_hubs: List[Tuple[str, int]] = []
         self.server_features = None
         # self._switch_task: Optional[asyncio.Task] = None
         self.running = False
@@ -205,6 +234,17 @@ class Network:
             self._keepalive_task.cancel()
         self._keepalive_task = None
 
+    def session_lost(self, session: ClientSession):
+        if session is self.client:
+            self.disconnect()
+            if self.running and self.session_pool:
+                self._urgent_need_reconnect.set()
+        elif session in self.session_pool:
+            self.session_pool.remove(session)
+            log.info("lost pooled connection to %s:%i", *session.server)
+            if self.running and self.is_connected:
+                self._start_filling_pool()
+
     async def start(self):
         if not self.running:
             self.running = True
@@ -293,24 +333,78 @@ class Network:
         finally:
             connection.close()
 
+    async def _connect(self, host: str, port: int) -> Optional[ClientSession]:
+        client = ClientSession(network=self, server=(host, port), timeout=self.config.get('hub_timeout', 30),
+                               concurrency=self.config.get('concurrent_hub_requests', 30))
+        try:
+            await client.create_connection()
+            log.info("Connected to spv server %s:%i", host, port)
+            await client.ensure_server_version()
+            return client
+        except (asyncio.TimeoutError, ConnectionError, OSError, IncompatibleWalletServerError, RPCError):
+            log.warning("Connecting to %s:%d failed", host, port)
+            client._close()
+        return
+
     async def connect_to_fastest(self) -> Optional[ClientSession]:
         fastest_spvs = await self.get_n_fastest_spvs()
-        for (host, port), pong in fastest_spvs.items():
-            if (pong is not None and self.jurisdiction is not None) and \
-                    (pong.country_name != self.jurisdiction):
-                continue
-            client = ClientSession(network=self, server=(host, port), timeout=self.config.get('hub_timeout', 30),
-                                   concurrency=self.config.get('concurrent_hub_requests', 30))
-            try:
-                await client.create_connection()
-                log.info("Connected to spv server %s:%i", host, port)
-                await client.ensure_server_version()
+        self._ranked_hubs = [
+            (host, port) for (host, port), pong in fastest_spvs.items()
+            if pong is None or self.jurisdiction is None or pong.country_name == self.jurisdiction
+        ]
+        for host, port in self._ranked_hubs:
+            client = await self._connect(host, port)
+            if client:
                 return client
-            except (asyncio.TimeoutError, ConnectionError, OSError, IncompatibleWalletServerError, RPCError):
-                log.warning("Connecting to %s:%d failed", host, port)
-                client._close()
         return
 
+    def _start_filling_pool(self):
+        if self._pool_task is None or self._pool_task.done():
+            self._pool_task = asyncio.create_task(self._fill_pool())
+
+    async def _fill_pool(self):
+        for server in self._ranked_hubs:
+            if len(self.session_pool) + 1 >= self.config.get('hub_pool_size', 1) or not self.is_connected:
+                return
+            if server in [session.server for session in self.sessions]:
+                continue
+            client = await self._connect(*server)
+            if client is None:
+                continue
+            if not self.is_connected or len(self.session_pool) + 1 >= self.config.get('hub_pool_size', 1):
+                client._close()
+                return
+            self.session_pool.append(client)
+            self._pool_keepalive_tasks[client] = asyncio.create_task(client.keepalive_loop())
+            self._pool_keepalive_tasks[client].add_done_callback(
+                lambda _, session=client: self._pool_keepalive_tasks.pop(session, None)
+            )
+            log.info("added %s:%i to the hub connection pool (%i connections)", *client.server, len(self.sessions))
+
+    def _take_pooled_session(self) -> Tuple[Optional[ClientSession], Optional[asyncio.Task]]:
+        """ Promote the best pooled session to be the client, so losing a hub doesn't wait for a reconnect. """
+        for session in sorted(self.session_pool, key=lambda s: s.expected_latency):
+            self.session_pool.remove(session)
+            keepalive_task = self._pool_keepalive_tasks.pop(session, None)
+            if session.available and keepalive_task and not keepalive_task.done():
+                log.info("switching to pooled connection to spv server %s:%i", *session.server)
+                return session, keepalive_task
+            if keepalive_task:
+                keepalive_task.cancel()
+        return None, None
+
+    def _close_pool(self):
+        if self._pool_task and not self._pool_task.done():
+            self._pool_task.cancel()
+        self._pool_task = None
+        for session in self.session_pool:
+            keepalive_task = self._pool_keepalive_tasks.pop(session, None)
+            if keepalive_task:
+                keepalive_task.cancel()
+            elif not session.is_closing():
+                session._close()
+        self.session_pool.clear()
+
     async def network_loop(self):
         sleep_delay = 30
         while self.running:
@@ -322,7 +416,9 @@ class Network:
                 sleep_delay = 30
             self._urgent_need_reconnect.clear()
             if not self.is_connected:
-                client = await self.connect_to_fastest()
+                client, keepalive_task = self._take_pooled_session()
+                if not client:
+                    client = await self.connect_to_fastest()
                 if not client:
                     log.warning("failed to connect to any spv servers, retrying later")
                     sleep_delay *= 2
@@ -338,7 +434,8 @@ class Network:
                 self._on_connected_controller.add(True)
                 server_str = "%s:%i" % client.server
                 log.info("maintaining connection to spv server %s", server_str)
-                self._keepalive_task = asyncio.create_task(self.client.keepalive_loop())
+                self._keepalive_task = keepalive_task or asyncio.create_task(self.client.keepalive_loop())
+                self._start_filling_pool()
                 try:
                     if not self._urgent_need_reconnect.is_set():
                         await asyncio.wait(
@@ -363,6 +460,7 @@ class Network:
     async def stop(self):
         self.running = False
         self.disconnect()
+        self._close_pool()
         if self._loop_task and not self._loop_task.done():
             self._loop_task.cancel()
         self._loop_task = None
@@ -374,14 +472,64 @@ class Network:
     def is_connected(self):
         return self.client and not self.client.is_closing()
 
+    @property
+    def sessions(self) -> List[ClientSession]:
+        return ([self.client] if self.is_connected else []) + self.session_pool
+
+    def get_ranked_sessions(self) -> List[ClientSession]:
+        return sorted(
+            (session for session in self.sessions if session.available),
+            key=lambda session: (session.expected_latency, session.pending_requests)
+        )
+
     def rpc(self, list_or_method, args, restricted=True, session: Optional[ClientSession] = None):
         if session or self.is_connected:
+            if session is None and not restricted and self.session_pool:
+                return self._pooled_request(list_or_method, args)
             session = session or self.client
             return session.send_request(list_or_method, args)
         else:
             self._urgent_need_reconnect.set()
             raise ConnectionError("Attempting to send rpc request when connection is not available.")
 
+    async def _pooled_request(self, method, args):
+        """
+        Send a request that any hub can answer to the least loaded session, failing over to the next one on
+        timeouts and connection errors. When hedging is enabled and the request takes longer than the 95th
+        percentile of that session's recent requests, it is also sent to the next session and the first
+        response wins.
+        """
+        sessions = self.get_ranked_sessions() or [self.client]
+        hedge = self.config.get('hedge_hub_requests', False)
+        requests: Dict[asyncio.Future, ClientSession] = {}
+        error: Exception = ConnectionError("Attempting to send rpc request when connection is not available.")
+        try:
+            while True:
+                if not requests:
+                    if not sessions:
+                        raise error
+                    session = sessions.pop(0)
+                    requests[asyncio.ensure_future(session.send_request(method, args))] = session
+                timeout = None
+                if hedge and sessions and len(requests) == 1:
+                    timeout = next(iter(requests.values())).p95_latency
+                done, _ = await asyncio.wait(requests, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    session = sessions.pop(0)
+                    log.debug("hedging slow %s request with %s:%i", method, *session.server)
+                    requests[asyncio.ensure_future(session.send_request(method, args))] = session
+                    continue
+                for request in done:
+                    session = requests.pop(request)
+                    try:
+                        return request.result()
+                    except (asyncio.TimeoutError, ConnectionError) as err:
+                        log.warning("%s request to %s:%i failed, trying the next hub", method, *session.server)
+                        error = err
+        finally:
+            for request in requests:
+                request.cancel()
+
     async def retriable_call(self, function, *args, **kwargs):
         while self.running:
             if not self.is_connected:
@@ -191,6 +191,7 @@ class WalletNode:
         self.account = self.wallet.default_account
         if connect:
             await self.manager.start()
+            await self.ledger.wait_until_synced()
 
     async def stop(self, cleanup=True):
         try:
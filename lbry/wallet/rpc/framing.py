@@ -30,7 +30,8 @@ __all__ = ('FramerBase', 'NewlineFramer', 'BinaryFramer', 'BitcoinFramer',
 
 from hashlib import sha256 as _sha256
 from struct import Struct
-from asyncio import Queue
+from asyncio import Queue, get_event_loop
+from collections import deque
 
 
 class FramerBase:
@@ -55,7 +56,12 @@ class FramerBase:
 
 
 class NewlineFramer(FramerBase):
-    """A framer for a protocol where messages are separated by newlines."""
+    """A framer for a protocol where messages are separated by newlines.
+
+    Incoming bytes are appended to a single buffer and every complete
+    message in it is split off as soon as the bytes arrive, so a
+    message is copied at most once however many chunks it came in and
+    a chunk holding many messages is only scanned once."""
 
     # The default max_size value is motivated by JSONRPC, where a
     # normal request will be 250 bytes or less, and a reasonable
@@ -67,41 +73,61 @@ class NewlineFramer(FramerBase):
         newline character to re-synchronize the stream.
         """
         self.max_size = max_size
-        self.queue = Queue()
-        self.received_bytes = self.queue.put_nowait
+        self.messages = deque()
         self.synchronizing = False
-        self.residual = b''
+        self.buffer = bytearray()
+        # where to resume looking for a newline, everything before it was searched already
+        self._scanned = 0
+        self._waiter = None
 
     def frame(self, message):
         return message + b'\n'
 
-    async def receive_message(self):
-        parts = []
-        buffer_size = 0
-        while True:
-            part = self.residual
-            self.residual = b''
-            if not part:
-                part = await self.queue.get()
-
-            npos = part.find(b'\n')
-            if npos == -1:
-                parts.append(part)
-                buffer_size += len(part)
-                # Ignore over-sized messages; re-synchronize
-                if buffer_size <= self.max_size:
-                    continue
-                self.synchronizing = True
-                raise MemoryError(f'dropping message over {self.max_size:,d} '
-                                  f'bytes and re-synchronizing')
-
-            tail, self.residual = part[:npos], part[npos + 1:]
+    def received_bytes(self, data):
+        buffer = self.buffer
+        buffer += data
+        start = 0
+        npos = buffer.find(b'\n', self._scanned)
+        while npos != -1:
             if self.synchronizing:
                 self.synchronizing = False
-                return await self.receive_message()
+            elif start == 0 and npos == len(buffer) - 1:
+                # the buffer holds exactly one message, hand it over instead of copying it
+                del buffer[npos:]
+                self.messages.append(buffer)
+                self.buffer = buffer = bytearray()
+                npos = -1
+                break
             else:
-                parts.append(tail)
-                return b''.join(parts)
+                self.messages.append(bytes(memoryview(buffer)[start:npos]))
+            start = npos + 1
+            npos = buffer.find(b'\n', start)
+        if start:
+            del buffer[:start]
+        self._scanned = len(buffer)
+        if self._scanned > self.max_size:
+            # Ignore over-sized messages; re-synchronize
+            buffer.clear()
+            self._scanned = 0
+            if not self.synchronizing:
+                self.synchronizing = True
+                self.messages.append(MemoryError(
+                    f'dropping message over {self.max_size:,d} bytes and re-synchronizing'
+                ))
+        if self.messages and self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def receive_message(self):
+        while not self.messages:
+            self._waiter = get_event_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        message = self.messages.popleft()
+        if isinstance(message, MemoryError):
+            raise message
+        return message
 
 
 class ByteQueue:
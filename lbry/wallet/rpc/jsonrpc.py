@@ -266,7 +266,21 @@ class JSONRPC:
 
         raises: ProtocolError
         """
-        payload = cls._message_to_payload(message)
+        return cls.payload_to_item(cls._message_to_payload(message))
+
+    @classmethod
+    def decode_message(cls, message):
+        """Decode an unframed received message, without touching any
+        state, so it can be done away from the event loop.
+
+        raises: ProtocolError
+        """
+        return cls._message_to_payload(message)
+
+    @classmethod
+    def payload_to_item(cls, payload):
+        """Like message_to_item(), for a message that was decoded with
+        decode_message()."""
         if isinstance(payload, dict):
             if 'method' in payload:
                 return cls._process_request(payload)
@@ -542,13 +556,17 @@ class JSONRPCLoose(JSONRPC):
 class JSONRPCAutoDetect(JSONRPCv2):
 
     @classmethod
-    def message_to_item(cls, message):
-        return cls.detect_protocol(message), None
+    def payload_to_item(cls, payload):
+        return cls.detect_payload_protocol(payload), None
 
     @classmethod
     def detect_protocol(cls, message):
         """Attempt to detect the protocol from the message."""
-        main = cls._message_to_payload(message)
+        return cls.detect_payload_protocol(cls._message_to_payload(message))
+
+    @classmethod
+    def detect_payload_protocol(cls, main):
+        """Attempt to detect the protocol from the decoded message."""
 
         def protocol_for_payload(payload):
             if not isinstance(payload, dict):
@@ -708,8 +726,17 @@ class JSONRPCConnection:
         event = self._event(batch, ids) if ids else None
         return message, event
 
-    def receive_message(self, message):
-        """Call with an unframed message received from the network.
+    def decode_message(self, message):
+        """Decode an unframed message received from the network, to pass
+        to receive_message() later.  Safe to call from another thread.
+
+        Raises: ProtocolError if the message isn't valid JSON.
+        """
+        return self._protocol.decode_message(message)
+
+    def receive_message(self, message, payload=None):
+        """Call with an unframed message received from the network, and
+        its payload if it was already decoded with decode_message().
 
         Raises: ProtocolError if the message violates the protocol in
         some way.  However, if it happened in a response that can be
@@ -717,7 +744,10 @@ class JSONRPCConnection:
         result attribute of the send_request() that caused the error.
         """
         try:
-            item, request_id = self._protocol.message_to_item(message)
+            if payload is None:
+                item, request_id = self._protocol.message_to_item(message)
+            else:
+                item, request_id = self._protocol.payload_to_item(payload)
         except ProtocolError as e:
             if e.response_msg_id is not id:
                 return self._receive_response(e, e.response_msg_id)
@@ -741,7 +771,7 @@ class JSONRPCConnection:
             # Protocol auto-detection hack
             assert issubclass(item, JSONRPC)
             self._protocol = item
-            return self.receive_message(message)
+            return self.receive_message(message, payload)
 
     def raise_pending_requests(self, exception):
         exception = exception or asyncio.TimeoutError()
@@ -394,6 +394,8 @@ class RPCSession(SessionBase):
         "reset_clients", "Number of reset connections by client version",
         namespace=NAMESPACE, labelnames=("version",)
     )
+    # messages of at least this many bytes are decoded in the executor, None to decode all of them on the loop
+    decode_in_executor_size = None
 
     def __init__(self, *, framer=None, connection=None):
         super().__init__(framer=framer)
@@ -415,7 +417,11 @@ class RPCSession(SessionBase):
             self.recv_count += 1
 
             try:
-                requests = self.connection.receive_message(message)
+                payload = None
+                if self.decode_in_executor_size is not None and len(message) >= self.decode_in_executor_size:
+                    # don't hold up the loop decoding a large response
+                    payload = await self.loop.run_in_executor(None, self.connection.decode_message, message)
+                requests = self.connection.receive_message(message, payload)
             except ProtocolError as e:
                 self.logger.debug(f'{e}')
                 if e.error_message:
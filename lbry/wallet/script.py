@@ -257,17 +257,67 @@ class Parser:
             raise ParseError(f"Not a push single or subscript: {opcode}")
 
 
+# stands for a data push in the shape of a script
+PUSH = -1
+
+
+def get_shape(source):
+    """
+    Opcodes of the script with every data push replaced by PUSH, along with the pushed data.
+    None if the script ends in the middle of a push.
+    """
+    shape, pushes = [], []
+    i, size = 0, len(source)
+    while i < size:
+        token = source[i]
+        i += 1
+        if 1 <= token <= OP_PUSHDATA4:
+            if token < OP_PUSHDATA1:
+                length = token
+            else:
+                width = 1 if token == OP_PUSHDATA1 else 2 if token == OP_PUSHDATA2 else 4
+                if i + width > size:
+                    return None
+                length = int.from_bytes(source[i:i+width], 'little')
+                i += width
+            if i + length > size:
+                return None
+            shape.append(PUSH)
+            pushes.append(source[i:i+length])
+            i += length
+        else:
+            shape.append(token)
+    return tuple(shape), pushes
+
+
 class Template:
 
-    __slots__ = 'name', 'opcodes'
+    __slots__ = 'name', 'opcodes', 'shape', '_pushes'
 
     def __init__(self, name, opcodes):
         self.name = name
         self.opcodes = opcodes
+        # templates made of plain opcodes and single pushes can be matched by comparing shapes
+        self.shape = None
+        self._pushes = []
+        if opcodes and all(isinstance(opcode, (int, PUSH_SINGLE, PUSH_INTEGER, PUSH_SUBSCRIPT)) for opcode in opcodes):
+            self.shape = tuple(opcode if isinstance(opcode, int) else PUSH for opcode in opcodes)
+            self._pushes = [opcode for opcode in opcodes if not isinstance(opcode, int)]
 
     def parse(self, tokens):
         return Parser(self.opcodes, tokens).parse().values if self.opcodes else {}
 
+    def get_values(self, pushes):
+        """ Values of a script with the shape of this template, from its pushed data. """
+        values = {}
+        for opcode, data in zip(self._pushes, pushes):
+            if isinstance(opcode, PUSH_INTEGER):
+                data = int.from_bytes(data, 'little')
+            elif isinstance(opcode, PUSH_SUBSCRIPT):
+                data = Script.from_source_with_template(data, opcode.template)
+            values[opcode.name] = data
+        return values
+
     def generate(self, values):
         source = BCDataStream()
         for opcode in self.opcodes:
@@ -329,7 +379,45 @@ class Script:
     def from_source_with_template(cls, source, template):
         return cls(source, template_hint=template)
 
+    @classmethod
+    def get_templates_by_shape(cls):
+        """
+        Templates that can be matched by shape, up to the first that can't be, so a script always matches
+        the same template as it would by trying every template in order.
+        """
+        shapes = cls.__dict__.get('_templates_by_shape')
+        if shapes is None:
+            shapes = {}
+            for template in cls.templates:
+                if template.shape is None:
+                    break
+                shapes.setdefault(template.shape, template)
+            setattr(cls, '_templates_by_shape', shapes)
+        return shapes
+
+    def _parse_shape(self, template_hint=None) -> bool:
+        if not self.source or (template_hint is not None and template_hint.shape is None):
+            return False
+        parsed = get_shape(self.source)
+        if parsed is None:
+            return False
+        shape, pushes = parsed
+        if OP_0 in shape:
+            # OP_0 can be an empty push, which only the parser handles
+            return False
+        if template_hint is not None and template_hint.shape == shape:
+            template = template_hint
+        else:
+            template = self.get_templates_by_shape().get(shape)
+            if template is None:
+                return False
+        self._values = template.get_values(pushes)
+        self._template = template
+        return True
+
     def parse(self, template_hint=None):
+        if self._parse_shape(template_hint):
+            return
         tokens = self.tokens
         if not tokens and not template_hint:
             template_hint = self.NO_SCRIPT
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Iterable, Tuple, List, Dict
+
+from lbry.crypto.hash import hash160
+from lbry.utils import LRUCacheWithMetrics
+from lbry.wallet.transaction import Output
+
+if TYPE_CHECKING:
+    from lbry.wallet.ledger import Ledger
+
+log = logging.getLogger(__name__)
+
+
+class SignatureVerifier:
+    """
+    Verifies claim signatures against signing channels, remembering the result for every
+    (txid, nout, channel public key hash) so a claim seen repeatedly within or across requests
+    is only verified once. Batches of claims can be verified ahead of time on the thread pool.
+    """
+
+    BATCH_SIZE = 50  # signatures verified per worker task
+
+    def __init__(self, ledger: 'Ledger', cache_size: int = 2 ** 14):
+        self.ledger = ledger
+        self._cache = LRUCacheWithMetrics(cache_size, metric_name='claim_signature')
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @staticmethod
+    def get_cache_key(txo: Output, channel: Output) -> Tuple[str, int, bytes]:
+        return txo.tx_ref.id, txo.position, hash160(channel.claim.channel.public_key_bytes)
+
+    def _prepare(self, txo: Output, channel: Output) -> Tuple[bytes, bytes, bytes]:
+        return txo.signable.signature, txo.get_signature_digest(self.ledger), channel.claim.channel.public_key_bytes
+
+    @staticmethod
+    def _verify_batch(batch: List[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        return [Output.is_signature_valid(*signature) for signature in batch]
+
+    def is_signed_by(self, txo: Output, channel: Output) -> bool:
+        key = self.get_cache_key(txo, channel)
+        valid = self._cache.get(key)
+        if valid is not None:
+            self.hits += 1
+            return valid
+        self.misses += 1
+        valid = Output.is_signature_valid(*self._prepare(txo, channel))
+        self._cache.set(key, valid)
+        return valid
+
+    async def verify(self, claims: Iterable[Tuple[Output, Output]]):
+        """ Verify the signatures of (claim, channel) pairs that aren't cached yet, warming the cache. """
+        pending: Dict[Tuple[str, int, bytes], Tuple[bytes, bytes, bytes]] = {}
+        for txo, channel in claims:
+            try:
+                if not txo.signable.is_signed:
+                    continue
+                key = self.get_cache_key(txo, channel)
+                if key in pending or key in self._cache:
+                    continue
+                pending[key] = self._prepare(txo, channel)
+            except Exception as err:  # pylint: disable=broad-except
+                # left for is_signed_by() to fail the same way it would without the batch
+                log.debug("skipping verification of claim signature: %s", err)
+        if not pending:
+            return
+        loop = asyncio.get_running_loop()
+        keys, signatures = list(pending), list(pending.values())
+        results = await asyncio.gather(*(
+            loop.run_in_executor(None, self._verify_batch, signatures[i:i + self.BATCH_SIZE])
+            for i in range(0, len(signatures), self.BATCH_SIZE)
+        ))
+        for key, valid in zip(keys, (valid for batch in results for valid in batch)):
+            self._cache.set(key, valid)
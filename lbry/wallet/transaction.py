@@ -1,10 +1,13 @@
+import copy
 import struct
+import asyncio
 import logging
 import typing
 from binascii import hexlify, unhexlify
-from typing import List, Iterable, Optional, Tuple
+from typing import List, Iterable, Iterator, Optional, Tuple
 
 from lbry.error import InsufficientFundsError
+from lbry.utils import LRUCacheWithMetrics
 from lbry.crypto.hash import hash160, sha256
 from lbry.crypto.base58 import Base58
 from lbry.schema.url import normalize_name
@@ -27,6 +30,10 @@ if typing.TYPE_CHECKING:
 
 log = logging.getLogger()
 
+DECODED_CLAIM_CACHE_SIZE = 4096
+# claims decoded from the same bytes are shared by every Output holding them, Output copies one before changing it
+decoded_claims = LRUCacheWithMetrics(DECODED_CLAIM_CACHE_SIZE, metric_name='decoded_claim', namespace='wallet')
+
 
 class TXRefMutable(TXRef):
 
@@ -212,7 +219,7 @@ class Output(InputOutput):
         'amount', 'script', 'is_internal_transfer', 'is_spent', 'is_my_output', 'is_my_input',
         'channel', 'private_key', 'meta', 'sent_supports', 'sent_tips', 'received_tips',
         'purchase', 'purchased_claim', 'purchase_receipt',
-        'reposted_claim', 'claims', '_signable'
+        'reposted_claim', 'claims', '_signable', '_shared_claim'
     )
 
     def __init__(self, amount: int, script: OutputScript,
@@ -242,6 +249,7 @@ class Output(InputOutput):
         self.reposted_claim: 'Output' = None  # txo representing claim being reposted
         self.claims: List['Output'] = None  # resolved claims for collection
         self._signable: Optional[Signable] = None
+        self._shared_claim: Optional[Claim] = None
         self.meta = {}
 
     def update_annotations(self, annotated: 'Output'):
@@ -365,10 +373,23 @@ class Output(InputOutput):
     def claim(self) -> Claim:
         if self.is_claim:
             if not isinstance(self.script.values['claim'], Claim):
-                self.script.values['claim'] = Claim.from_bytes(self.script.values['claim'])
+                key = sha256(self.script.values['claim'])
+                claim = decoded_claims.get(key)
+                if claim is None:
+                    claim = Claim.from_bytes(self.script.values['claim'])
+                    decoded_claims.set(key, claim)
+                self.script.values['claim'] = self._shared_claim = claim
             return self.script.values['claim']
         raise ValueError('Only claim name and claim update have the claim payload.')
 
+    def _own_claim(self):
+        # copy a claim shared through decoded_claims before changing it
+        if self._shared_claim is not None and self.is_claim and self.script.values['claim'] is self._shared_claim:
+            claim = self.script.values['claim'] = copy.deepcopy(self._shared_claim)
+            if self._signable is self._shared_claim:
+                self._signable = claim
+        self._shared_claim = None
+
     @property
     def can_decode_claim(self):
         try:
@@ -432,6 +453,8 @@ class Output(InputOutput):
             .verify(signature, digest)
 
     def is_signed_by(self, channel: 'Output', ledger=None):
+        if ledger is not None:
+            return ledger.signature_verifier.is_signed_by(self, channel)
         return self.is_signature_valid(
             self.signable.signature,
             self.get_signature_digest(ledger),
@@ -439,6 +462,7 @@ class Output(InputOutput):
         )
 
     def sign(self, channel: 'Output', first_input_id=None):
+        self._own_claim()
         self.channel = channel
         self.signable.signing_channel_hash = channel.claim_hash
         digest = sha256(b''.join([
@@ -456,10 +480,12 @@ class Output(InputOutput):
         return hexlify(signature).decode()
 
     def clear_signature(self):
+        self._own_claim()
         self.channel = None
         self.signable.clear_signature()
 
     def set_channel_private_key(self, private_key: PrivateKey):
+        self._own_claim()
         self.private_key = private_key
         self.claim.channel.public_key_bytes = private_key.public_key.pubkey_bytes
         self.script.generate()
@@ -713,22 +739,32 @@ class Transaction:
         return stream.get_bytes()
 
     def _serialize_for_signature(self, signing_input: int) -> bytes:
+        return next(self._serialize_for_signatures([signing_input]))
+
+    def _serialize_for_signatures(self, signing_inputs: Iterable[int]) -> Iterator[bytes]:
+        """ Like _serialize_for_signature() for several inputs, the parts they share are serialized once. """
         stream = BCDataStream()
         stream.write_uint32(self.version)
         stream.write_compact_size(len(self._inputs))
-        for i, txin in enumerate(self._inputs):
-            if signing_input == i:
-                if txin.script.is_script_hash:
-                    txin.serialize_to(stream, txin.script.values['script'].source)
-                else:
-                    assert txin.txo_ref.txo is not None
-                    txin.serialize_to(stream, txin.txo_ref.txo.script.source)
-            else:
-                txin.serialize_to(stream, b'')
+        head = stream.get_bytes()
+        unsigned_inputs = []
+        for txin in self._inputs:
+            stream = BCDataStream()
+            txin.serialize_to(stream, b'')
+            unsigned_inputs.append(stream.get_bytes())
+        stream = BCDataStream()
         self._serialize_outputs(stream)
         stream.write_uint32(self.locktime)
         stream.write_uint32(self.signature_hash_type(1))  # signature hash type: SIGHASH_ALL
-        return stream.get_bytes()
+        tail = stream.get_bytes()
+        for i in signing_inputs:
+            txin, stream = self._inputs[i], BCDataStream()
+            if txin.script.is_script_hash:
+                txin.serialize_to(stream, txin.script.values['script'].source)
+            else:
+                assert txin.txo_ref.txo is not None
+                txin.serialize_to(stream, txin.txo_ref.txo.script.source)
+            yield b''.join((head, *unsigned_inputs[:i], stream.get_bytes(), *unsigned_inputs[i+1:], tail))
 
     def _serialize_outputs(self, stream):
         if self._raw_outputs is None:
@@ -865,27 +901,47 @@ class Transaction:
     def signature_hash_type(hash_type):
         return hash_type
 
+    SIGNING_BATCH_SIZE = 50  # inputs signed per worker task
+
+    @staticmethod
+    def _sign_batch(batch: List[Tuple[PrivateKey, bytes]]) -> List[bytes]:
+        return [private_key.sign(preimage) for private_key, preimage in batch]
+
     async def sign(self, funding_accounts: Iterable['Account'], extra_keys: dict = None):
         self._reset()
         ledger, wallet = self.ensure_all_have_same_ledger_and_wallet(funding_accounts)
-        for i, txi in enumerate(self._inputs):
+        addresses = {
+            ledger.hash160_to_address(txi.txo_ref.txo.script.values['pubkey_hash'])
+            for txi in self._inputs
+            if txi.txo_ref.txo is not None and 'pubkey_hash' in txi.txo_ref.txo.script.values
+        }
+        private_keys = await ledger.get_private_keys_for_addresses(wallet, addresses) if addresses else {}
+        signing_keys = []
+        for txi in self._inputs:
             assert txi.script is not None
             assert txi.txo_ref.txo is not None
             txo_script = txi.txo_ref.txo.script
             if txo_script.is_pay_pubkey_hash or txo_script.is_pay_script_hash:
                 if 'pubkey_hash' in txo_script.values:
                     address = ledger.hash160_to_address(txo_script.values.get('pubkey_hash', ''))
-                    private_key = await ledger.get_private_key_for_address(wallet, address)
+                    private_key = private_keys.get(address)
                 else:
                     private_key = next(iter(extra_keys.values()))
                 assert private_key is not None, 'Cannot find private key for signing output.'
-                tx = self._serialize_for_signature(i)
-                txi.script.values['signature'] = \
-                    private_key.sign(tx) + bytes((self.signature_hash_type(1),))
-                txi.script.values['pubkey'] = private_key.public_key.pubkey_bytes
-                txi.script.generate()
+                signing_keys.append(private_key)
             else:
                 raise NotImplementedError("Don't know how to spend this output.")
+        signing = list(zip(signing_keys, self._serialize_for_signatures(range(len(self._inputs)))))
+        loop = asyncio.get_running_loop()
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(None, self._sign_batch, signing[i:i + self.SIGNING_BATCH_SIZE])
+            for i in range(0, len(signing), self.SIGNING_BATCH_SIZE)
+        ))
+        signatures = (signature for batch in batches for signature in batch)
+        for txi, private_key, signature in zip(self._inputs, signing_keys, signatures):
+            txi.script.values['signature'] = signature + bytes((self.signature_hash_type(1),))
+            txi.script.values['pubkey'] = private_key.public_key.pubkey_bytes
+            txi.script.generate()
         self._reset()
 
     @classmethod
@@ -4,6 +4,7 @@ import stat
 import json
 import zlib
 import typing
+import asyncio
 import logging
 from typing import List, Sequence, MutableSequence, Optional
 from collections import UserDict
@@ -76,6 +77,9 @@ class Wallet:
         self.preferences = TimestampedPreferences(preferences or {})
         self.encryption_password = None
         self.id = self.get_id()
+        self._save_pending = False
+        self._save_task: Optional[asyncio.Task] = None
+        self._save_error: Optional[Exception] = None
 
     def get_id(self):
         return os.path.basename(self.storage.path) if self.storage.path else self.name
@@ -135,7 +139,7 @@ class Wallet:
         return {
             'version': WalletStorage.LATEST_VERSION,
             'name': self.name,
-            'preferences': self.preferences.data,
+            'preferences': dict(self.preferences.data),
             'accounts': [a.to_dict(encrypt_password) for a in self.accounts]
         }
 
@@ -143,17 +147,57 @@ class Wallet:
         assert not self.is_locked, "Cannot serialize a wallet with locked/encrypted accounts."
         return json.dumps(self.to_dict())
 
-    def save(self):
+    def _to_storage_dict(self):
         if self.preferences.get(ENCRYPT_ON_DISK, False):
             if self.encryption_password is not None:
-                return self.storage.write(self.to_dict(encrypt_password=self.encryption_password))
+                return self.to_dict(encrypt_password=self.encryption_password)
             elif not self.is_locked:
                 log.warning(
                     "Disk encryption requested but no password available for encryption. "
                     "Resetting encryption preferences and saving wallet in an unencrypted state."
                 )
                 self.preferences[ENCRYPT_ON_DISK] = False
-        return self.storage.write(self.to_dict())
+        return self.to_dict()
+
+    def save(self):
+        """
+        Write the wallet to its file. While the event loop is running the file is written in the
+        background and saves made before a write starts are all covered by that one write.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or self.storage.path is None:
+            return self.storage.write(self._to_storage_dict())
+        self._save_pending = True
+        if self._save_task is None or self._save_task.done():
+            self._take_finished_save()
+            self._save_task = loop.create_task(self._save_in_background())
+        return None
+
+    async def _save_in_background(self):
+        loop = asyncio.get_running_loop()
+        # let the rest of a burst of changes in before taking the snapshot
+        await asyncio.sleep(0)
+        while self._save_pending:
+            self._save_pending = False
+            await loop.run_in_executor(None, self.storage.write, self._to_storage_dict())
+
+    def _take_finished_save(self):
+        """ Forget the finished background write, keeping its error for the next flush() to raise. """
+        task, self._save_task = self._save_task, None
+        if task is not None and not task.cancelled() and task.exception() is not None:
+            self._save_error = task.exception()
+
+    async def flush(self):
+        """ Wait until the changes saved so far are written to the file, raising the error if writing failed. """
+        while self._save_task is not None and not self._save_task.done():
+            await asyncio.wait([self._save_task])
+        self._take_finished_save()
+        error, self._save_error = self._save_error, None
+        if error is not None:
+            raise error
 
     @property
     def hash(self) -> bytes:
@@ -0,0 +1,40 @@
+import time
+import asyncio
+import argparse
+
+from lbry.extras.daemon.daemon import Daemon
+from lbry.conf import Config
+
+
+async def measure(daemon: Daemon, method: str, params: dict, count: int) -> float:
+    request = {'method': method, 'params': params}
+    start = time.perf_counter()
+    for _ in range(count):
+        await daemon._process_rpc_call(request)
+    return (time.perf_counter() - start) / count
+
+
+async def main(count: int):
+    conf = Config(data_dir='/tmp', share_usage_data=False)
+    daemon = Daemon(conf)
+    # a method that does no work, so all of the time is spent in the RPC layer
+    Daemon.callable_methods['noop'] = noop
+    for method, params in (
+            ('noop', {}),
+            ('noop', {'claim_id': 'beef', 'page': 2, 'page_size': 50, 'resolve': True})):
+        per_call = await measure(daemon, method, params, count)
+        print(f"{method} {params}: {per_call * 1_000_000:.1f}us per call")
+    start = time.perf_counter()
+    for _ in range(count):
+        daemon._check_params(Daemon.jsonrpc_txo_list, (), {'page': 1, 'type': 'stream'})
+    print(f"txo_list argument check: {(time.perf_counter() - start) / count * 1_000_000:.2f}us per call")
+
+
+def noop(self, claim_id=None, page=None, page_size=None, resolve=False):  # pylint: disable=unused-argument
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the overhead the daemon adds to each API call")
+    parser.add_argument('--count', type=int, default=10000)
+    asyncio.run(main(parser.parse_args().count))
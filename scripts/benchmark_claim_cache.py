@@ -0,0 +1,55 @@
+import os
+import time
+import argparse
+
+from lbry.schema.claim import Claim
+from lbry.wallet import Transaction, Output, Input
+from lbry.wallet.transaction import decoded_claims
+
+
+def get_page_transactions(page_size: int) -> list:
+    """ Raw transactions with a stream claim each, like the ones on a page of claim_search results. """
+    raws = []
+    funding = Transaction().add_outputs([Output.pay_pubkey_hash(page_size, os.urandom(20))]).outputs[0]
+    for i in range(page_size):
+        claim = Claim()
+        claim.stream.title = f'stream {i}'
+        claim.stream.description = 'description ' * 20
+        claim.stream.tags.extend(['one', 'two', 'three'])
+        claim.stream.source.sd_hash = os.urandom(48).hex()
+        claim.stream.fee.lbc = 1
+        claim.signing_channel_hash, claim.signature = os.urandom(20), os.urandom(64)
+        raws.append(Transaction().add_inputs([Input.spend(funding)]).add_outputs([
+            Output.pay_claim_name_pubkey_hash(1, f'stream-{i}', claim, os.urandom(20))
+        ]).raw)
+    return raws
+
+
+def measure(raws: list, pages: int, cached: bool) -> float:
+    decoded_claims.clear()
+    elapsed = 0.0
+    for _ in range(pages):
+        # transactions are parsed again for every page, only decoding the claims is timed
+        outputs = [Transaction(raw).outputs[0] for raw in raws]
+        if not cached:
+            decoded_claims.clear()
+        start = time.perf_counter()
+        for txo in outputs:
+            txo.claim  # pylint: disable=pointless-statement
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main(page_size: int, pages: int):
+    raws = get_page_transactions(page_size)
+    uncached, cached = measure(raws, pages, False), measure(raws, pages, True)
+    print(f"decoding {pages} pages of {page_size} claims: {uncached * 1000:.1f}ms without the cache, "
+          f"{cached * 1000:.1f}ms with it ({uncached / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure decode time saved when claim_search pages repeat")
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+    main(args.page_size, args.pages)
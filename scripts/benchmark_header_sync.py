@@ -0,0 +1,114 @@
+import json
+import time
+import struct
+import asyncio
+import argparse
+from binascii import hexlify
+
+from lbry.crypto.hash import double_sha256
+from lbry.wallet import RegTestLedger, Database
+from lbry.wallet.header import UnvalidatedHeaders
+from lbry.wallet.stream import StreamController
+from lbry.wallet.rpc.session import RPCSession, Connector
+from lbry.wallet.rpc.framing import NewlineFramer
+
+HEADER_SIZE = UnvalidatedHeaders.header_size
+
+
+def make_chain(count: int, fork_at: int = None, nonce: int = 0) -> bytes:
+    """ `count` linked headers, the ones from `fork_at` onwards made different by `nonce`. """
+    headers, previous = [], bytes(32)
+    for height in range(count):
+        header = b''.join((
+            struct.pack('<I', 1), previous, bytes(32), bytes(32),
+            struct.pack('<III', height, 0x207fffff, nonce if fork_at is not None and height >= fork_at else 0)
+        ))
+        headers.append(header)
+        previous = double_sha256(header)
+    return b''.join(headers)
+
+
+async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, chain: bytes, latency: float):
+    """ Stub hub answering blockchain.block.headers from `chain`, each response delayed by `latency`. """
+
+    async def respond(request):
+        height, count = request['params'][:2]
+        headers = chain[height * HEADER_SIZE:(height + count) * HEADER_SIZE]
+        await asyncio.sleep(latency)
+        result = {'hex': hexlify(headers).decode(), 'count': len(headers) // HEADER_SIZE, 'max': 2016}
+        writer.write(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result}).encode() + b'\n')
+
+    tasks = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        tasks.append(asyncio.create_task(respond(json.loads(line))))
+    for task in tasks:
+        task.cancel()
+    writer.close()
+
+
+class StubHubNetwork:
+
+    def __init__(self, session: RPCSession, remote_height: int):
+        self.session = session
+        self.remote_height = remote_height
+        self.requests = 0
+        self.on_header = StreamController().stream
+        self.on_status = StreamController().stream
+
+    def retriable_call(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+    def get_headers(self, height, count=10000, b64=False):
+        self.requests += 1
+        return self.session.send_request('blockchain.block.headers', [height, count, 0, b64])
+
+
+async def sync(local: bytes, remote: bytes, latency: float, baseline: bool):
+    server = await asyncio.start_server(lambda r, w: serve(r, w, remote, latency), 'localhost', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with Connector(lambda: RPCSession(framer=NewlineFramer(1 << 32)), 'localhost', port) as session:
+        network = StubHubNetwork(session, len(remote) // HEADER_SIZE - 1)
+        headers = UnvalidatedHeaders(':memory:')
+        headers.genesis_hash = None
+        ledger = RegTestLedger({'db': Database(':memory:'), 'headers': headers, 'network': network})
+        await ledger.db.open()
+        await headers.open()
+        await headers.connect(0, local)
+        if baseline:
+            # how it used to be: one range at a time and rewinding a single header per failed connect
+
+            async def rewind_one(start_height, height):
+                return height - 2
+            ledger.concurrent_header_requests = 1
+            ledger._find_fork_point = rewind_one
+        start = time.perf_counter()
+        await ledger.update_headers()
+        elapsed = time.perf_counter() - start
+        assert headers._read(0, len(remote) // HEADER_SIZE) == remote
+        await ledger.db.close()  # headers are in memory, closing them would write them to a file named :memory:
+    server.close()
+    await server.wait_closed()
+    return elapsed, network.requests
+
+
+async def main(reorg: int, catch_up: int, latency: float, baseline: bool):
+    local = make_chain(1000)
+    remote = make_chain(1000 + 1, fork_at=1000 - reorg, nonce=1)
+    elapsed, requests = await sync(local, remote, latency, baseline)
+    print(f"{reorg} block reorganization: {requests} requests in {elapsed:.2f}s")
+    remote = make_chain(1000 + catch_up)
+    elapsed, requests = await sync(local, remote, latency, baseline)
+    print(f"{catch_up} headers behind: {requests} requests in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how fast the wallet catches up with a hub's headers")
+    parser.add_argument('--reorg', type=int, default=50, help='depth of the reorganization to recover from')
+    parser.add_argument('--catch-up', type=int, default=100_000, help='headers to download after being offline')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the hub takes to answer each request')
+    parser.add_argument('--baseline', action='store_true', help='download and rewind one step at a time')
+    args = parser.parse_args()
+    asyncio.run(main(args.reorg, args.catch_up, args.latency, args.baseline))
@@ -0,0 +1,53 @@
+import json
+import time
+import asyncio
+import argparse
+
+from lbry.wallet.rpc.session import RPCSession, Connector
+from lbry.wallet.rpc.framing import NewlineFramer
+
+
+def get_response(size: int, batch: int) -> bytes:
+    """ A get_batch style response of `batch` raw transactions adding up to about `size` bytes. """
+    raw_tx = 'ab' * (size // batch // 2)
+    return json.dumps({f'{i:064x}': [raw_tx, {'block_height': i}] for i in range(batch)}).encode()
+
+
+async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, result: bytes):
+    """ Stub hub answering every request with the same result. """
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        request = json.loads(line)
+        writer.write(b'{"jsonrpc": "2.0", "id": %d, "result": %s}\n' % (request['id'], result))
+        await writer.drain()
+    writer.close()
+
+
+async def main(size: int, batch: int, count: int, decode_in_executor: bool):
+    result = get_response(size, batch)
+    server = await asyncio.start_server(lambda r, w: serve(r, w, result), 'localhost', 0)
+    port = server.sockets[0].getsockname()[1]
+    RPCSession.decode_in_executor_size = size // 2 if decode_in_executor else None
+    # the wallet's sessions lift the size limit the same way
+    async with Connector(lambda: RPCSession(framer=NewlineFramer(1 << 32)), 'localhost', port) as session:
+        await session.send_request('blockchain.transaction.get_batch', [])
+        start = time.perf_counter()
+        for _ in range(count):
+            await session.send_request('blockchain.transaction.get_batch', [])
+        elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    print(f"{count} responses of {len(result) / 1_000_000:.1f}MB in {elapsed:.2f}s: "
+          f"{count * len(result) / 1_000_000 / elapsed:.1f}MB/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how fast large responses are received from a hub")
+    parser.add_argument('--size', type=int, default=5_000_000, help='approximate bytes in each response')
+    parser.add_argument('--batch', type=int, default=100, help='transactions in each response')
+    parser.add_argument('--count', type=int, default=20)
+    parser.add_argument('--decode-in-executor', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(main(args.size, args.batch, args.count, args.decode_in_executor))
@@ -0,0 +1,57 @@
+import os
+import time
+import argparse
+
+from lbry.wallet.script import InputScript, OutputScript
+
+
+class TokenizingOutputScript(OutputScript):
+    """ Matches templates only with the parser, the way every script used to be parsed. """
+    __slots__ = ()
+
+    def _parse_shape(self, template_hint=None):
+        return False
+
+
+class TokenizingInputScript(InputScript):
+    __slots__ = ()
+
+    def _parse_shape(self, template_hint=None):
+        return False
+
+
+def get_sources():
+    pubkey_hash, claim_id = os.urandom(20), os.urandom(20)
+    outputs = [
+        OutputScript.pay_pubkey_hash(pubkey_hash).source,
+        OutputScript.pay_script_hash(pubkey_hash).source,
+        OutputScript.pay_claim_name_pubkey_hash(b'name', os.urandom(300), pubkey_hash).source,
+        OutputScript.pay_update_claim_pubkey_hash(b'name', claim_id, os.urandom(300), pubkey_hash).source,
+        OutputScript.pay_support_pubkey_hash(b'name', claim_id, pubkey_hash).source,
+        OutputScript.pay_support_data_pubkey_hash(b'name', claim_id, os.urandom(50), pubkey_hash).source,
+    ]
+    inputs = [InputScript.redeem_pubkey_hash(os.urandom(71), os.urandom(33)).source]
+    return outputs, inputs
+
+
+def measure(script_class, sources, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        for source in sources:
+            script_class(source).parse()
+    return count * len(sources) / (time.perf_counter() - start)
+
+
+def main(count: int):
+    outputs, inputs = get_sources()
+    for name, sources, parsed, tokenized in (
+            ('output', outputs, OutputScript, TokenizingOutputScript),
+            ('input', inputs, InputScript, TokenizingInputScript)):
+        before, after = measure(tokenized, sources, count), measure(parsed, sources, count)
+        print(f"{name} scripts: {before:,.0f}/s tokenized, {after:,.0f}/s by shape ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how many scripts are parsed per second")
+    parser.add_argument('--count', type=int, default=20000)
+    main(parser.parse_args().count)
@@ -20,7 +20,7 @@ class AccountManagement(CommandTestCase):
 
         # change account name and gap
         account_id = accounts['items'][0]['id']
-        self.daemon.jsonrpc_account_set(
+        await self.daemon.jsonrpc_account_set(
             account_id=account_id, new_name='test account',
             receiving_gap=95, receiving_max_uses=96,
             change_gap=97, change_max_uses=98
@@ -44,14 +44,14 @@ class AccountManagement(CommandTestCase):
         account_id2 = accounts['items'][1]['id']
 
         # make new account the default
-        self.daemon.jsonrpc_account_set(account_id=account_id2, default=True)
+        await self.daemon.jsonrpc_account_set(account_id=account_id2, default=True)
         accounts = await self.daemon.jsonrpc_account_list(show_seed=True)
         self.assertEqual(accounts['items'][0]['name'], 'second account')
 
         account_seed = accounts['items'][1]['seed']
 
         # remove account
-        self.daemon.jsonrpc_account_remove(accounts['items'][1]['id'])
+        await self.daemon.jsonrpc_account_remove(accounts['items'][1]['id'])
         accounts = await self.daemon.jsonrpc_account_list()
         self.assertItemCount(accounts, 1)
 
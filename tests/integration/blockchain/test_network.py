@@ -90,6 +90,7 @@ class ReconnectTests(IntegrationTestCase):
         self.assertEqual(50002, self.ledger.network.client.server[1])
         await self.ledger.stop()
         await self.ledger.start()
+        await self.ledger.wait_until_synced()
 
         self.assertTrue(self.ledger.network.is_connected)
         self.assertEqual(50003, self.ledger.network.client.server[1])
@@ -72,6 +72,9 @@ class WalletCommands(CommandTestCase):
         await self.wallet_send('3.0', p2sh_address1)
         self.assertEqual(await self.blockchain.get_balance(), str(float(bal)+7))  # +1 lbc for confirm block
         await self.assertBalance(self.account, '4.999754')
+        with self.assertRaisesRegex(ValueError, 'batch_size must be a positive number'):
+            await self.daemon.jsonrpc_wallet_send('1.0', [p2sh_address1], batch_size=-1)
+        await self.assertBalance(self.account, '4.999754')
 
     async def test_balance_caching(self):
         account2 = await self.daemon.jsonrpc_account_create("Tip-er")
@@ -255,15 +258,15 @@ class WalletEncryptionAndSynchronization(CommandTestCase):
         self.assertFalse(daemon.jsonrpc_preference_get())
         self.assertFalse(daemon2.jsonrpc_preference_get())
 
-        daemon.jsonrpc_preference_set("fruit", '["peach", "apricot"]')
-        daemon.jsonrpc_preference_set("one", "1")
-        daemon.jsonrpc_preference_set("conflict", "1")
-        daemon2.jsonrpc_preference_set("another", "A")
+        await daemon.jsonrpc_preference_set("fruit", '["peach", "apricot"]')
+        await daemon.jsonrpc_preference_set("one", "1")
+        await daemon.jsonrpc_preference_set("conflict", "1")
+        await daemon2.jsonrpc_preference_set("another", "A")
         await asyncio.sleep(1)
         # these preferences will win after merge since they are "newer"
-        daemon2.jsonrpc_preference_set("two", "2")
-        daemon2.jsonrpc_preference_set("conflict", "2")
-        daemon.jsonrpc_preference_set("another", "B")
+        await daemon2.jsonrpc_preference_set("two", "2")
+        await daemon2.jsonrpc_preference_set("conflict", "2")
+        await daemon.jsonrpc_preference_set("another", "B")
 
         self.assertDictEqual(daemon.jsonrpc_preference_get(), {
             "one": "1", "conflict": "1", "another": "B", "fruit": ["peach", "apricot"]
@@ -330,9 +333,9 @@ class WalletEncryptionAndSynchronization(CommandTestCase):
             daemon.jsonrpc_wallet_lock()
         # safe to call unlock and decrypt, they are no-ops at this point
         await daemon.jsonrpc_wallet_unlock('password')  # already unlocked
-        daemon.jsonrpc_wallet_decrypt()  # already not encrypted
+        await daemon.jsonrpc_wallet_decrypt()  # already not encrypted
 
-        daemon.jsonrpc_wallet_encrypt('password')
+        await daemon.jsonrpc_wallet_encrypt('password')
         self.assertEqual(daemon.jsonrpc_wallet_status(), {'is_locked': False, 'is_encrypted': True,
                                                           'is_syncing': False})
         self.assertEqual(daemon.jsonrpc_preference_get(ENCRYPT_ON_DISK), {'encrypt-on-disk': True})
@@ -350,7 +353,7 @@ class WalletEncryptionAndSynchronization(CommandTestCase):
                                                           'is_syncing': False})
         await daemon.jsonrpc_channel_create('@foo', '1.0')
 
-        daemon.jsonrpc_wallet_decrypt()
+        await daemon.jsonrpc_wallet_decrypt()
         self.assertEqual(daemon.jsonrpc_wallet_status(), {'is_locked': False, 'is_encrypted': False,
                                                           'is_syncing': False})
         self.assertEqual(daemon.jsonrpc_preference_get(ENCRYPT_ON_DISK), {'encrypt-on-disk': False})
@@ -361,14 +364,14 @@ class WalletEncryptionAndSynchronization(CommandTestCase):
         channel = await self.channel_create()
         exported = await daemon.jsonrpc_channel_export(self.get_claim_id(channel))
         await daemon2.jsonrpc_channel_import(exported)
-        self.assertTrue(daemon2.jsonrpc_wallet_encrypt('password'))
+        self.assertTrue(await daemon2.jsonrpc_wallet_encrypt('password'))
         self.assertTrue(daemon2.jsonrpc_wallet_lock())
         self.assertTrue(await daemon2.jsonrpc_wallet_unlock("password"))
         self.assertEqual(daemon2.jsonrpc_wallet_status(),
                          {'is_locked': False, 'is_encrypted': True, 'is_syncing': False})
 
     async def test_locking_unlocking_does_not_break_deterministic_channels(self):
-        self.assertTrue(self.daemon.jsonrpc_wallet_encrypt("password"))
+        self.assertTrue(await self.daemon.jsonrpc_wallet_encrypt("password"))
         self.assertTrue(self.daemon.jsonrpc_wallet_lock())
         self.account.deterministic_channel_keys._private_key = None
         self.assertTrue(await self.daemon.jsonrpc_wallet_unlock("password"))
@@ -381,7 +384,7 @@ class WalletEncryptionAndSynchronization(CommandTestCase):
         self.assertEqual(wallet2.encryption_password, None)
         self.assertEqual(wallet2.encryption_password, None)
 
-        daemon.jsonrpc_wallet_encrypt('password')
+        await daemon.jsonrpc_wallet_encrypt('password')
         self.assertEqual(wallet.encryption_password, 'password')
 
         data = await daemon2.jsonrpc_sync_apply('password2')
@@ -433,15 +436,15 @@ class WalletEncryptionAndSynchronization(CommandTestCase):
         self.assertFalse(daemon.jsonrpc_preference_get())
         self.assertFalse(daemon2.jsonrpc_preference_get())
 
-        daemon.jsonrpc_preference_set("fruit", '["peach", "apricot"]')
-        daemon.jsonrpc_preference_set("one", "1")
-        daemon.jsonrpc_preference_set("conflict", "1")
-        daemon2.jsonrpc_preference_set("another", "A")
+        await daemon.jsonrpc_preference_set("fruit", '["peach", "apricot"]')
+        await daemon.jsonrpc_preference_set("one", "1")
+        await daemon.jsonrpc_preference_set("conflict", "1")
+        await daemon2.jsonrpc_preference_set("another", "A")
         await asyncio.sleep(1)
         # these preferences will win after merge since they are "newer"
-        daemon2.jsonrpc_preference_set("two", "2")
-        daemon2.jsonrpc_preference_set("conflict", "2")
-        daemon.jsonrpc_preference_set("another", "B")
+        await daemon2.jsonrpc_preference_set("two", "2")
+        await daemon2.jsonrpc_preference_set("conflict", "2")
+        await daemon.jsonrpc_preference_set("another", "B")
 
         self.assertDictEqual(daemon.jsonrpc_preference_get(), {
             "one": "1", "conflict": "1", "another": "B", "fruit": ["peach", "apricot"]
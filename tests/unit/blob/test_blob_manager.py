@@ -1,6 +1,7 @@
 import tempfile
 import shutil
 import os
+import asyncio
 from lbry.testcase import AsyncioTestCase
 from lbry.conf import Config
 from lbry.extras.daemon.storage import SQLiteStorage
@@ -8,10 +9,10 @@ from lbry.blob.blob_manager import BlobManager
 
 
 class TestBlobManager(AsyncioTestCase):
-    async def setup_blob_manager(self, save_blobs=True):
+    async def setup_blob_manager(self, save_blobs=True, shard_blob_dir=False):
         tmp_dir = tempfile.mkdtemp()
         self.addCleanup(lambda: shutil.rmtree(tmp_dir))
-        self.config = Config(save_blobs=save_blobs)
+        self.config = Config(save_blobs=save_blobs, shard_blob_dir=shard_blob_dir)
         self.storage = SQLiteStorage(self.config, os.path.join(tmp_dir, "lbrynet.sqlite"))
         self.blob_manager = BlobManager(self.loop, tmp_dir, self.storage, self.config)
         await self.storage.open()
@@ -67,3 +68,42 @@ class TestBlobManager(AsyncioTestCase):
                 await self.storage.run_and_return_one_or_none('select status from blob where blob_hash=?', blob_hash)
             )
         )
+
+    async def test_shard_blob_dir(self):
+        await self.setup_blob_manager(save_blobs=True)
+        known_hash, unknown_hash, missing_hash = ('%096x' % i for i in range(1, 4))
+        for blob_hash in (known_hash, unknown_hash):
+            with open(os.path.join(self.blob_manager.blob_dir, blob_hash), 'wb') as f:
+                f.write(b'1' * 100)
+        await self.storage.add_blobs((known_hash, 100, 0, 0), (missing_hash, 100, 0, 0), finished=True)
+
+        self.config.shard_blob_dir = True
+        await self.blob_manager.setup()
+        # finished blobs come from the database, files are only checked when a blob is needed
+        self.assertSetEqual({known_hash, missing_hash}, self.blob_manager.completed_blob_hashes)
+        self.assertTrue(self.blob_manager.get_blob(known_hash).get_is_verified())
+        await self.blob_manager._shard_task
+        self.assertSetEqual({known_hash, unknown_hash, missing_hash}, self.blob_manager.completed_blob_hashes)
+        self.assertTrue(os.path.isfile(os.path.join(self.blob_manager.blob_dir, '00', unknown_hash)))
+        self.assertEqual(
+            os.path.join(self.blob_manager.blob_dir, '00', known_hash), self.blob_manager.get_blob(known_hash).file_path
+        )
+        with self.blob_manager.get_blob(known_hash).reader_context() as reader:
+            self.assertEqual(b'1' * 100, reader.read())
+        self.assertFalse(self.blob_manager.get_blob(missing_hash).get_is_verified())
+        self.assertSetEqual({known_hash, unknown_hash}, self.blob_manager.completed_blob_hashes)
+        await asyncio.sleep(0.1)
+        self.assertEqual('pending', await self.storage.get_blob_status(missing_hash))
+
+        # new blobs are written into their shard and the directory stays sharded after a restart
+        blob = self.blob_manager.get_blob('ff' * 48, 100)
+        blob.save_verified_blob(b'2' * 100)
+        await blob.verified.wait()
+        await self.blob_manager.blob_completed(blob)
+        self.blob_manager.stop()
+        self.config.shard_blob_dir = False
+        await self.blob_manager.setup()
+        await self.blob_manager._shard_task
+        self.assertTrue(self.blob_manager.sharded)
+        self.assertTrue(os.path.isfile(os.path.join(self.blob_manager.blob_dir, 'ff', 'ff' * 48)))
+        self.assertSetEqual({known_hash, unknown_hash, 'ff' * 48}, self.blob_manager.completed_blob_hashes)
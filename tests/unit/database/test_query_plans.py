@@ -0,0 +1,236 @@
+import re
+import sqlite3
+import binascii
+from types import SimpleNamespace
+
+from lbry.testcase import AsyncioTestCase
+from lbry.conf import Config
+from lbry.schema.claim import Claim
+from lbry.blob.blob_info import BlobInfo
+from lbry.extras.daemon.storage import SQLiteStorage
+
+BLOBS = 1_000_000
+BLOBS_PER_STREAM = 100
+STREAMS = BLOBS // (BLOBS_PER_STREAM * 2)  # about half of the blobs belong to streams, the rest are network blobs
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+def blob_hash(i: int) -> str:
+    return '%096x' % i
+
+
+def stream_hash(i: int) -> str:
+    return '%096x' % (1 << 60 | i)
+
+
+def sd_hash(i: int) -> str:
+    return '%096x' % (1 << 61 | i)
+
+
+def claim_id(i: int) -> str:
+    return '%040x' % i
+
+
+def outpoint(i: int) -> str:
+    return '%064x:0' % i
+
+
+def make_claim(i: int) -> Claim:
+    claim = Claim()
+    claim.stream.source.sd_hash = sd_hash(i)
+    return claim
+
+
+def make_descriptor(i: int):
+    blobs = [
+        BlobInfo(position, 2097152, 'iv', 0, blob_hash(BLOBS + 1 + i * BLOBS_PER_STREAM + position))
+        for position in range(BLOBS_PER_STREAM)
+    ]
+    blobs.append(BlobInfo(BLOBS_PER_STREAM, 0, 'iv', 0))
+    return SimpleNamespace(
+        stream_hash=stream_hash(STREAMS + i), sd_hash=sd_hash(STREAMS + i), key='key', stream_name='name',
+        suggested_file_name='name', blobs=blobs
+    ), SimpleNamespace(blob_hash=sd_hash(STREAMS + i), length=512, added_on=0, is_mine=1)
+
+
+def fill_fixture(transaction: sqlite3.Connection):
+    """
+    Streams with BLOBS_PER_STREAM content blobs and a downloaded file each, a claim and support for every
+    stream and enough network blobs (not belonging to any stream) to make BLOBS blobs in total.
+    """
+    serialized = binascii.hexlify(make_claim(0).to_bytes()).decode()
+    transaction.executescript(f"""
+        insert into blob
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {BLOBS - STREAMS})
+        select printf('%096x', i), 2097152, i % 86400, i % 3 = 0, case when i % 10 then 'finished' else 'pending' end,
+               0, 0, i, i < {STREAMS * BLOBS_PER_STREAM} and i % 7 = 0
+        from n;
+
+        insert into blob
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS})
+        select printf('%096x', {1 << 61} | i), 512, i, 1, 'finished', 0, 0, i, 0 from n;
+
+        insert into stream
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS})
+        select printf('%096x', {1 << 60} | i), printf('%096x', {1 << 61} | i), 'key', 'name', 'name' from n;
+
+        insert into stream_blob
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS * BLOBS_PER_STREAM})
+        select printf('%096x', {1 << 60} | i / {BLOBS_PER_STREAM}), printf('%096x', i), i % {BLOBS_PER_STREAM}, 'iv'
+        from n;
+
+        insert into file
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS})
+        select printf('%096x', {1 << 60} | i), null, '66696c65', '646972', 0.0, 'stopped', 0, null, i from n;
+
+        insert into claim
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS})
+        select printf('%064x:0', i), printf('%040x', i), 'name', 1, i, '{serialized}',
+               case when i % 2 then printf('%040x', {STREAMS} + i % 100) else null end, 'address', 1
+        from n;
+
+        insert into content_claim
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS})
+        select printf('%096x', {1 << 60} | i), null, printf('%064x:0', i) from n;
+
+        insert into support
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS})
+        select printf('%064x:1', i), printf('%040x', i), 1, 'address' from n;
+
+        insert into reflected_stream
+        with recursive n(i) as (select 0 union all select i + 1 from n where i + 1 < {STREAMS})
+        select printf('%096x', {1 << 61} | i), 'reflector', i from n where i % 2;
+    """)
+
+
+class TestQueryPlans(AsyncioTestCase):
+    """
+    Runs every storage query against a database with a million blobs and fails when one of them reads
+    a whole table instead of searching an index.
+    """
+
+    async def asyncSetUp(self):
+        self.conf = Config()
+        self.storage = SQLiteStorage(self.conf, ':memory:')
+        await self.storage.open()
+        self.addCleanup(self.storage.close)
+        await self.storage.db.run(fill_fixture)
+        self.statements = []
+        await self.storage.db.run(lambda conn: conn.set_trace_callback(self.statements.append))
+
+    async def assertIndexed(self, storage_call, *scanned_tables):
+        """ Run a storage call and fail if any query it makes reads a whole table other than `scanned_tables`. """
+        self.statements.clear()
+        result = await storage_call
+        statements = [
+            statement for statement in self.statements
+            if statement.split(None, 1)[0].lower() in ('select', 'update', 'delete', 'insert')
+        ]
+        self.assertTrue(statements, "no queries were made")
+
+        def explain(conn: sqlite3.Connection):
+            conn.set_trace_callback(None)
+            try:
+                return [
+                    (statement, [row[3] for row in conn.execute(f"explain query plan {statement}")])
+                    for statement in statements
+                ]
+            finally:
+                conn.set_trace_callback(self.statements.append)
+
+        for statement, plan in await self.storage.db.run(explain):
+            for detail in plan:
+                scan = FULL_SCAN.match(detail)
+                if scan and scan.group(1) not in scanned_tables:
+                    self.fail(f"full scan of {scan.group(1)}:\n{statement}\n" + '\n'.join(plan))
+        return result
+
+    async def test_storage_queries_use_indexes(self):
+        # the fixture takes a while to make, so every query is checked against the same one
+        await self.check_blob_queries()
+        await self.check_stream_and_file_queries()
+        await self.check_claim_queries()
+        await self.check_peer_queries()
+
+    async def check_blob_queries(self):
+        storage = self.storage
+        await self.assertIndexed(storage.add_blobs((blob_hash(BLOBS), 10, 0, 1), finished=True))
+        await self.assertIndexed(storage.get_blob_status(blob_hash(1)))
+        await self.assertIndexed(storage.set_announce(blob_hash(1), blob_hash(2)))
+        await self.assertIndexed(storage.update_last_announced_blobs([blob_hash(1), blob_hash(2)]))
+        await self.assertIndexed(storage.should_single_announce_blobs([blob_hash(1)]))
+        await self.assertIndexed(storage.should_single_announce_blobs([blob_hash(1)], immediate=True))
+        for head_and_sd_only in (True, False):
+            self.conf.announce_head_and_sd_only = head_and_sd_only
+            self.assertEqual(
+                self.conf.concurrent_blob_announcers * 10,
+                len(await self.assertIndexed(storage.get_blobs_to_announce()))
+            )
+        await self.assertIndexed(storage.get_stored_blobs(is_mine=False, is_network_blob=True))
+        await self.assertIndexed(storage.get_stored_blobs(is_mine=True))
+        await self.assertIndexed(storage.get_stored_blobs(is_mine=False))
+        usage = await self.assertIndexed(storage.get_stored_blob_disk_usage())
+        self.assertGreater(usage['network_storage'], 0)
+        self.assertGreater(usage['content_storage'], 0)
+        self.assertGreater(usage['private_storage'], 0)
+        await self.assertIndexed(storage.update_blob_ownership(sd_hash(1), True))
+        self.assertEqual(BLOBS + 1, len(await self.assertIndexed(storage.get_all_blob_hashes())))
+        await self.assertIndexed(storage.sync_missing_blobs(set(await storage.get_all_blob_hashes())))
+        await self.assertIndexed(storage.get_finished_blob_hashes())
+        await self.assertIndexed(storage.set_blobs_pending([blob_hash(1)]))
+        await self.assertIndexed(storage.delete_blobs_from_db([blob_hash(BLOBS)]))
+
+    async def check_stream_and_file_queries(self):
+        storage = self.storage
+        self.assertTrue(await self.assertIndexed(storage.stream_exists(sd_hash(1))))
+        self.assertTrue(await self.assertIndexed(storage.file_exists(sd_hash(1))))
+        self.assertEqual(
+            BLOBS_PER_STREAM, len(await self.assertIndexed(storage.get_blobs_for_stream(stream_hash(1))))
+        )
+        await self.assertIndexed(storage.get_blobs_for_stream(stream_hash(1), only_completed=True))
+        await self.assertIndexed(storage.get_sd_blob_hash_for_stream(stream_hash(1)))
+        await self.assertIndexed(storage.get_stream_hash_for_sd_hash(sd_hash(1)))
+        self.assertEqual(STREAMS, len(await self.assertIndexed(storage.get_all_stream_hashes())))
+        descriptor, sd_blob = make_descriptor(0)
+        await self.assertIndexed(storage.store_stream(sd_blob, descriptor))
+        await self.assertIndexed(storage.save_downloaded_file(descriptor.stream_hash, None, None, 0.0))
+        await self.assertIndexed(storage.change_file_status(descriptor.stream_hash, 'running'))
+        await self.assertIndexed(storage.change_file_download_dir_and_file_name(descriptor.stream_hash, 'd', 'f'))
+        await self.assertIndexed(storage.set_saved_file(descriptor.stream_hash))
+        await self.assertIndexed(storage.clear_saved_file(descriptor.stream_hash))
+        await self.assertIndexed(storage.save_file_progress(descriptor.stream_hash, b'\x01'))
+        await self.assertIndexed(storage.get_file_progress(descriptor.stream_hash))
+        await self.assertIndexed(storage.clear_file_progress(descriptor.stream_hash))
+        await self.assertIndexed(storage.recover_streams([(descriptor, sd_blob, None)], self.conf.download_dir))
+        await self.assertIndexed(storage.delete_stream(descriptor))
+        # these read every file, there is one for each stream the user downloaded or published
+        await self.assertIndexed(storage.update_manually_removed_files_since_last_run(), 'file')
+        await self.assertIndexed(storage.stop_all_files(), 'file')
+        self.assertEqual(STREAMS, len(await self.assertIndexed(storage.get_all_lbry_files(), 'file')))
+        await self.assertIndexed(storage.update_reflected_stream(sd_hash(1), 'reflector'))
+        await self.assertIndexed(storage.update_reflected_stream(sd_hash(1), 'reflector', success=False))
+        await self.assertIndexed(storage.get_streams_to_re_reflect())
+
+    async def check_claim_queries(self):
+        storage = self.storage
+        claim = await self.assertIndexed(storage.get_content_claim(stream_hash(1)))
+        self.assertEqual(claim_id(1), claim['claim_id'])
+        self.assertEqual(1, len(claim['supports']))
+        await self.assertIndexed(storage.save_claims([{
+            'claim_id': claim_id(1), 'name': 'name', 'amount': '1.0', 'height': 1, 'address': 'address',
+            'claim_sequence': 2, 'value': make_claim(1), 'txid': '%064x' % STREAMS, 'nout': 0,
+            'supports': [{'txid': '%064x' % STREAMS, 'nout': 1, 'amount': '1.0'}],
+        }]))
+        await self.assertIndexed(storage.save_content_claim(stream_hash(1), '%064x:0' % STREAMS))
+        self.assertEqual(1, len(await self.assertIndexed(storage.get_supports(claim_id(1)))))
+        await self.assertIndexed(storage.save_torrent_content_claim('ab' * 20, outpoint(2), 1, 'name'))
+        await self.assertIndexed(storage.get_content_claim_for_torrent('ab' * 20))
+        await self.assertIndexed(storage.delete_torrent('ab' * 20))
+
+    async def check_peer_queries(self):
+        storage = self.storage
+        peer = SimpleNamespace(node_id=b'1' * 48, address='1.2.3.4', udp_port=4444, tcp_port=3333)
+        # the routing table is saved and loaded as a whole
+        await self.assertIndexed(storage.save_kademlia_peers([peer]), 'peer')
+        self.assertEqual(1, len(await self.assertIndexed(storage.get_persisted_kademlia_peers(), 'peer')))
@@ -190,3 +190,60 @@ class TestTemporarilyLosingConnection(AsyncioTestCase):
                 lambda: len(node.protocol.routing_table.get_peers()) >= num_seeds,
                 lambda: self.assertGreaterEqual(len(node.protocol.routing_table.get_peers()), num_seeds)
             )
+
+
+class TestSharedSearches(AsyncioTestCase):
+    async def asyncSetUp(self):
+        self.node = Node(self.loop, PeerManager(self.loop), constants.generate_id(), 4444, 4444, 3333, '1.2.3.4')
+        self.addCleanup(self.node.stop)
+        self.searches = []
+        self.peers = [make_kademlia_peer(constants.generate_id(i), f'1.2.3.{i}', 4444) for i in range(1, 4)]
+        self.node.get_iterative_node_finder = self.node.get_iterative_value_finder = self.get_finder
+
+    def get_finder(self, key, shortlist=None, max_results=constants.K):
+        self.searches.append((key, shortlist))
+
+        async def finder():
+            await asyncio.sleep(0.01)
+            yield self.peers
+        return finder()
+
+    async def test_node_searches_merged_and_cached(self):
+        key = constants.generate_id(10)
+        first, second = await asyncio.gather(self.node.peer_search(key), self.node.peer_search(key))
+        self.assertSetEqual(set(self.peers), set(first))
+        self.assertListEqual(first, second)
+        self.assertListEqual(first, await self.node.peer_search(key))
+        self.assertEqual(1, len(self.searches))
+        self.assertIsNone(self.searches[0][1])
+
+        # a key sharing a long prefix is searched starting from the cached peers
+        close_key = key[:2] + constants.generate_id(11)[2:]
+        await self.node.peer_search(close_key)
+        self.assertEqual((close_key, first), self.searches[1])
+        # searches from given peers are never shared
+        await self.node.peer_search(key, shortlist=self.peers)
+        self.assertEqual(3, len(self.searches))
+
+    async def test_value_searches_merged_and_replayed(self):
+        key = constants.generate_id(10)
+
+        async def search():
+            results = []
+            async for peers in self.node._search_value(key):
+                results.extend(peers)
+            return results
+
+        self.assertListEqual([self.peers, self.peers], await asyncio.gather(search(), search()))
+        self.assertListEqual(self.peers, await search())
+        self.assertEqual(1, len(self.searches))
+
+        # a search nothing waits for anymore is stopped and not reused
+        other_key = constants.generate_id(11)
+        consumer = asyncio.create_task(self.node._search_value(other_key).__anext__())
+        await asyncio.sleep(0)
+        task = self.node._value_searches[other_key].task
+        consumer.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertNotIn(other_key, self.node._value_searches)
@@ -0,0 +1,138 @@
+import json
+import asyncio
+from unittest import mock
+
+from aiohttp import web, ClientSession, WSMsgType, WSCloseCode
+
+from lbry.testcase import AsyncioTestCase
+from lbry.conf import Config
+from lbry.file.source import ManagedDownloadSource
+from lbry.file.source_manager import SourceManager
+from lbry.extras.daemon.components import FILE_MANAGER_COMPONENT
+from lbry.extras.daemon.events import EventManager, EventSubscriber, FILE_EVENT, HEADER_EVENT, TRANSACTION_EVENT
+
+
+class FakeSource(ManagedDownloadSource):
+    written_bytes = 0
+
+    def __init__(self, loop, sd_hash):
+        super().__init__(loop, Config(), None, sd_hash)
+
+
+class TestEventSubscriber(AsyncioTestCase):
+
+    def test_filters(self):
+        subscriber = EventSubscriber(None, 10)
+        self.assertFalse(subscriber.is_subscribed(FILE_EVENT, sd_hash='a'))
+        subscriber.subscribe()
+        self.assertTrue(subscriber.is_subscribed(FILE_EVENT, sd_hash='a'))
+        self.assertTrue(subscriber.is_subscribed(TRANSACTION_EVENT, account_ids=['x']))
+        subscriber.subscribe(sd_hash=['a'], claim_id=['c'], account_id=['x'])
+        self.assertTrue(subscriber.is_subscribed(FILE_EVENT, sd_hash='a'))
+        self.assertTrue(subscriber.is_subscribed(FILE_EVENT, sd_hash='b', claim_id='c'))
+        self.assertFalse(subscriber.is_subscribed(FILE_EVENT, sd_hash='b'))
+        self.assertTrue(subscriber.is_subscribed(TRANSACTION_EVENT, account_ids=['y', 'x']))
+        self.assertFalse(subscriber.is_subscribed(TRANSACTION_EVENT, account_ids=['y']))
+        self.assertTrue(subscriber.is_subscribed(HEADER_EVENT))
+        subscriber.unsubscribe(event_types=[HEADER_EVENT])
+        self.assertFalse(subscriber.is_subscribed(HEADER_EVENT))
+        subscriber.unsubscribe()
+        self.assertFalse(subscriber.is_subscribed(FILE_EVENT, sd_hash='a'))
+        with self.assertRaises(ValueError):
+            subscriber.subscribe(event_types=['balance'])
+
+    def test_snapshots_replace_pending_events(self):
+        subscriber = EventSubscriber(None, 3)
+        self.assertTrue(subscriber.push('header 1', HEADER_EVENT))
+        self.assertTrue(subscriber.push('blob'))
+        self.assertTrue(subscriber.push('header 2', HEADER_EVENT))
+        self.assertListEqual(['header 2', 'blob'], list(subscriber.pending.values()))
+        self.assertTrue(subscriber.push('blob'))
+        self.assertFalse(subscriber.push('blob'))
+
+
+class TestEventManager(AsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.conf = Config(websocket_max_pending_events=5)
+        self.source_manager = SourceManager(self.loop, self.conf, None)
+        file_manager = mock.Mock(source_managers={'stream': self.source_manager})
+        component_manager = mock.Mock()
+        component_manager.has_component = lambda name: name == FILE_MANAGER_COMPONENT
+        component_manager.get_component.return_value = file_manager
+        self.events = EventManager(self.conf, component_manager)
+        self.events.start()
+        self.addCleanup(self.events.stop)
+
+        app = web.Application()
+        app.router.add_get('/ws', self.events.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        self.addCleanup(runner.cleanup)
+        site = web.TCPSite(runner, 'localhost', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        session = ClientSession()
+        self.addCleanup(session.close)
+        self.ws = await session.ws_connect(f'http://localhost:{port}/ws')
+        self.addCleanup(self.ws.close)
+
+    async def receive(self):
+        return json.loads((await asyncio.wait_for(self.ws.receive(), 1)).data)
+
+    async def subscribe(self, **params):
+        await self.ws.send_json({'method': 'subscribe', 'params': params})
+        return await self.receive()
+
+    async def test_file_events(self):
+        source_a, source_b = FakeSource(self.loop, 'a'), FakeSource(self.loop, 'b')
+        self.source_manager.add(source_a)
+        self.source_manager.add(source_b)
+        response = await self.subscribe(event_types=[FILE_EVENT], sd_hash=['b'])
+        self.assertListEqual(['b'], response['subscription']['sd_hash'])
+        source_a.notify_update()
+        source_b.written_bytes = 10
+        source_b.notify_update()
+        event = await self.receive()
+        self.assertEqual(FILE_EVENT, event['event'])
+        self.assertEqual('b', event['data']['sd_hash'])
+        self.assertEqual(10, event['data']['written_bytes'])
+        self.assertEqual('stopped', event['data']['status'])
+
+    async def test_bad_request(self):
+        self.assertIn('balance', (await self.subscribe(event_types=['balance']))['error'])
+        await self.ws.send_str('derp')
+        self.assertIn('error', await self.receive())
+
+    async def test_slow_subscriber_disconnected(self):
+        await self.subscribe()
+        subscriber, = self.events.subscribers
+        # nothing is sent while the client isn't reading
+        subscriber.web_socket.send_str = lambda message: asyncio.sleep(10)
+        for i in range(6):
+            source = FakeSource(self.loop, str(i))
+            self.source_manager.add(source)
+            source.notify_update()
+        self.assertSetEqual(set(), self.events.subscribers)
+        msg = await asyncio.wait_for(self.ws.receive(), 1)
+        self.assertEqual(WSMsgType.CLOSE, msg.type)
+        self.assertEqual(WSCloseCode.TRY_AGAIN_LATER, msg.data)
+
+    async def test_transaction_events(self):
+        ledger = mock.Mock()
+        ledger.db.get_addresses = mock.AsyncMock(return_value=[{'account': 'x'}])
+        event = mock.Mock(address='address', tx=mock.Mock(id='txid', height=5))
+        await self.subscribe(event_types=[FILE_EVENT])
+        # nobody wants transaction events, so the accounts of the address aren't looked up
+        self.events._on_transaction(ledger, event)
+        self.assertSetEqual(set(), self.events._tasks)
+        ledger.db.get_addresses.assert_not_called()
+        await self.subscribe(event_types=[TRANSACTION_EVENT], account_id=['x'])
+        self.events._on_transaction(ledger, event)
+        self.assertEqual(1, len(self.events._tasks))
+        received = await self.receive()
+        self.assertEqual(TRANSACTION_EVENT, received['event'])
+        self.assertDictEqual(
+            {'txid': 'txid', 'height': 5, 'address': 'address', 'account_ids': ['x']}, received['data']
+        )
+        self.assertSetEqual(set(), self.events._tasks)
@@ -0,0 +1,79 @@
+import json
+from unittest import mock
+from aiohttp import ClientSession
+
+from lbry.testcase import AsyncioTestCase
+from lbry.conf import Config
+from lbry.extras.daemon.components import (
+    DATABASE_COMPONENT, DISK_SPACE_COMPONENT, BLOB_COMPONENT, WALLET_COMPONENT, DHT_COMPONENT,
+    HASH_ANNOUNCER_COMPONENT, FILE_MANAGER_COMPONENT, PEER_PROTOCOL_SERVER_COMPONENT,
+    UPNP_COMPONENT, EXCHANGE_RATE_MANAGER_COMPONENT, WALLET_SERVER_PAYMENTS_COMPONENT,
+    LIBTORRENT_COMPONENT, BACKGROUND_DOWNLOADER_COMPONENT, TRACKER_ANNOUNCER_COMPONENT
+)
+from lbry.extras.daemon.daemon import Daemon
+
+
+class TestJSONRPCBatch(AsyncioTestCase):
+
+    async def asyncSetUp(self):
+        conf = Config()
+        conf.data_dir = '/tmp'
+        conf.share_usage_data = False
+        conf.api = 'localhost:5299'
+        conf.api_batch_concurrency = 2
+        conf.components_to_skip = (
+            DATABASE_COMPONENT, DISK_SPACE_COMPONENT, BLOB_COMPONENT, WALLET_COMPONENT, DHT_COMPONENT,
+            HASH_ANNOUNCER_COMPONENT, FILE_MANAGER_COMPONENT, PEER_PROTOCOL_SERVER_COMPONENT,
+            UPNP_COMPONENT, EXCHANGE_RATE_MANAGER_COMPONENT, WALLET_SERVER_PAYMENTS_COMPONENT,
+            LIBTORRENT_COMPONENT, BACKGROUND_DOWNLOADER_COMPONENT, TRACKER_ANNOUNCER_COMPONENT
+        )
+        Daemon.component_attributes = {}
+        self.daemon = Daemon(conf)
+        await self.daemon.start()
+        self.addCleanup(self.daemon.stop)
+
+    async def post(self, data):
+        async with ClientSession() as session:
+            async with session.post('http://localhost:5299/lbryapi', json=data) as resp:
+                return resp.status, await resp.text()
+
+    async def test_single_request_unchanged(self):
+        status, text = await self.post({'method': 'version', 'params': {}, 'id': 1})
+        self.assertEqual(200, status)
+        self.assertIn('result', json.loads(text))
+
+    async def test_batch(self):
+        running, max_running = 0, 0
+        original = Daemon.jsonrpc_version
+
+        async def version(daemon):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await self.loop.run_in_executor(None, lambda: None)
+            running -= 1
+            return original(daemon)
+
+        with mock.patch.dict(Daemon.callable_methods, {'version': version}):
+            status, text = await self.post([
+                {'jsonrpc': '2.0', 'method': 'version', 'params': {}, 'id': 1},
+                {'jsonrpc': '2.0', 'method': 'not_a_method', 'params': {}, 'id': 'b'},
+                {'jsonrpc': '2.0', 'method': 'version', 'params': {}},
+                'not a request',
+                {'jsonrpc': '2.0', 'method': 'version', 'params': {'include_protobuf': True}, 'id': 3},
+            ])
+        self.assertEqual(200, status)
+        responses = json.loads(text)
+        self.assertListEqual([1, 'b', None, 3], [response['id'] for response in responses])
+        self.assertIn('lbrynet_version', responses[0]['result'])
+        self.assertEqual(-32601, responses[1]['error']['code'])
+        self.assertEqual(-32600, responses[2]['error']['code'])
+        self.assertIn('lbrynet_version', responses[3]['result'])
+        self.assertEqual(2, max_running)
+
+    async def test_empty_batch_and_notifications(self):
+        status, text = await self.post([])
+        self.assertEqual(-32600, json.loads(text)['error']['code'])
+        status, text = await self.post([{'jsonrpc': '2.0', 'method': 'version', 'params': {}}])
+        self.assertEqual(204, status)
+        self.assertEqual('', text)
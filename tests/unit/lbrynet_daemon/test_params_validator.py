@@ -0,0 +1,27 @@
+import unittest
+
+from lbry.extras.daemon.daemon import Daemon, ParamsValidator, requires
+
+
+class TestParamsValidator(unittest.TestCase):
+
+    def test_check(self):
+        @requires('wallet')
+        def method(self, claim_id, name=None, page=1):  # pylint: disable=unused-argument
+            pass
+
+        validator = ParamsValidator.get(method)
+        self.assertIs(validator, ParamsValidator.get(method))
+        self.assertEqual((None, None), validator.check((), {'claim_id': 'beef'}))
+        self.assertEqual((None, None), validator.check(('beef',), {'page': 2}))
+        self.assertEqual(('Duplicate parameters', ['claim_id']), validator.check(('beef',), {'claim_id': 'beef'}))
+        self.assertEqual(('Missing required parameters', ['claim_id']), validator.check((), {'name': 'foo'}))
+        self.assertEqual(('Extraneous parameters', ['foo']), validator.check((), {'claim_id': 'beef', 'foo': 1}))
+
+    def test_api_methods_compiled_with_daemon(self):
+        for method in Daemon.callable_methods.values():
+            self.assertIn(method, ParamsValidator._validators)
+        self.assertEqual(
+            ('Extraneous parameters', ['not_an_argument']),
+            Daemon._check_params(Daemon.jsonrpc_version, (), {'not_an_argument': 1})
+        )
@@ -0,0 +1,76 @@
+import asyncio
+from unittest import mock
+
+from lbry.testcase import AsyncioTestCase
+from lbry.conf import Config
+from lbry.stream.background_downloader import BackgroundDownloader
+
+
+class TestBackgroundDownloader(AsyncioTestCase):
+    async def asyncSetUp(self):
+        self.conf = Config(concurrent_background_downloads=2)
+        self.peers = {}
+        self.node = mock.Mock()
+        self.node.protocol.node_id = bytes(48)
+        self.node.protocol.data_store.get_peers_for_blob = lambda blob_hash: [None] * self.peers[blob_hash]
+        self.node.stored_blob_hashes = self.peers.keys()
+        self.blob_manager = mock.Mock(completed_blob_hashes=set())
+        self.downloader = BackgroundDownloader(self.conf, None, self.blob_manager, self.node)
+        self.addCleanup(self.downloader.stop_downloads)
+
+    def add_stored_hash(self, prefix: bytes, peers: int = 1) -> str:
+        blob_hash = prefix + bytes(48 - len(prefix) - 1) + bytes([len(self.peers)])
+        self.peers[blob_hash] = peers
+        return blob_hash.hex()
+
+    def test_candidates_ranked_by_distance_then_popularity(self):
+        far = self.add_stored_hash(b'\x00\x40', peers=10)
+        close_unpopular = self.add_stored_hash(b'\x00\x01', peers=1)
+        close_popular = self.add_stored_hash(b'\x00\x01', peers=5)
+        self.add_stored_hash(b'\x80', peers=50)  # doesn't share enough prefix bits with the node id
+        completed = self.add_stored_hash(b'\x00\x00\x01')
+        self.blob_manager.completed_blob_hashes.add(completed)
+        self.assertListEqual([close_popular, close_unpopular, far], self.downloader.get_candidates())
+
+    async def test_failed_downloads_are_not_retried_every_tick(self):
+        first = self.add_stored_hash(b'\x00\x01')
+        second = self.add_stored_hash(b'\x00\x02')
+        attempts = []
+
+        async def download_blobs(sd_hash):
+            attempts.append(sd_hash)
+            if sd_hash == first:
+                raise Exception("no peers")
+            return True
+
+        self.downloader._download_blobs = download_blobs
+        self.downloader.download_next_blobs()
+        while self.downloader.is_busy:
+            await asyncio.sleep(0)
+        self.assertSetEqual({first, second}, set(attempts))
+        self.assertSetEqual({second}, self.downloader.completed)
+        self.assertEqual(1, self.downloader.failed[first][0])
+        self.downloader.download_next_blobs()
+        self.assertFalse(self.downloader.is_busy)
+        self.assertListEqual([], self.downloader.get_candidates())
+
+    async def test_concurrency_and_quota(self):
+        for i in range(5):
+            self.add_stored_hash(b'\x00' + bytes([i + 1]))
+        finished = asyncio.Event()
+
+        async def download_blobs(_):
+            await finished.wait()
+            return True
+
+        self.downloader._download_blobs = download_blobs
+        self.downloader.space_available = 0
+        self.downloader.download_next_blobs()
+        self.assertFalse(self.downloader.is_busy)
+        self.downloader.space_available = 1024
+        self.downloader.download_next_blobs()
+        self.assertEqual(2, len(self.downloader.ongoing_downloads))
+        self.downloader.download_next_blobs()
+        self.assertEqual(2, len(self.downloader.ongoing_downloads))
+        self.downloader.stop_downloads()
+        self.assertFalse(self.downloader.is_busy)
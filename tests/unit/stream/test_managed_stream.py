@@ -115,6 +115,44 @@ class TestManagedStream(BlobExchangeTestBase):
         self.assertEqual(self.stream.status, "finished")
         self.assertFalse(self.stream._running.is_set())
 
+    async def test_transfer_stream_read_ahead(self):
+        self.client_config.save_file_read_ahead = 4
+        await self._test_transfer_stream(10)
+        self.assertEqual(self.stream.status, "finished")
+        self.assertIsNone(await self.client_storage.get_file_progress(self.stream.stream_hash))
+
+    async def test_resume_saving_file(self):
+        await self._test_transfer_stream(10)
+        full_path = self.stream.full_path
+        last_blob = self.stream.descriptor.blobs[-2]
+        # simulate an interrupted save that wrote every blob but the last one
+        written_blobs = bytearray(2)
+        for blob_num in range(last_blob.blob_num):
+            written_blobs[blob_num >> 3] |= 1 << (blob_num & 7)
+        await self.client_storage.save_file_progress(self.stream.stream_hash, written_blobs)
+        with open(full_path, 'r+b') as f:
+            f.truncate(last_blob.blob_num * (MAX_BLOB_SIZE - 1))
+        self.stream.written_blobs = bytes(written_blobs)
+        self.assertFalse(self.stream.completed)
+
+        read_blobs = []
+        read_blob = self.stream.downloader.read_blob
+
+        async def _read_blob(blob_info, connection_id=0):
+            read_blobs.append(blob_info.blob_num)
+            return await read_blob(blob_info, connection_id)
+
+        self.stream.downloader.read_blob = _read_blob
+        await self.stream.save_file()
+        await self.stream.finished_write_attempt.wait()
+        self.assertEqual(read_blobs, [last_blob.blob_num])
+        self.assertEqual(self.stream.full_path, full_path)
+        self.assertTrue(self.stream.completed)
+        self.assertIsNone(await self.client_storage.get_file_progress(self.stream.stream_hash))
+        with open(full_path, 'rb') as f:
+            self.assertEqual(f.read(), self.stream_bytes)
+        await self.stream.stop()
+
     @unittest.SkipTest
     async def test_transfer_hundred_blob_stream(self):
         await self._test_transfer_stream(100)
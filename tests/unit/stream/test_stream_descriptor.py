@@ -47,6 +47,25 @@ class TestStreamDescriptor(AsyncioTestCase):
         descriptor = await self.blob_manager.get_stream_descriptor(self.sd_hash)
         self.assertEqual(descriptor.calculate_sd_hash(), self.sd_hash)
 
+    async def test_descriptor_cached_until_sd_blob_deleted(self):
+        self._write_sd()
+        descriptor = await self.blob_manager.get_stream_descriptor(self.sd_hash)
+        # the file is not read again
+        with open(os.path.join(self.tmp_dir, self.sd_hash), 'wb') as f:
+            f.write(b'not json')
+        cached = await self.blob_manager.get_stream_descriptor(self.sd_hash)
+        self.assertIsNot(descriptor, cached)
+        self.assertIsNot(descriptor.blobs[0], cached.blobs[0])
+        self.assertEqual(descriptor.as_json(), cached.as_json())
+        self.assertEqual(self.sd_hash, cached.sd_hash)
+        self.assertEqual(self.tmp_dir, cached.blob_dir)
+
+        self.blob_manager.delete_blob(self.sd_hash)
+        with open(os.path.join(self.tmp_dir, self.sd_hash), 'wb') as f:
+            f.write(b'not json')
+        with self.assertRaises(InvalidStreamDescriptorError):
+            await self.blob_manager.get_stream_descriptor(self.sd_hash)
+
     async def test_missing_terminator(self):
         self.sd_dict['blobs'].pop()
         await self._test_invalid_sd()
@@ -308,7 +308,9 @@ class TestStreamManager(BlobExchangeTestBase):
 
         self.assertFalse(stream.finished)
         self.assertFalse(stream.running)
-        self.assertFalse(os.path.isfile(os.path.join(self.client_dir, "test_file")))
+        # the partially written file is kept to resume saving it
+        self.assertTrue(os.path.isfile(os.path.join(self.client_dir, "test_file")))
+        self.assertIsNotNone(await self.client_storage.get_file_progress(stream_hash))
         stored_status = await self.client_storage.run_and_return_one_or_none(
             "select status from file where stream_hash=?", stream_hash
         )
@@ -320,7 +322,9 @@ class TestStreamManager(BlobExchangeTestBase):
         await asyncio.sleep(0)
         self.assertTrue(stream.finished)
         self.assertFalse(stream.running)
+        self.assertEqual(stream.file_name, "test_file")
         self.assertTrue(os.path.isfile(os.path.join(self.client_dir, "test_file")))
+        self.assertIsNone(await self.client_storage.get_file_progress(stream_hash))
         stored_status = await self.client_storage.run_and_return_one_or_none(
             "select status from file where stream_hash=?", stream_hash
         )
@@ -335,6 +339,29 @@ class TestStreamManager(BlobExchangeTestBase):
         self.assertIsNone(stored_status)
         self.assertListEqual(expected_events, received)
 
+    async def test_get_resumes_stopped_save(self):
+        await self.setup_stream_manager()
+        stream = await self.file_manager.download_from_uri(self.uri, self.exchange_rate_manager)
+        await stream.started_writing.wait()
+        await stream.stop()
+        self.assertTrue(stream.output_file_exists)
+        self.assertFalse(stream.completed)
+        self.assertTrue(stream.output_file_needs_saving)
+
+        with mock.patch.object(stream, 'save_file', wraps=stream.save_file) as save_file:
+            self.assertIs(stream, await self.file_manager.download_from_uri(self.uri, self.exchange_rate_manager))
+        save_file.assert_called_once()
+        self.assertEqual("test_file", stream.file_name)
+        await stream.finished_writing.wait()
+        self.assertTrue(stream.completed)
+        self.assertFalse(stream.output_file_needs_saving)
+        self.assertIsNone(await self.client_storage.get_file_progress(stream.stream_hash))
+
+        # a saved file isn't written again
+        with mock.patch.object(stream, 'save_file', wraps=stream.save_file) as save_file:
+            await self.file_manager.download_from_uri(self.uri, self.exchange_rate_manager)
+        save_file.assert_not_called()
+
     async def _test_download_error_on_start(self, expected_error, timeout=None):
         error = None
         try:
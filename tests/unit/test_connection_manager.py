@@ -0,0 +1,47 @@
+from unittest import mock
+
+from lbry.testcase import AsyncioTestCase
+from lbry.connection_manager import ConnectionManager
+
+
+class TestConnectionManager(AsyncioTestCase):
+
+    async def test_rates_computed_when_status_is_read(self):
+        manager = ConnectionManager(self.loop)
+        with mock.patch('time.perf_counter', return_value=100.0) as perf_counter:
+            manager.start()
+            self.addCleanup(manager.stop)
+            outgoing = manager.connection_made('1.2.3.4:3333')
+            incoming = manager.connection_received('1.2.3.5:4444')
+            closed = manager.connection_received('1.2.3.6:4444')
+            outgoing.sent, outgoing.received = 100, 2_000_000
+            incoming.sent, incoming.received = 1_000_000, 50
+            closed.sent = 3_000_000
+            manager.connection_lost(closed)
+            self.assertSetEqual({outgoing, incoming}, manager.connections)
+
+            perf_counter.return_value = 102.0
+            status = manager.status
+            self.assertDictEqual({'1.2.3.4:3333': 1_000_000.0, '1.2.3.5:4444': 25.0}, status['incoming_bps'])
+            self.assertDictEqual({'1.2.3.4:3333': 50.0, '1.2.3.5:4444': 500_000.0}, status['outgoing_bps'])
+            self.assertEqual(4_000_100, status['total_sent'])
+            self.assertEqual(2_000_050, status['total_received'])
+            self.assertEqual(2.00005, status['total_outgoing_mbs'])
+            self.assertEqual(1.000025, status['total_incoming_mbs'])
+
+            # nothing is recomputed when the status is read again right away
+            incoming.received += 1_000_000
+            perf_counter.return_value = 102.05
+            self.assertEqual(2_000_050, manager.status['total_received'])
+
+            perf_counter.return_value = 104.0
+            status = manager.status
+            self.assertDictEqual({'1.2.3.5:4444': 500_000.0}, status['incoming_bps'])
+            self.assertDictEqual({}, status['outgoing_bps'])
+            self.assertEqual(3_000_050, status['total_received'])
+            self.assertEqual(0.0, status['total_outgoing_mbs'])
+            self.assertEqual(2.00005, status['max_outgoing_mbs'])
+
+        manager.stop()
+        self.assertDictEqual({}, manager.status)
+        self.assertSetEqual(set(), manager.connections)
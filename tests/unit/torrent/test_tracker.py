@@ -1,3 +1,4 @@
+import time
 import asyncio
 import random
 
@@ -51,6 +52,54 @@ class UDPTrackerClientTestCase(AsyncioTestCase):
         peers = await queue.get()
         self.assertEqual(peers, [KademliaPeer('127.0.0.1', None, None, 4444, allow_localhost=True)])
 
+    async def wait_for_peers(self, server, count):
+        async def peers():
+            while len(server.peers) < count:
+                await asyncio.sleep(0.05)
+        await asyncio.wait_for(peers(), 5)
+
+    async def test_scheduled_announces(self):
+        first_server = self.servers[59990]
+        info_hashes = [random.getrandbits(160).to_bytes(20, "big", signed=False) for _ in range(3)]
+        self.client.add_announce(*info_hashes)
+        await self.wait_for_peers(first_server, 3)
+        # next announcements are scheduled after the interval given by the tracker
+        due = self.client._due[("127.0.0.1", 59990)]
+        self.assertEqual(3, len(due))
+        self.assertTrue(all(next_announcement > time.time() + 1000 for next_announcement, _, _ in due))
+
+        # a tracker added later gets every announced hash except the removed one, without announcing to the first again
+        first_server.known_conns.clear()  # fails if the first tracker is asked again
+        self.client.remove_announce(info_hashes[0])
+        await self.add_server()
+        second_server = self.servers[59991]
+        await self.wait_for_peers(second_server, 2)
+        await asyncio.sleep(0.1)
+        self.assertSetEqual(set(info_hashes[1:]), set(second_server.peers))
+        self.assertEqual(3, len(due))
+
+        # removed hashes are dropped from the schedule and can be added back
+        self.client.add_announce(info_hashes[0])
+        await self.wait_for_peers(second_server, 3)
+
+    async def test_announces_rate_limited_per_tracker(self):
+        self.client.announces_per_second = 2
+        server = self.servers[59990]
+        self.client.add_announce(*[random.getrandbits(160).to_bytes(20, "big", signed=False) for _ in range(5)])
+        await self.wait_for_peers(server, 2)
+        await asyncio.sleep(0.2)
+        self.assertEqual(2, len(server.peers))
+        await self.wait_for_peers(server, 5)
+
+    def test_expired_results_evicted(self):
+        old, new = b'1' * 20, b'2' * 20
+        tracker, other_tracker = ('127.0.0.1', 59990), ('127.0.0.1', 59991)
+        self.client._set_result(tracker, old, time.time() - 1, None)
+        self.client._set_result(other_tracker, old, time.time() - 1, None)
+        self.client._set_result(tracker, new, time.time() + 60, None)
+        self.assertDictEqual({tracker: {new: (self.client.results[tracker][new][0], None)}}, self.client.results)
+        self.assertEqual(1, len(self.client._results_expiry))
+
     async def test_error(self):
         info_hash = random.getrandbits(160).to_bytes(20, "big", signed=False)
         await self.client.get_peer_list(info_hash)
@@ -1,11 +1,16 @@
 import asyncio
+from unittest import mock
 from binascii import hexlify
 from lbry.testcase import AsyncioTestCase
+from lbry.schema.claim import Claim
 from lbry.wallet import (
-    Wallet, Ledger, Database, Headers,
+    Wallet, Ledger, Database, Headers, Output,
     Account, SingleKey, HierarchicalDeterministic,
     DeterministicChannelKeyManager
 )
+from lbry.wallet.constants import CENT
+
+from tests.unit.wallet.test_transaction import get_transaction
 
 
 class TestAccount(AsyncioTestCase):
@@ -61,6 +66,37 @@ class TestAccount(AsyncioTestCase):
         records = await account.receiving.get_address_records()
         self.assertEqual(len(records), 201)
 
+    async def test_generate_keys_in_worker_batches(self):
+        account = Account.generate(self.ledger, Wallet(), 'lbryum')
+        with mock.patch.object(HierarchicalDeterministic, 'DERIVATION_BATCH_SIZE', 7):
+            async with account.receiving.address_generator_lock:
+                addresses = await account.receiving._generate_keys(0, 29)
+        self.assertListEqual(addresses, [account.receiving.public_key.child(n).address for n in range(30)])
+        records = await account.receiving.get_address_records(order_by="n asc")
+        self.assertListEqual([r['pubkey'].n for r in records], list(range(30)))
+        self.assertListEqual([r['address'] for r in records], addresses)
+
+    async def test_max_gap_tracking(self):
+        account = Account.generate(self.ledger, Wallet(), 'lbryum')
+        async with account.receiving.address_generator_lock:
+            addresses = await account.receiving._generate_keys(0, 19)
+        self.assertEqual(await account.receiving.get_max_gap(), 0)
+        await self.ledger.db.set_address_history(addresses[3], [('a', 1)])
+        self.assertEqual(await account.receiving.get_max_gap(), 3)
+        await self.ledger.db.set_address_history(addresses[10], [('a', 1)])
+        self.assertEqual(await account.receiving.get_max_gap(), 6)
+        await self.ledger.db.set_address_history(addresses[4], [('a', 1), ('b', 2)])
+        self.assertEqual(await account.receiving.get_max_gap(), 5)
+        # splitting the largest gap
+        await self.ledger.db.set_address_history(addresses[7], [('a', 1)])
+        self.assertEqual(await account.receiving.get_max_gap(), 3)
+        await self.ledger.db.set_address_history(addresses[0], [('a', 1)])
+        self.assertEqual(await account.receiving.get_max_gap(), 2)
+        # reorg leaving an address unused
+        await self.ledger.db.set_address_history(addresses[7], [])
+        self.assertEqual(await account.receiving.get_max_gap(), 5)
+        self.assertEqual(await account.change.get_max_gap(), 0)
+
     async def test_ensure_address_gap(self):
         account = Account.generate(self.ledger, Wallet(), 'lbryum')
 
@@ -91,12 +127,12 @@ class TestAccount(AsyncioTestCase):
 
         # case #2: only one new addressed needed
         records = await account.receiving.get_address_records()
-        await self.ledger.db.set_address_history(records[0]['address'], 'a:1:')
+        await self.ledger.db.set_address_history(records[0]['address'], [('a', 1)])
         new_keys = await account.receiving.ensure_address_gap()
         self.assertEqual(len(new_keys), 1)
 
         # case #3: 20 addresses needed
-        await self.ledger.db.set_address_history(new_keys[0], 'a:1:')
+        await self.ledger.db.set_address_history(new_keys[0], [('a', 1)])
         new_keys = await account.receiving.ensure_address_gap()
         self.assertEqual(len(new_keys), 20)
 
@@ -302,7 +338,7 @@ class TestSingleKeyAccount(AsyncioTestCase):
             'chain': 0,
             'account': account.public_key.address,
             'address': account.public_key.address,
-            'history': None,
+            'status': None,
             'used_times': 0
         }])
         self.assertEqual(
@@ -316,7 +352,7 @@ class TestSingleKeyAccount(AsyncioTestCase):
 
         # case #2: after use, still no new address needed
         records = await account.receiving.get_address_records()
-        await self.ledger.db.set_address_history(records[0]['address'], 'a:1:')
+        await self.ledger.db.set_address_history(records[0]['address'], [('a', 1)])
         empty = await account.receiving.ensure_address_gap()
         self.assertEqual(len(empty), 0)
 
@@ -329,7 +365,7 @@ class TestSingleKeyAccount(AsyncioTestCase):
         address1 = await account.receiving.get_or_create_usable_address()
         self.assertIsNotNone(address1)
 
-        await self.ledger.db.set_address_history(address1, 'a:1:b:2:c:3:')
+        await self.ledger.db.set_address_history(address1, [('a', 1), ('b', 2), ('c', 3)])
         records = await account.receiving.get_address_records()
         self.assertEqual(records[0]['used_times'], 3)
 
@@ -508,3 +544,59 @@ class AccountEncryptionTests(AsyncioTestCase):
         self.assertFalse(encrypted['private_key'])
         account.encrypt('password')
         account.decrypt('password')
+
+
+class TestDeterministicChannelKeys(AsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.ledger = Ledger({
+            'db': Database(':memory:'),
+            'headers': Headers(':memory:')
+        })
+        await self.ledger.db.open()
+        self.account = Account.generate(self.ledger, Wallet(), 'lbryum')
+        await self.account.ensure_address_gap()
+
+    async def asyncTearDown(self):
+        await self.ledger.db.close()
+
+    async def save_channels(self, keys):
+        address = await self.account.receiving.get_or_create_usable_address()
+        pubkey_hash = self.ledger.address_to_hash160(address)
+        for key in keys:
+            claim = Claim()
+            claim.channel.public_key_bytes = key.public_key.pubkey_bytes
+            tx = get_transaction(Output.pay_claim_name_pubkey_hash(CENT, '@foo', claim, pubkey_hash))
+            await self.ledger.db.insert_transaction(tx)
+            await self.ledger.db.save_transaction_io(tx, address, pubkey_hash)
+
+    async def test_cache_primed_in_growing_batches(self):
+        keys = self.account.deterministic_channel_keys
+        await self.save_channels([keys.private_key.child(n) for n in range(50)])
+        keys = DeterministicChannelKeyManager(self.account)
+        with mock.patch.object(self.ledger.db, 'get_used_channel_public_key_ids',
+                               wraps=self.ledger.db.get_used_channel_public_key_ids) as lookup:
+            await keys.ensure_cache_primed()
+        self.assertEqual(50, keys.last_known)
+        # batches of 1, 2, 4, 8, 16 and 32 keys instead of one lookup per key
+        self.assertEqual(6, lookup.call_count)
+        for n in range(51):
+            address = keys.private_key.child(n).address
+            self.assertEqual(address, keys.get_private_key_from_pubkey_hash(address).address)
+        # the first unused key is handed out until a channel is made with it
+        next_key = await keys.generate_next_key()
+        self.assertEqual(keys.private_key.child(50).address, next_key.address)
+        self.assertEqual(next_key.address, (await keys.generate_next_key()).address)
+        self.assertEqual(50, keys.last_known)
+        await self.save_channels([next_key])
+        self.assertEqual(keys.private_key.child(51).address, (await keys.generate_next_key()).address)
+        self.assertEqual(51, keys.last_known)
+
+    async def test_keys_of_other_accounts_not_used(self):
+        other = Account.generate(self.ledger, Wallet(), 'lbryum')
+        other.deterministic_channel_keys._private_key = self.account.deterministic_channel_keys.private_key
+        await self.save_channels([self.account.deterministic_channel_keys.private_key.child(0)])
+        await other.deterministic_channel_keys.ensure_cache_primed()
+        self.assertEqual(0, other.deterministic_channel_keys.last_known)
+        await self.account.deterministic_channel_keys.ensure_cache_primed()
+        self.assertEqual(1, self.account.deterministic_channel_keys.last_known)
@@ -0,0 +1,123 @@
+from unittest import mock
+
+from lbry.testcase import AsyncioTestCase
+from lbry.wallet import Wallet, Account, Ledger, Database, Headers, Transaction, Output, Input
+from lbry.wallet.constants import COIN, CENT
+from lbry.wallet.bulk import BulkSpend
+from lbry.wallet.rpc import RPCError
+from lbry.crypto.hash import sha256
+
+from tests.unit.wallet.test_transaction import get_output
+
+
+class TestBulkSpend(AsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.ledger = Ledger({
+            'db': Database(':memory:'),
+            'headers': Headers(':memory:')
+        })
+        await self.ledger.db.open()
+        self.addCleanup(self.ledger.db.close)
+        self.account = Account.generate(self.ledger, Wallet(), 'lbryum')
+        await self.account.ensure_address_gap()
+        self.broadcasts = []
+        self.ledger.broadcast = self.broadcast
+        self.bulk = BulkSpend(self.ledger, [self.account], self.account, batch_size=2)
+        self.bulk.RETRY_DELAY = 0
+
+    async def broadcast(self, tx):
+        self.broadcasts.append(tx.id)
+
+    async def create_utxo(self, amount):
+        address = await self.account.receiving.get_or_create_usable_address()
+        to_hash = Ledger.address_to_hash160(address)
+        tx = Transaction(height=1, is_verified=True) \
+            .add_inputs([Input.spend(get_output(1, sha256(str(amount).encode())))]) \
+            .add_outputs([get_output(amount, to_hash)])
+        await self.ledger.db.insert_transaction(tx)
+        await self.ledger.db.save_transaction_io(tx, address, to_hash)
+        return tx.outputs[0]
+
+    def payments(self, count, amount=CENT):
+        return [Output.pay_pubkey_hash(amount, bytes([i]) * 20) for i in range(count)]
+
+    def assertFunded(self, tx: Transaction):
+        self.assertGreaterEqual(tx.input_sum - tx.output_sum, tx.size * self.ledger.fee_per_byte)
+        for txi in tx.inputs:
+            self.assertNotEqual(Input.NULL_SIGNATURE, txi.script.values['signature'])
+
+    async def get_reserved(self):
+        return {
+            txo.id for txo in await self.ledger.db.get_txos(is_reserved=True, wallet=self.account.wallet)
+        }
+
+    async def test_pay_from_one_reservation_with_fan_out(self):
+        utxo = await self.create_utxo(10*COIN)
+        txs = await self.bulk.pay(self.payments(5))
+        fan_out, *payouts = txs
+        self.assertEqual(3, len(payouts))
+        self.assertListEqual([utxo.id], [txi.txo_ref.id for txi in fan_out.inputs])
+        # one funding output per batch, plus change
+        self.assertEqual(4, len(fan_out.outputs))
+        for i, tx in enumerate(payouts):
+            self.assertListEqual([f'{fan_out.id}:{i}'], [txi.txo_ref.id for txi in tx.inputs])
+            self.assertFunded(tx)
+        self.assertFunded(fan_out)
+        self.assertListEqual([2, 2, 1], [len(tx.outputs) for tx in payouts])
+        self.assertEqual({utxo.id}, await self.get_reserved())
+        self.assertEqual(4, self.bulk.progress.signed)
+
+        await self.bulk.broadcast(txs)
+        self.assertEqual(fan_out.id, self.broadcasts[0])
+        self.assertSetEqual({tx.id for tx in txs}, set(self.broadcasts))
+        self.assertEqual(4, self.bulk.progress.broadcast)
+
+    async def test_pay_batches_funded_directly(self):
+        utxos = [await self.create_utxo(COIN + i) for i in range(3)]
+        txs = await self.bulk.pay(self.payments(5, 45*CENT))
+        self.assertEqual(3, len(txs))
+        self.assertSetEqual({utxo.id for utxo in utxos}, {tx.inputs[0].txo_ref.id for tx in txs})
+        for tx in txs:
+            self.assertEqual(1, len(tx.inputs))
+            self.assertFunded(tx)
+
+    async def test_consolidate(self):
+        utxos = [await self.create_utxo(amount*COIN) for amount in range(1, 6)]
+        txs = await self.bulk.consolidate(utxos)
+        self.assertListEqual([2, 2, 1], [len(tx.inputs) for tx in txs])
+        for tx in txs:
+            self.assertEqual(1, len(tx.outputs))
+            self.assertFunded(tx)
+        self.assertSetEqual({utxo.id for utxo in utxos}, await self.get_reserved())
+        await self.bulk.release(txs)
+        self.assertSetEqual(set(), await self.get_reserved())
+
+    async def test_broadcast_retries_and_releases_failures(self):
+        await self.create_utxo(10*COIN)
+        fan_out, *payouts = await self.bulk.pay(self.payments(4))
+        attempts = []
+
+        async def broadcast(tx):
+            attempts.append(tx.id)
+            if tx.id == fan_out.id and attempts.count(tx.id) < 3:
+                raise ConnectionError()
+            if tx.id == payouts[0].id:
+                raise RPCError(1, 'bad-txns')
+
+        self.ledger.broadcast = broadcast
+        with self.assertRaises(RPCError):
+            await self.bulk.broadcast([fan_out] + payouts)
+        self.assertEqual(3, attempts.count(fan_out.id))
+        self.assertEqual(2, self.bulk.progress.broadcast)
+        self.assertEqual(1, self.bulk.progress.failed)
+
+    async def test_children_of_failed_broadcast_fail(self):
+        utxo = await self.create_utxo(10*COIN)
+        txs = await self.bulk.pay(self.payments(4))
+        self.ledger.broadcast = mock.AsyncMock(side_effect=RPCError(1, 'bad-txns'))
+        with self.assertRaises(RPCError):
+            await self.bulk.broadcast(txs)
+        self.assertEqual(1, self.ledger.broadcast.call_count)
+        self.assertEqual(3, self.bulk.progress.failed)
+        self.assertNotIn(utxo.id, await self.get_reserved())
@@ -4,17 +4,20 @@ import unittest
 import sqlite3
 import tempfile
 import asyncio
+from unittest import mock
 from concurrent.futures.thread import ThreadPoolExecutor
 
 from lbry.wallet import (
-    Wallet, Account, Ledger, Database, Headers, Transaction, Input
+    Wallet, Account, Ledger, Database, Headers, Transaction, Input, Output
 )
 from lbry.wallet.constants import COIN
-from lbry.wallet.database import query, interpolate, constraints_to_sql, AIOSQLite
+from lbry.wallet.database import query, interpolate, constraints_to_sql, AIOSQLite, SPENDABLE_UTXOS_QUERY
+from binascii import hexlify
 from lbry.crypto.hash import sha256
 from lbry.testcase import AsyncioTestCase
+from lbry.schema.claim import Claim
 
-from tests.unit.wallet.test_transaction import get_output, NULL_HASH
+from tests.unit.wallet.test_transaction import get_output, get_transaction, NULL_HASH
 
 
 class TestAIOSQLite(AsyncioTestCase):
@@ -230,7 +233,7 @@ class TestQueries(AsyncioTestCase):
             .add_inputs([self.txi(self.txo(1, sha256(str(height).encode())))]) \
             .add_outputs([self.txo(1, to_hash)])
         await self.ledger.db.insert_transaction(tx)
-        await self.ledger.db.save_transaction_io(tx, to_address, to_hash, '')
+        await self.ledger.db.save_transaction_io(tx, to_address, to_hash)
         return tx
 
     async def create_tx_from_txo(self, txo, to_account, height):
@@ -242,8 +245,8 @@ class TestQueries(AsyncioTestCase):
             .add_inputs([self.txi(txo)]) \
             .add_outputs([self.txo(1, to_hash)])
         await self.ledger.db.insert_transaction(tx)
-        await self.ledger.db.save_transaction_io(tx, from_address, from_hash, '')
-        await self.ledger.db.save_transaction_io(tx, to_address, to_hash, '')
+        await self.ledger.db.save_transaction_io(tx, from_address, from_hash)
+        await self.ledger.db.save_transaction_io(tx, to_address, to_hash)
         return tx
 
     async def create_tx_to_nowhere(self, txo, height):
@@ -254,7 +257,7 @@ class TestQueries(AsyncioTestCase):
             .add_inputs([self.txi(txo)]) \
             .add_outputs([self.txo(1, to_hash)])
         await self.ledger.db.insert_transaction(tx)
-        await self.ledger.db.save_transaction_io(tx, from_address, from_hash, '')
+        await self.ledger.db.save_transaction_io(tx, from_address, from_hash)
         return tx
 
     def txo(self, amount, address):
@@ -392,6 +395,93 @@ class TestQueries(AsyncioTestCase):
     async def test_empty_history(self):
         self.assertEqual((None, []), await self.ledger.get_local_status_and_history(''))
 
+    async def test_address_history(self):
+        account = await self.create_account()
+        address1, address2 = await account.receiving.get_addresses(limit=2, order_by='n')
+        db = self.ledger.db
+        status = await db.set_address_history(address1, [('a', 1), ('b', 2), ('c', 3)])
+        self.assertEqual(hexlify(sha256(b'a:1:b:2:c:3:')).decode(), status)
+        # a reorganization moving the last transaction and adding another one
+        status = await db.set_address_history(address1, [('a', 1), ('b', 2), ('c', 4), ('d', 4)])
+        self.assertEqual(hexlify(sha256(b'a:1:b:2:c:4:d:4:')).decode(), status)
+        self.assertEqual([('a', 1), ('b', 2), ('c', 4), ('d', 4)], await db.get_address_history(address1))
+        self.assertEqual(4, (await db.get_address(address=address1))['used_times'])
+        await db.set_address_history(address1, [('a', 1)])
+        self.assertEqual((hexlify(sha256(b'a:1:')).decode(), [('a', 1)]),
+                         await self.ledger.get_local_status_and_history(address1))
+        self.assertEqual(
+            {address1: hexlify(sha256(b'a:1:')).decode(), address2: None},
+            await db.get_address_statuses([address1, address2, 'unknown'])
+        )
+        self.assertIsNone(await db.set_address_history(address1, []))
+        self.assertEqual([], await db.get_address_history(address1))
+
+    async def create_utxo(self, my_account, amount, height, is_verified=True):
+        to_address = await my_account.receiving.get_or_create_usable_address()
+        to_hash = Ledger.address_to_hash160(to_address)
+        tx = Transaction(height=height, is_verified=is_verified) \
+            .add_inputs([self.txi(self.txo(1, sha256(f'{amount}:{height}'.encode())))]) \
+            .add_outputs([self.txo(amount, to_hash)])
+        await self.ledger.db.insert_transaction(tx)
+        await self.ledger.db.save_transaction_io(tx, to_address, to_hash)
+        return tx.outputs[0]
+
+    async def get_spendable(self, account, amount, **kwargs):
+        return [
+            estimator.txo.id for estimator in
+            await self.ledger.db.get_spendable_utxos(self.ledger, int(amount*COIN), [account], fee_per_byte=0, **kwargs)
+        ]
+
+    async def test_spendable_utxos(self):
+        account = await self.create_account()
+        small = await self.create_utxo(account, 1, height=1)
+        unconfirmed = await self.create_utxo(account, 2, height=2, is_verified=False)
+        medium = await self.create_utxo(account, 3, height=3)
+        spent = await self.create_utxo(account, 1, height=5)
+        await self.create_tx_to_nowhere(spent, height=6)
+
+        # smallest confirmed utxos first, the unconfirmed one is only used when needed
+        self.assertListEqual([small.id, medium.id], await self.get_spendable(account, 4, set_reserved=False))
+        self.assertListEqual(
+            [small.id, medium.id, unconfirmed.id], await self.get_spendable(account, 6, set_reserved=False)
+        )
+        large = await self.create_utxo(account, 500, height=4)
+        self.assertListEqual(
+            [small.id, medium.id, large.id], await self.get_spendable(account, 6, set_reserved=False)
+        )
+        self.assertListEqual([], await self.get_spendable(account, 1000))
+        self.assertListEqual(
+            [small.id, medium.id, large.id, unconfirmed.id],
+            await self.get_spendable(account, 1000, set_reserved=False, return_insufficient_funds=True)
+        )
+
+        # reserved utxos are skipped until released
+        selected = await self.ledger.db.get_spendable_utxos(self.ledger, 4*COIN, [account], fee_per_byte=0)
+        self.assertListEqual([small.id, medium.id], [estimator.txo.id for estimator in selected])
+        self.assertListEqual([large.id], await self.get_spendable(account, 4, set_reserved=False))
+        await self.ledger.db.release_outputs([estimator.txo for estimator in selected])
+        self.assertListEqual([small.id, medium.id], await self.get_spendable(account, 4, set_reserved=False))
+
+        # spend size and fee are taken from the stored outputs, not from decoding the transactions
+        estimator = selected[0]
+        self.assertEqual(Input.spend(small).size, estimator.txi.size)
+        self.assertEqual(small.script.source, estimator.txo.script.source)
+        self.assertEqual(1, estimator.txo.tx_ref.height)
+
+    async def test_spendable_utxos_dont_read_transactions(self):
+        account = await self.create_account()
+        for height in range(1, 11):
+            await self.create_utxo(account, height, height=height)
+        with mock.patch('lbry.wallet.database.Transaction', side_effect=AssertionError('decoded a transaction')):
+            self.assertEqual(3, len(await self.get_spendable(account, 5, set_reserved=False)))
+        plan = await self.ledger.db.db.execute_fetchall(
+            "EXPLAIN QUERY PLAN " + SPENDABLE_UTXOS_QUERY.format(accounts='AND account_address.account IN (?)'),
+            (1, account.id)
+        )
+        details = [row['detail'] for row in plan]
+        self.assertIn('SEARCH txo USING COVERING INDEX txo_spendable_idx (amount>?)', details)
+        self.assertIn('SEARCH tx USING COVERING INDEX tx_height_idx (txid=?)', details)
+
 
 class TestUpgrade(AsyncioTestCase):
 
@@ -434,7 +524,10 @@ class TestUpgrade(AsyncioTestCase):
         self.ledger.db.SCHEMA_VERSION = None
         self.assertListEqual(self.get_tables(), [])
         await self.ledger.db.open()
-        self.assertEqual(self.get_tables(), ['account_address', 'pubkey_address', 'tx', 'txi', 'txo'])
+        self.assertEqual(
+            self.get_tables(),
+            ['account_address', 'address_gap', 'address_history', 'pubkey_address', 'tx', 'txi', 'txo']
+        )
         self.assertListEqual(self.get_addresses(), [])
         self.add_address('address1')
         await self.ledger.db.close()
@@ -443,17 +536,26 @@ class TestUpgrade(AsyncioTestCase):
         self.ledger.db.SCHEMA_VERSION = '1.0'
         await self.ledger.db.open()
         self.assertEqual(self.get_version(), '1.0')
-        self.assertListEqual(self.get_tables(), ['account_address', 'pubkey_address', 'tx', 'txi', 'txo', 'version'])
+        self.assertListEqual(
+            self.get_tables(),
+            ['account_address', 'address_gap', 'address_history', 'pubkey_address', 'tx', 'txi', 'txo', 'version']
+        )
         self.assertListEqual(self.get_addresses(), [])  # address1 deleted during version upgrade
         self.add_address('address2')
         await self.ledger.db.close()
 
         # nothing changes
         self.assertEqual(self.get_version(), '1.0')
-        self.assertListEqual(self.get_tables(), ['account_address', 'pubkey_address', 'tx', 'txi', 'txo', 'version'])
+        self.assertListEqual(
+            self.get_tables(),
+            ['account_address', 'address_gap', 'address_history', 'pubkey_address', 'tx', 'txi', 'txo', 'version']
+        )
         await self.ledger.db.open()
         self.assertEqual(self.get_version(), '1.0')
-        self.assertListEqual(self.get_tables(), ['account_address', 'pubkey_address', 'tx', 'txi', 'txo', 'version'])
+        self.assertListEqual(
+            self.get_tables(),
+            ['account_address', 'address_gap', 'address_history', 'pubkey_address', 'tx', 'txi', 'txo', 'version']
+        )
         self.assertListEqual(self.get_addresses(), ['address2'])
         await self.ledger.db.close()
 
@@ -464,10 +566,114 @@ class TestUpgrade(AsyncioTestCase):
         """
         await self.ledger.db.open()
         self.assertEqual(self.get_version(), '1.1')
-        self.assertListEqual(self.get_tables(), ['account_address', 'foo', 'pubkey_address', 'tx', 'txi', 'txo', 'version'])
+        self.assertListEqual(
+            self.get_tables(),
+            [
+                'account_address', 'address_gap', 'address_history', 'foo', 'pubkey_address', 'tx', 'txi', 'txo',
+                'version'
+            ]
+        )
         self.assertListEqual(self.get_addresses(), [])  # all tables got reset
         await self.ledger.db.close()
 
+    async def test_address_gap_table_added_without_reset(self):
+        self.ledger = Ledger({
+            'db': Database(self.path),
+            'headers': Headers(':memory:')
+        })
+        await self.ledger.db.open()
+        self.add_address('address1')
+        await self.ledger.db.db.execute("DROP TABLE address_gap;")
+        await self.ledger.db.db.execute("UPDATE version SET version = '1.6';")
+        await self.ledger.db.close()
+
+        await self.ledger.db.open()
+        self.assertEqual(self.get_version(), '1.10')
+        self.assertListEqual(
+            self.get_tables(),
+            ['account_address', 'address_gap', 'address_history', 'pubkey_address', 'tx', 'txi', 'txo', 'version']
+        )
+        self.assertListEqual(self.get_addresses(), ['address1'])
+        await self.ledger.db.close()
+
+    @unittest.skipIf(sqlite3.sqlite_version_info < (3, 35), "requires ALTER TABLE DROP COLUMN")
+    async def test_spend_columns_filled_on_upgrade(self):
+        self.ledger = Ledger({
+            'db': Database(self.path),
+            'headers': Headers(':memory:')
+        })
+        await self.ledger.db.open()
+        txo = get_output(COIN, NULL_HASH)
+        tx = Transaction(height=1, is_verified=True).add_outputs([txo])
+        await self.ledger.db.insert_transaction(tx)
+        await self.ledger.db.db.execute(*self.ledger.db._insert_sql('txo', self.ledger.db.txo_to_row(tx, txo)))
+        await self.ledger.db.db.execute("DROP INDEX txo_spendable_idx;")
+        await self.ledger.db.db.execute("ALTER TABLE txo DROP COLUMN script_type;")
+        await self.ledger.db.db.execute("ALTER TABLE txo DROP COLUMN spend_size;")
+        await self.ledger.db.db.execute("UPDATE version SET version = '1.7';")
+        await self.ledger.db.close()
+
+        await self.ledger.db.open()
+        self.assertEqual(self.get_version(), '1.10')
+        with sqlite3.connect(self.path) as conn:
+            self.assertListEqual(
+                [('pay_pubkey_hash', Input.spend(txo).size)],
+                conn.execute("SELECT script_type, spend_size FROM txo").fetchall()
+            )
+        await self.ledger.db.close()
+
+    @unittest.skipIf(sqlite3.sqlite_version_info < (3, 35), "requires ALTER TABLE DROP COLUMN")
+    async def test_channel_public_key_ids_filled_on_upgrade(self):
+        self.ledger = Ledger({
+            'db': Database(self.path),
+            'headers': Headers(':memory:')
+        })
+        await self.ledger.db.open()
+        claim = Claim()
+        claim.channel.public_key_bytes = b'1' * 33
+        tx = get_transaction(Output.pay_claim_name_pubkey_hash(COIN, '@foo', claim, NULL_HASH))
+        for txo in (tx.outputs[0], get_output(COIN, NULL_HASH)):
+            await self.ledger.db.db.execute(*self.ledger.db._insert_sql('txo', self.ledger.db.txo_to_row(tx, txo)))
+        await self.ledger.db.db.execute("DROP INDEX txo_public_key_id_idx;")
+        await self.ledger.db.db.execute("ALTER TABLE txo DROP COLUMN public_key_id;")
+        await self.ledger.db.db.execute("UPDATE version SET version = '1.9';")
+        await self.ledger.db.close()
+
+        await self.ledger.db.open()
+        self.assertEqual(self.get_version(), '1.10')
+        with sqlite3.connect(self.path) as conn:
+            self.assertListEqual(
+                [(self.ledger.public_key_to_address(b'1' * 33),), (None,)],
+                conn.execute("SELECT public_key_id FROM txo ORDER BY txo_type DESC").fetchall()
+            )
+        await self.ledger.db.close()
+
+    async def test_address_history_moved_to_rows_on_upgrade(self):
+        self.ledger = Ledger({
+            'db': Database(self.path),
+            'headers': Headers(':memory:')
+        })
+        await self.ledger.db.open()
+        await self.ledger.db.db.execute("DROP TABLE address_history;")
+        await self.ledger.db.db.execute("ALTER TABLE pubkey_address RENAME COLUMN status TO history;")
+        await self.ledger.db.db.executemany(
+            "INSERT INTO pubkey_address (address, history, used_times) VALUES (?, ?, ?)",
+            (('address1', 'a:1:b:2:', 2), ('address2', None, 0))
+        )
+        await self.ledger.db.db.execute("UPDATE version SET version = '1.8';")
+        await self.ledger.db.close()
+
+        await self.ledger.db.open()
+        self.assertEqual(self.get_version(), '1.10')
+        self.assertEqual(
+            (hexlify(sha256(b'a:1:b:2:')).decode(), [('a', 1), ('b', 2)]),
+            await self.ledger.get_local_status_and_history('address1')
+        )
+        self.assertEqual((None, []), await self.ledger.get_local_status_and_history('address2'))
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual([(None,), (None,)], conn.execute("SELECT history FROM pubkey_address").fetchall())
+        await self.ledger.db.close()
+
 
 class TestSQLiteRace(AsyncioTestCase):
     max_misuse_attempts = 120000
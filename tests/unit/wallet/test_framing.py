@@ -0,0 +1,48 @@
+import json
+
+from lbry.testcase import AsyncioTestCase
+from lbry.wallet.rpc.framing import NewlineFramer
+from lbry.wallet.rpc.jsonrpc import JSONRPCConnection, JSONRPCv2, JSONRPCAutoDetect, Request
+
+
+class TestNewlineFramer(AsyncioTestCase):
+
+    async def test_messages_across_chunks(self):
+        framer = NewlineFramer()
+        framer.received_bytes(b'one\ntw')
+        framer.received_bytes(b'o')
+        framer.received_bytes(b'\nthree\nfour\n\nfi')
+        for message in (b'one', b'two', b'three', b'four', b''):
+            self.assertEqual(message, await framer.receive_message())
+        self.assertFalse(framer.messages)
+        framer.received_bytes(b've\n')
+        self.assertEqual(b'five', await framer.receive_message())
+        self.assertEqual(0, len(framer.buffer))
+
+    async def test_oversized_message_dropped(self):
+        framer = NewlineFramer(max_size=5)
+        framer.received_bytes(b'ok\ntoo long')
+        framer.received_bytes(b' still too long')
+        framer.received_bytes(b'\nfine\n')
+        self.assertEqual(b'ok', await framer.receive_message())
+        with self.assertRaises(MemoryError):
+            await framer.receive_message()
+        self.assertEqual(b'fine', await framer.receive_message())
+        self.assertFalse(framer.messages)
+
+
+class TestDecodedMessages(AsyncioTestCase):
+
+    def test_receive_decoded_response(self):
+        connection = JSONRPCConnection(JSONRPCv2)
+        message, event = connection.send_request(Request('server.version', []))
+        response = json.dumps({'jsonrpc': '2.0', 'id': json.loads(message)['id'], 'result': 'v1'}).encode()
+        self.assertEqual([], connection.receive_message(response, connection.decode_message(response)))
+        self.assertEqual('v1', event.result)
+
+    def test_protocol_detected_from_decoded_request(self):
+        connection = JSONRPCConnection(JSONRPCAutoDetect)
+        message = b'{"jsonrpc": "2.0", "id": 1, "method": "server.version", "params": []}'
+        request, = connection.receive_message(message, connection.decode_message(message))
+        self.assertEqual('server.version', request.method)
+        self.assertIs(JSONRPCv2, connection._protocol)
@@ -1,9 +1,14 @@
 import os
-from unittest import TestCase
+import shutil
+import asyncio
+import tempfile
+from unittest import TestCase, mock
 from binascii import hexlify
 
 from lbry.testcase import AsyncioTestCase
-from lbry.wallet import Wallet, Account, Transaction, Output, Input, Ledger, Database, Headers
+from lbry.crypto.hash import sha256
+from lbry.wallet import Wallet, Account, Transaction, Output, Input, Ledger, RegTestLedger, Database, Headers
+from lbry.wallet.stream import StreamController
 
 from tests.unit.wallet.test_transaction import get_transaction, get_output
 from tests.unit.wallet.test_headers import HEADERS, block_bytes
@@ -103,7 +108,7 @@ class TestSynchronization(LedgerTestCase):
         account = Account.generate(self.ledger, Wallet(), "torba")
         address = await account.receiving.get_or_create_usable_address()
         address_details = await self.ledger.db.get_address(address=address)
-        self.assertIsNone(address_details['history'])
+        self.assertIsNone(address_details['status'])
 
         self.add_header(block_height=0, merkle_root=b'abcd04')
         self.add_header(block_height=1, merkle_root=b'abcd04')
@@ -122,13 +127,12 @@ class TestSynchronization(LedgerTestCase):
         self.assertListEqual(self.ledger.network.get_history_called, [address])
         self.assertListEqual(self.ledger.network.get_transaction_called, [txid1, txid2, txid3])
 
+        self.assertListEqual(
+            [(txid1, 0), (txid2, 1), (txid3, 2)], await self.ledger.db.get_address_history(address)
+        )
         address_details = await self.ledger.db.get_address(address=address)
-
         self.assertEqual(
-            address_details['history'],
-            f'{txid1}:0:'
-            f'{txid2}:1:'
-            f'{txid3}:2:'
+            hexlify(sha256(f'{txid1}:0:{txid2}:1:{txid3}:2:'.encode())).decode(), address_details['status']
         )
 
         self.ledger.network.get_history_called = []
@@ -145,34 +149,69 @@ class TestSynchronization(LedgerTestCase):
         await self.ledger.update_history(address, '')
         self.assertListEqual(self.ledger.network.get_history_called, [address])
         self.assertListEqual(self.ledger.network.get_transaction_called, [txid4])
-        address_details = await self.ledger.db.get_address(address=address)
+        self.assertListEqual(
+            [(txid1, 0), (txid2, 1), (txid3, 2), (txid4, 3)], await self.ledger.db.get_address_history(address)
+        )
         self.assertEqual(
-            address_details['history'],
-            f'{txid1}:0:'
-            f'{txid2}:1:'
-            f'{txid3}:2:'
-            f'{txid4}:3:'
+            hexlify(sha256(f'{txid1}:0:{txid2}:1:{txid3}:2:{txid4}:3:'.encode())).decode(),
+            (await self.ledger.db.get_address(address=address))['status']
         )
 
+    async def test_subscribe_updates_only_changed_addresses(self):
+        txid = '252bda9b22cc902ca2aa2de3548ee8baf06b8501ff7bfb3b0b7d980dbd1bf792'
+        self.add_header(block_height=0, merkle_root=b'abcd04')
+        account = Account.generate(self.ledger, Wallet(), "torba")
+        await account.ensure_address_gap()
+        addresses = await account.receiving.get_addresses()
+        await self.ledger.db.set_address_history(addresses[0], [(txid, 0)])
+        self.ledger.network = MockNetwork([], {})
+        self.ledger.network.is_connected = True
+        self.ledger.network.client = None
+        remote_statuses = {address: None for address in addresses}
+        remote_statuses[addresses[0]] = (await self.ledger.db.get_address(address=addresses[0]))['status']
+        remote_statuses[addresses[1]] = 'changed'
+
+        async def subscribe_address(*batch):
+            return [remote_statuses[address] for address in batch]
+        self.ledger.network.subscribe_address = subscribe_address
+        with mock.patch.object(self.ledger, 'update_history', wraps=self.ledger.update_history) as update_history:
+            await self.ledger.subscribe_addresses(account.receiving, addresses, batch_size=7)
+            await self.ledger._update_tasks.done.wait()
+        # only the address with a different status is looked at, without loading any histories
+        update_history.assert_called_once_with(addresses[1], 'changed', account.receiving)
+        self.assertListEqual([addresses[1]], self.ledger.network.get_history_called)
+
 
 class MocHeaderNetwork(MockNetwork):
-    def __init__(self, responses):
+    def __init__(self, headers: bytes):
         super().__init__(None, None)
-        self.responses = responses
+        self.headers = headers  # the hub's header chain
+        self.remote_height = len(headers) // Headers.header_size - 1
+        self.get_headers_called = []
 
     async def get_headers(self, height, blocks):
-        return self.responses[height]
+        self.get_headers_called.append((height, blocks))
+        return {
+            'height': height, 'count': min(blocks, max(self.remote_height + 1 - height, 0)),
+            'hex': hexlify(self.headers[block_bytes(height):block_bytes(height + blocks)])
+        }
 
 
 class BlockchainReorganizationTests(LedgerTestCase):
 
+    def make_chain(self, start: bytes, count: int, nonce=0) -> bytes:
+        """ `start` followed by `count` headers, each linking to the one before it. """
+        chain = start
+        for _ in range(count):
+            height = len(chain) // Headers.header_size
+            chain += self.make_header(
+                block_height=height, nonce=nonce, timestamp=1231006505 + height,
+                prev_block_hash=Headers.hash_header(chain[-Headers.header_size:])
+            )
+        return chain
+
     async def test_1_block_reorganization(self):
-        self.ledger.network = MocHeaderNetwork({
-            10: {'height': 10, 'count': 5, 'hex': hexlify(
-                HEADERS[block_bytes(10):block_bytes(15)]
-            )},
-            15: {'height': 15, 'count': 0, 'hex': b''}
-        })
+        self.ledger.network = MocHeaderNetwork(HEADERS[:block_bytes(15)])
         headers = self.ledger.headers
         await headers.connect(0, HEADERS[:block_bytes(10)])
         self.add_header(block_height=len(headers))
@@ -180,16 +219,11 @@ class BlockchainReorganizationTests(LedgerTestCase):
         await self.ledger.receive_header([{
             'height': 11, 'hex': hexlify(self.make_header(block_height=11))
         }])
+        self.assertEqual(14, headers.height)
+        self.assertEqual(HEADERS[:block_bytes(15)], headers._read(0, 15))
 
     async def test_3_block_reorganization(self):
-        self.ledger.network = MocHeaderNetwork({
-            10: {'height': 10, 'count': 5, 'hex': hexlify(
-                HEADERS[block_bytes(10):block_bytes(15)]
-            )},
-            11: {'height': 11, 'count': 1, 'hex': hexlify(self.make_header(block_height=11))},
-            12: {'height': 12, 'count': 1, 'hex': hexlify(self.make_header(block_height=12))},
-            15: {'height': 15, 'count': 0, 'hex': b''}
-        })
+        self.ledger.network = MocHeaderNetwork(HEADERS[:block_bytes(15)])
         headers = self.ledger.headers
         await headers.connect(0, HEADERS[:block_bytes(10)])
         self.add_header(block_height=len(headers))
@@ -199,7 +233,144 @@ class BlockchainReorganizationTests(LedgerTestCase):
         await self.ledger.receive_header([{
             'height': 13, 'hex': hexlify(self.make_header(block_height=13))
         }])
+        self.assertEqual(14, headers.height)
+        self.assertEqual(HEADERS[:block_bytes(15)], headers._read(0, 15))
+
+    async def test_deep_reorganization_found_by_bisecting(self):
+        self.ledger.headers.validate_difficulty = False
+        common = HEADERS[:block_bytes(5)]
+        local, remote = self.make_chain(common, 60, nonce=1), self.make_chain(common, 70, nonce=2)
+        network = self.ledger.network = MocHeaderNetwork(remote)
+        headers = self.ledger.headers
+        await headers.connect(0, local)
+        self.assertEqual(64, headers.height)
+        await self.ledger.receive_header([{'height': 65, 'hex': hexlify(remote[block_bytes(65):])}])
+        self.assertEqual(74, headers.height)
+        self.assertEqual(remote, headers._read(0, 75))
+        # one header at a time, the last common header (4) is found in a dozen requests instead of 60
+        probes = [height for height, count in network.get_headers_called if count == 1]
+        self.assertLessEqual(len(probes), 12)
+        self.assertIn(4, probes)
+        self.assertIn(5, probes)
+
+    async def test_reorganization_too_deep(self):
+        self.ledger.headers.validate_difficulty = False
+        self.ledger.max_reorg_depth = 10
+        genesis = HEADERS[:block_bytes(1)]
+        local, remote = self.make_chain(genesis, 20, nonce=1), self.make_chain(genesis, 25, nonce=2)
+        self.ledger.network = MocHeaderNetwork(remote)
+        await self.ledger.headers.connect(0, local)
+        with self.assertRaisesRegex(IndexError, "Blockchain reorganization dropped"):
+            await self.ledger.update_headers()
+        self.assertEqual(local, self.ledger.headers._read(0, 21))
+        self.ledger.max_reorg_depth = 100
+        with self.assertRaisesRegex(IndexError, "rewound all the way back to genesis"):
+            await self.ledger.receive_header([{'height': 1, 'hex': hexlify(self.make_header(block_height=1))}])
+
+
+class CatchUpTests(LedgerTestCase):
+
+    async def test_header_ranges_downloaded_concurrently(self):
+        self.ledger.headers_per_request = 3
+        self.ledger.concurrent_header_requests = 2
+        network = self.ledger.network = MocHeaderNetwork(HEADERS)
+        await self.ledger.headers.connect(0, HEADERS[:block_bytes(4)])
+        await self.ledger.update_headers()
+        self.assertEqual(HEADERS, self.ledger.headers._read(0, 20))
+        self.assertEqual([
+            (4, 3), (7, 3), (10, 3), (13, 3), (16, 3), (19, 3), (20, 3)
+        ], network.get_headers_called)
+
+    async def test_short_ranges_are_fetched_again(self):
+        self.ledger.headers_per_request = 5
+        network = self.ledger.network = MocHeaderNetwork(HEADERS)
+        get_headers = network.get_headers
+
+        async def capped_get_headers(height, blocks):
+            return await get_headers(height, min(blocks, 3))
+        network.get_headers = capped_get_headers
+        await self.ledger.update_headers()
+        # ranges after a short one don't start where it ended and are requested again
+        self.assertEqual(HEADERS, self.ledger.headers._read(0, 20))
+
+
+class OfflineNetwork(MockNetwork):
+    """ A network that doesn't connect until told to. """
+
+    def __init__(self):
+        super().__init__([], {})
+        self.client = None
+        self.remote_height = 0
+        self._on_connected_controller = StreamController()
+        self.on_connected = self._on_connected_controller.stream
+        self.on_header = StreamController().stream
+        self.on_status = StreamController().stream
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        self.is_connected = False
+
+    def connect(self):
+        self.is_connected = True
+        self._on_connected_controller.add(True)
+
+    async def get_headers(self, height, count=10000, b64=False):
+        return {'height': height, 'count': 0, 'hex': ''}
 
+    async def subscribe_address(self, *addresses):
+        return [None] * len(addresses)
+
+
+class TestStartup(AsyncioTestCase):
+
+    async def test_wallet_usable_before_connecting(self):
+        data_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_path)
+        network = OfflineNetwork()
+        ledger = RegTestLedger({
+            'db': Database(':memory:'), 'headers': Headers(os.path.join(data_path, 'headers')),
+            'network': network, 'data_path': data_path
+        })
+        account = Account.generate(ledger, Wallet())
+        await asyncio.wait_for(ledger.start(), 1)
+        self.addCleanup(ledger.stop)
+        self.assertEqual('connecting', ledger.sync_state)
+        self.assertEqual(0, await account.get_balance())
+        self.assertEqual([], await account.receiving.get_addresses())
+        network.connect()
+        await asyncio.wait_for(ledger.wait_until_synced(), 1)
+        self.assertEqual('synced', ledger.sync_state)
+        self.assertEqual(20, len(await account.receiving.get_addresses()))
+        await ledger.tasks_are_done()  # max gap saved after syncing
+        network.is_connected = False
+        self.assertEqual('connecting', ledger.sync_state)
+
+
+    async def test_failed_header_sync_reported(self):
+        data_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_path)
+        network = OfflineNetwork()
+        ledger = RegTestLedger({
+            'db': Database(':memory:'), 'headers': Headers(os.path.join(data_path, 'headers')),
+            'network': network, 'data_path': data_path
+        })
+        Account.generate(ledger, Wallet())
+        await asyncio.wait_for(ledger.start(), 1)
+        self.addCleanup(ledger.stop)
+        error = IndexError("reorganization dropped 200 headers")
+        with mock.patch.object(ledger, 'initial_headers_sync', side_effect=error), \
+                mock.patch.object(ledger, 'join_network') as join_network:
+            network.connect()
+            with self.assertRaises(IndexError):
+                await asyncio.wait_for(ledger.wait_until_synced(), 1)
+            self.assertEqual('failed', ledger.sync_state)
+            network.is_connected = False
+            self.assertEqual('failed', ledger.sync_state)
+            network.connect()
+            await asyncio.sleep(0)
+            join_network.assert_not_called()
 
 class BasicAccountingTests(LedgerTestCase):
 
@@ -214,7 +385,7 @@ class BasicAccountingTests(LedgerTestCase):
             .add_outputs([Output.pay_pubkey_hash(100, hash160)])
         await self.ledger.db.insert_transaction(tx)
         await self.ledger.db.save_transaction_io(
-            tx, address, hash160, f'{tx.id}:1:'
+            tx, address, hash160
         )
         self.assertEqual(await self.account.get_balance(), 100)
 
@@ -222,7 +393,7 @@ class BasicAccountingTests(LedgerTestCase):
             .add_outputs([Output.pay_claim_name_pubkey_hash(100, 'foo', b'', hash160)])
         await self.ledger.db.insert_transaction(tx)
         await self.ledger.db.save_transaction_io(
-            tx, address, hash160, f'{tx.id}:1:'
+            tx, address, hash160
         )
         self.assertEqual(await self.account.get_balance(), 100)  # claim names don't count towards balance
         self.assertEqual(await self.account.get_balance(include_claims=True), 200)
@@ -234,7 +405,7 @@ class BasicAccountingTests(LedgerTestCase):
         tx = Transaction(is_verified=True)\
             .add_outputs([Output.pay_pubkey_hash(100, hash160)])
         await self.ledger.db.save_transaction_io(
-            'insert', tx, address, hash160, f'{tx.id}:1:'
+            'insert', tx, address, hash160
         )
 
         utxos = await self.account.get_utxos()
@@ -243,7 +414,7 @@ class BasicAccountingTests(LedgerTestCase):
         tx = Transaction(is_verified=True)\
             .add_inputs([Input.spend(utxos[0])])
         await self.ledger.db.save_transaction_io(
-            'insert', tx, address, hash160, f'{tx.id}:1:'
+            'insert', tx, address, hash160
         )
         self.assertEqual(await self.account.get_balance(include_claims=True), 0)
 
@@ -0,0 +1,87 @@
+import asyncio
+from unittest import mock
+
+from lbry.testcase import AsyncioTestCase
+from lbry.wallet.network import Network, ClientSession
+from lbry.wallet.rpc import RPCError
+
+
+class FakeSession:
+    def __init__(self, port, latency, response=None, p95_latency=None):
+        self.server = ('localhost', port)
+        self.latency = latency
+        self.response = response
+        self.expected_latency = latency
+        self.p95_latency = p95_latency
+        self.pending_requests = 0
+        self.available = True
+        self.requests = []
+
+    def is_closing(self):
+        return False
+
+    async def send_request(self, method, args):
+        self.requests.append(method)
+        await asyncio.sleep(self.latency)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+class TestSessionPool(AsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.network = Network(mock.Mock(config={'hedge_hub_requests': False}))
+
+    def connect(self, client, *pool):
+        self.network.client = client
+        self.network.session_pool.extend(pool)
+
+    async def test_read_only_requests_go_to_fastest_session(self):
+        slow, fast = FakeSession(50001, 0.02, 'slow'), FakeSession(50002, 0.001, 'fast')
+        self.connect(slow, fast)
+        self.assertEqual('fast', await self.network.resolve(['derp']))
+        self.assertEqual('slow', await self.network.get_history('address'))
+        self.assertListEqual(['blockchain.address.get_history'], slow.requests)
+
+    async def test_failover_to_next_session(self):
+        broken = FakeSession(50001, 0, ConnectionError())
+        working = FakeSession(50002, 0.01, 'ok')
+        self.connect(working, broken)
+        self.assertEqual('ok', await self.network.resolve(['derp']))
+        self.assertEqual(1, len(broken.requests))
+        self.assertEqual(1, len(working.requests))
+
+    async def test_server_errors_are_not_retried(self):
+        bad_request = FakeSession(50001, 0, RPCError(1, 'bad request'))
+        other = FakeSession(50002, 0.01, 'ok')
+        self.connect(other, bad_request)
+        with self.assertRaises(RPCError):
+            await self.network.claim_search(name='derp')
+        self.assertListEqual([], other.requests)
+
+    async def test_hedge_slow_request(self):
+        self.network.ledger.config['hedge_hub_requests'] = True
+        stalled = FakeSession(50001, 0, 'stalled', p95_latency=0.01)
+        stalled.latency = 10
+        backup = FakeSession(50002, 0.01, 'backup')
+        self.connect(stalled, backup)
+        self.assertEqual('backup', await asyncio.wait_for(self.network.resolve(['derp']), 1))
+        self.assertEqual(1, len(stalled.requests))
+
+    async def test_pooled_session_lost(self):
+        client = ClientSession(network=self.network, server=('localhost', 50001))
+        pooled = ClientSession(network=self.network, server=('localhost', 50002))
+        self.connect(client, pooled)
+        pooled.connection_lost(None)
+        self.assertListEqual([], self.network.session_pool)
+
+    def test_latency_percentiles(self):
+        session = ClientSession(network=None, server=('localhost', 50001))
+        session.response_time = 0.5
+        self.assertIsNone(session.p95_latency)
+        self.assertEqual(0.5, session.expected_latency)
+        session.request_latencies.extend(i / 100 for i in range(1, 101))
+        session.pending_requests = 1
+        self.assertEqual(0.96, session.p95_latency)
+        self.assertEqual(1.02, session.expected_latency)
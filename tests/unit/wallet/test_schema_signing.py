@@ -1,4 +1,5 @@
 from binascii import unhexlify
+from unittest import mock
 
 from lbry.testcase import AsyncioTestCase
 from lbry.wallet.constants import CENT, NULL_HASH32
@@ -237,3 +238,43 @@ class TestValidateSignContent(AsyncioTestCase):
             sha256(b''.join(pieces)),
             channel.claim.channel.public_key_bytes
         ))
+
+
+class TestSignatureVerifier(AsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.ledger = Ledger({
+            'db': Database(':memory:'),
+            'headers': Headers(':memory:')
+        })
+        self.verifier = self.ledger.signature_verifier
+
+    async def test_results_cached_per_claim_and_channel(self):
+        channel, other_channel = await get_channel(), await get_channel()
+        stream = get_stream()
+        stream.sign(channel)
+        self.assertTrue(stream.is_signed_by(channel, self.ledger))
+        self.assertTrue(stream.is_signed_by(channel, self.ledger))
+        self.assertFalse(stream.is_signed_by(other_channel, self.ledger))
+        self.assertEqual((1, 2), (self.verifier.hits, self.verifier.misses))
+        self.assertEqual(1 / 3, self.verifier.hit_rate)
+
+    async def test_verify_batch(self):
+        channel = await get_channel()
+        signed = []
+        for i in range(3):
+            stream = get_stream(f'foo{i}')
+            stream.sign(channel)
+            signed.append(stream)
+        altered = get_stream('altered')
+        altered.sign(channel)
+        altered.claim.stream.title = 'hello'
+        unsigned = get_stream('unsigned')
+        with mock.patch.object(self.verifier, 'BATCH_SIZE', 2):
+            await self.verifier.verify(
+                [(txo, channel) for txo in signed + signed + [altered, unsigned]]
+            )
+        self.assertEqual(4, len(self.verifier._cache))
+        self.assertTrue(all(txo.is_signed_by(channel, self.ledger) for txo in signed))
+        self.assertFalse(altered.is_signed_by(channel, self.ledger))
+        self.assertEqual((4, 0), (self.verifier.hits, self.verifier.misses))
@@ -1,10 +1,12 @@
 import unittest
+from unittest import mock
 from binascii import hexlify, unhexlify
 
 from lbry.wallet.bcd_data_stream import BCDataStream
 from lbry.wallet.script import (
     InputScript, OutputScript, Template, ParseError, tokenize, push_data,
-    PUSH_SINGLE, PUSH_INTEGER, PUSH_MANY, OP_HASH160, OP_EQUAL
+    PUSH_SINGLE, PUSH_INTEGER, PUSH_MANY, OP_HASH160, OP_EQUAL, OP_0, OP_SUPPORT_CLAIM, OP_2DROP, OP_DROP,
+    get_shape, PUSH
 )
 
 
@@ -259,3 +261,48 @@ class TestPayClaimNamePubkeyHash(unittest.TestCase):
             b'1d3573d042c7b83e2e643db0d8e062a04e6e9ae6b90540a2f95fe28638d0f18af4361a1c2214f73de93f4'
             b'299fb32c32f949e02198a8e91101abd6d7576a914be16e4b0f9bd8f6d47d02b3a887049c36d3b84cb88ac'
         )
+
+
+class TestParseByShape(unittest.TestCase):
+
+    def test_get_shape(self):
+        self.assertEqual(((PUSH, OP_HASH160, PUSH), [b'', b'a' * 300]), get_shape(
+            bytes([0x4c, 0]) + bytes([OP_HASH160]) + b''.join(push_data(b'a' * 300))
+        ))
+        # ends in the middle of a push
+        self.assertIsNone(get_shape(bytes([3]) + b'ab'))
+        self.assertIsNone(get_shape(bytes([0x4d, 1])))
+
+    def test_common_scripts_are_not_tokenized(self):
+        pubkey_hash, claim_id = b'h' * 20, b'c' * 20
+        with mock.patch('lbry.wallet.script.tokenize', side_effect=AssertionError('tokenized')):
+            for script in (
+                    OutputScript.pay_pubkey_hash(pubkey_hash),
+                    OutputScript.pay_script_hash(pubkey_hash),
+                    OutputScript.pay_claim_name_pubkey_hash(b'cats', b'claim', pubkey_hash),
+                    OutputScript.pay_update_claim_pubkey_hash(b'cats', claim_id, b'claim', pubkey_hash),
+                    OutputScript.pay_support_pubkey_hash(b'cats', claim_id, pubkey_hash),
+                    OutputScript.pay_support_data_pubkey_hash(b'cats', claim_id, b'support', pubkey_hash)):
+                parsed = OutputScript(script.source)
+                self.assertEqual(script.template.name, parsed.template.name)
+                self.assertEqual(script.values, parsed.values)
+            script = InputScript.redeem_pubkey_hash(b's' * 71, b'p' * 33)
+            self.assertEqual({'signature': b's' * 71, 'pubkey': b'p' * 33}, InputScript(script.source).values)
+            script = InputScript.redeem_time_lock_script_hash(b's' * 71, b'p' * 33, 1000, b'h' * 20)
+            parsed = InputScript(script.source)
+            self.assertEqual('script_hash+timelock', parsed.template.name)
+            self.assertEqual({'height': 1000, 'pubkey_hash': b'h' * 20}, parsed.values['script'].values)
+
+    def test_unusual_scripts_fall_back_to_parser(self):
+        # an empty name pushed with OP_0
+        source = bytes([OP_SUPPORT_CLAIM, OP_0]) + b''.join(push_data(b'c' * 20)) + bytes([OP_2DROP, OP_DROP]) \
+            + OutputScript.pay_pubkey_hash(b'h' * 20).source
+        script = OutputScript(source)
+        self.assertEqual('support_claim+pay_pubkey_hash', script.template.name)
+        self.assertEqual(b'', script.values['claim_name'])
+        script = InputScript.redeem_multi_sig_script_hash([b's' * 71, b's' * 71], [b'p' * 33] * 3)
+        parsed = InputScript(script.source)
+        self.assertEqual('script_hash+multi_sig', parsed.template.name)
+        self.assertEqual(3, parsed.values['script'].values['pubkeys_count'])
+        with self.assertRaisesRegex(ValueError, 'No matching templates'):
+            OutputScript(bytes([OP_HASH160, OP_HASH160])).parse()
@@ -1,5 +1,6 @@
 import os
 import unittest
+from unittest import mock
 import tempfile
 import shutil
 from binascii import hexlify, unhexlify
@@ -8,6 +9,10 @@ from itertools import cycle
 from lbry.testcase import AsyncioTestCase
 from lbry.wallet.constants import CENT, COIN, NULL_HASH32
 from lbry.wallet import Wallet, Account, Ledger, Database, Headers, Transaction, Output, Input
+from lbry.wallet.bip32 import PrivateKey
+from lbry.wallet.transaction import decoded_claims
+from lbry.crypto.hash import sha256
+from lbry.schema.claim import Claim
 
 
 NULL_HASH = b'\x00'*32
@@ -304,6 +309,27 @@ class TestTransactionSerialization(unittest.TestCase):
         self.assertEqual(hexlify(script.values['pubkey_hash']), b'a3328f18ac1892a6667f713d7020ff3437d973c8')
 
 
+class TestDecodedClaimCache(unittest.TestCase):
+
+    def test_claims_shared_until_changed(self):
+        claim = Claim()
+        claim.channel.title = 'shared'
+        claim.channel.public_key_bytes = b'1' * 33
+        raw = get_claim_transaction('@foo', claim).raw
+        first, second = Transaction(raw).outputs[0], Transaction(raw).outputs[0]
+        self.assertIs(first.claim, second.claim)
+        self.assertEqual('shared', first.claim.channel.title)
+        self.assertIs(first.claim, decoded_claims.cache[sha256(claim.to_bytes())])
+
+        private_key = PrivateKey.from_seed(Ledger, b'1' * 32)
+        first.set_channel_private_key(private_key)
+        self.assertIsNot(first.claim, second.claim)
+        self.assertEqual(private_key.public_key.pubkey_bytes, first.claim.channel.public_key_bytes)
+        self.assertEqual(b'1' * 33, second.claim.channel.public_key_bytes)
+        self.assertEqual(b'1' * 33, Transaction(raw).outputs[0].claim.channel.public_key_bytes)
+        self.assertEqual('shared', first.claim.channel.title)
+
+
 class TestTransactionSigning(AsyncioTestCase):
 
     async def asyncSetUp(self):
@@ -342,6 +368,34 @@ class TestTransactionSigning(AsyncioTestCase):
             b'398327891008c5c0be4357683f12cb22346691ff23914f457bf679601'
         )
 
+    async def test_sign_many_inputs_in_batches(self):
+        account = Account.from_dict(
+            self.ledger, Wallet(), {
+                "seed":
+                    "carbon smart garage balance margin twelve chest sword toas"
+                    "t envelope bottom stomach absent"
+            }
+        )
+        await account.ensure_address_gap()
+        receiving = await account.receiving.get_addresses(limit=3)
+        change = await account.change.get_addresses(limit=2)
+        tx = Transaction() \
+            .add_inputs([
+                Input.spend(get_output(COIN + i, self.ledger.address_to_hash160(address)))
+                for i, address in enumerate(receiving + change + receiving[:1])
+            ]) \
+            .add_outputs([Output.pay_pubkey_hash(COIN, self.ledger.address_to_hash160(receiving[0]))])
+
+        with mock.patch.object(Transaction, 'SIGNING_BATCH_SIZE', 2):
+            await tx.sign([account])
+
+        for i, (txi, address) in enumerate(zip(tx.inputs, receiving + change + receiving[:1])):
+            private_key = await self.ledger.get_private_key_for_address(account.wallet, address)
+            self.assertEqual(private_key.public_key.pubkey_bytes, txi.script.values['pubkey'])
+            self.assertEqual(
+                private_key.sign(tx._serialize_for_signature(i)) + b'\x01', txi.script.values['signature']
+            )
+
 
 class TransactionIOBalancing(AsyncioTestCase):
 
@@ -389,7 +443,7 @@ class TransactionIOBalancing(AsyncioTestCase):
             await self.ledger.db.save_transaction_io(
                 self.funding_tx,
                 self.ledger.hash160_to_address(utxo.script.values['pubkey_hash']),
-                utxo.script.values['pubkey_hash'], ''
+                utxo.script.values['pubkey_hash']
             )
 
         return utxos
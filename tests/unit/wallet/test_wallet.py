@@ -1,7 +1,9 @@
 import json
+import asyncio
 import jsonschema
 import os
 import tempfile
+import threading
 from binascii import hexlify
 
 import lbry.schema.types.v2 as schema_v2
@@ -196,6 +198,61 @@ class TestWalletCreation(AsyncioTestCase):
 
             self.assertEqual(account.public_key.address, wallet.default_account.public_key.address)
 
+    async def test_saves_coalesced_in_background(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'wallet.json')
+            wallet = self.manager.import_wallet(path)
+            account = wallet.generate_account(self.main_ledger)
+            with mock.patch.object(wallet.storage, 'write', wraps=wallet.storage.write) as write:
+                for i in range(10):
+                    wallet.preferences[f'key{i}'] = i
+                    self.assertIsNone(wallet.save())
+                self.assertFalse(os.path.exists(path))
+                await wallet.flush()
+                self.assertEqual(1, write.call_count)
+                # changed again while that write is being made
+                writing, finish_writing = threading.Event(), threading.Event()
+                write.side_effect = lambda json_dict: writing.set() or finish_writing.wait()
+                wallet.save()
+                await self.loop.run_in_executor(None, writing.wait)
+                wallet.preferences['key0'] = 'changed'
+                wallet.save()
+                write.side_effect = None
+                finish_writing.set()
+                await wallet.flush()
+                self.assertEqual(3, write.call_count)
+            with open(path) as wallet_file:
+                saved = json.load(wallet_file)
+            self.assertEqual('changed', saved['preferences']['key0']['value'])
+            self.assertEqual(9, saved['preferences']['key9']['value'])
+            self.assertEqual(account.id, Wallet.from_storage(WalletStorage(path), self.manager).default_account.id)
+
+    async def test_failed_background_save_raised_by_flush(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wallet = self.manager.import_wallet(os.path.join(tmp_dir, 'wallet.json'))
+            with mock.patch.object(wallet.storage, 'write', side_effect=OSError("No space left on device")):
+                wallet.save()
+                with self.assertRaisesRegex(OSError, "No space left on device"):
+                    await wallet.flush()
+            # reported once, the next save writes the whole wallet again
+            await wallet.flush()
+            wallet.save()
+            await wallet.flush()
+            self.assertTrue(os.path.exists(wallet.storage.path))
+
+    async def test_failed_background_save_kept_until_flushed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wallet = self.manager.import_wallet(os.path.join(tmp_dir, 'wallet.json'))
+            with mock.patch.object(wallet.storage, 'write', side_effect=OSError("Permission denied")):
+                wallet.save()
+                await asyncio.wait([wallet._save_task])
+            # saved again by code that doesn't flush, after the failed write finished
+            wallet.save()
+            with self.assertRaisesRegex(OSError, "Permission denied"):
+                await wallet.flush()
+            await wallet.flush()
+            self.assertTrue(os.path.exists(wallet.storage.path))
+
     def test_merge(self):
         wallet1 = Wallet()
         wallet1.preferences['one'] = 1